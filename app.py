@@ -6,44 +6,295 @@ predições interativas sem instalar pacotes externos.
 
 Objetivo: demonstrar os conceitos básicos de treinamento/avaliação/predição
 de forma executável no venv atual (que pode não ter wheels para scikit-learn).
+
+O modelo treinado (`KNNModel`) pode ser salvo num arquivo binário e carregado
+com mmap: a inicialização não depende do tamanho do conjunto de dados e
+vários processos de predição compartilham a mesma cópia (somente leitura) dos
+dados pelo cache de páginas do sistema. Se o numpy estiver instalado, as
+predições em lote são vetorizadas; sem ele tudo continua em Python puro.
+
+Predições em massa (`--predict-file`, `-` para stdin) leem CSV ou NDJSON como
+stream, em blocos de `--chunk-size` linhas classificados de uma vez, e gravam
+um resultado por linha de entrada: a memória não cresce com o arquivo.
+
+Uso:
+  python app.py                                 # treina, avalia e pergunta
+  python app.py --save-model knn.model          # treina e salva o modelo
+  python app.py --model knn.model               # carrega sem gerar dados
+  python app.py --model knn.model --predict-file pontos.csv --output pred.csv
+  cat pontos.ndjson | python app.py --model knn.model --predict-file - --format ndjson
+
+Para pontos com muitas dimensões (embeddings), `--index lsh` troca a busca
+exata por uma aproximada (LSH por projeções aleatórias), com recall e
+velocidade ajustáveis; `--ann-bench` mede os dois.
+
+  python app.py --ann-bench --dims 256 --points 50000 -k 10 --lsh-tables 12
+
+Conjuntos sintéticos grandes (`--generate N`) são gerados em blocos
+independentes, em paralelo (`--workers`), e gravados direto num arquivo de
+modelo via mmap. Cada bloco tem sua própria semente, derivada de `--seed` e do
+número do bloco: o resultado não depende do número de workers.
+
+  python app.py --generate 10000000 --dims 16 --classes 10 --workers 4 --save-model big.model
+
+O modelo também pode ser atualizado sem reconstrução (`partial_fit` e
+`remove`, com crescimento amortizado e compactação preguiçosa); no modo
+interativo, as predições confirmadas pelo usuário entram no modelo.
+
+A validação cruzada (`--cv FOLDS`, classe `CrossValidator`) calcula os
+vizinhos de cada ponto uma única vez e avalia todos os folds e valores de k
+a partir desse cache.
+
+  python app.py --cv 5 --cv-k 1,3,5,7,9
+
+Para servir o modelo por HTTP, veja `knn_server.py`.
 """
 
 from __future__ import annotations
 
+import argparse
+import contextlib
+import csv
+import hashlib
+import heapq
+import json
 import math
+import mmap
 import random
-from typing import List, Tuple
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:  # opcional: predição vetorizada e arrays sobre o mmap sem cópia
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+
+def _engine(engine: str) -> str:
+    """Resolve ``"auto"`` para ``"numpy"`` (se instalado) ou ``"python"``."""
+    if engine not in ("auto", "python", "numpy"):
+        raise ValueError(f"engine desconhecida: {engine}")
+    if engine == "numpy" and np is None:
+        raise ValueError("engine 'numpy' requer o pacote numpy")
+    if engine == "auto":
+        engine = "numpy" if np is not None else "python"
+    return engine
+
+
+# Três centróides (cada um com 4 features, semelhante ao formato do Iris)
+IRIS_CENTROIDS = [
+    [5.0, 3.5, 1.4, 0.2],  # classe 0 (ex.: setosa)
+    [6.0, 3.0, 4.5, 1.5],  # classe 1 (ex.: versicolor)
+    [6.5, 3.0, 5.5, 2.0],  # classe 2 (ex.: virginica)
+]
 
 
 def generate_synthetic_data(
     n_per_class: int = 50, seed: int = 42
 ) -> Tuple[List[List[float]], List[int], List[str]]:
 
-    random.seed(seed)
-    # Três centróides (cada um com 4 features, semelhante ao formato do Iris)
-    centroids = [
-        [5.0, 3.5, 1.4, 0.2],  # classe 0 (ex.: setosa)
-        [6.0, 3.0, 4.5, 1.5],  # classe 1 (ex.: versicolor)
-        [6.5, 3.0, 5.5, 2.0],  # classe 2 (ex.: virginica)
-    ]
+    # gerador próprio (mesma sequência de random.seed) sem mexer no estado global
+    rng = random.Random(seed)
     labels = ["class_0", "class_1", "class_2"]
     X: List[List[float]] = []
     y: List[int] = []
-    for idx, c in enumerate(centroids):
+    for idx, c in enumerate(IRIS_CENTROIDS):
         for _ in range(n_per_class):
             # adicionar ruído gaussiano simples
-            point = [c_i + random.uniform(-0.6, 0.6) for c_i in c]
+            point = [c_i + rng.uniform(-0.6, 0.6) for c_i in c]
             X.append(point)
             y.append(idx)
     return X, y, labels
 
 
+def _stream_seed(seed: int, stream: int) -> int:
+    """Semente independente para o bloco ``stream`` (-1: os centróides)."""
+    digest = hashlib.sha256(f"{seed}:{stream}".encode("ascii")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def synthetic_centroids(n_classes: int = 3, n_features: int = 4, seed: int = 42) -> List[List[float]]:
+    """Centróides das classes: os do Iris para 3x4, senão sorteados em [0, 10)."""
+    if (n_classes, n_features) == (3, 4):
+        return [list(c) for c in IRIS_CENTROIDS]
+    rng = random.Random(_stream_seed(seed, -1))
+    return [[rng.uniform(0.0, 10.0) for _ in range(n_features)] for _ in range(n_classes)]
+
+
+def synthetic_chunk(
+    chunk: int,
+    n: int,
+    centroids: List[List[float]],
+    seed: int = 42,
+    chunk_size: int = 65536,
+    spread: float = 0.6,
+    engine: str = "auto",
+) -> Tuple[Any, Any]:
+    """Gera o bloco ``chunk`` de um conjunto com ``n`` pontos.
+
+    O ponto ``i`` pertence à classe ``i % n_classes`` e cada bloco tem o seu
+    próprio gerador (semente derivada de ``seed`` e do número do bloco), então
+    o resultado não depende de quantos blocos são gerados em paralelo nem em
+    que ordem. Com numpy devolve arrays ``(m, d)``/``(m,)``; sem ele,
+    ``array('d')`` achatado e ``array('i')``. A sequência de números difere
+    entre as duas engines.
+    """
+    start = chunk * chunk_size
+    m = max(0, min(chunk_size, n - start))
+    n_classes, d = len(centroids), len(centroids[0])
+    if _engine(engine) == "numpy":
+        rng = np.random.default_rng(_stream_seed(seed, chunk))
+        y = (np.arange(start, start + m) % n_classes).astype(np.int32)
+        X = np.asarray(centroids, dtype=np.float64)[y]
+        X += rng.uniform(-spread, spread, size=(m, d))
+        return X, y
+    prng = random.Random(_stream_seed(seed, chunk))
+    uniform = prng.uniform
+    ys = array("i", ((start + j) % n_classes for j in range(m)))
+    Xs = array("d", (c + uniform(-spread, spread) for label in ys for c in centroids[label]))
+    return Xs, ys
+
+
+def _synthetic_task(*job: Any) -> Tuple[bytes, bytes]:
+    # executado em outro processo (engine python): devolve bytes, baratos de transferir
+    X, y = synthetic_chunk(*job)
+    return X.tobytes(), y.tobytes()
+
+
+def iter_synthetic(
+    n: int,
+    n_features: int = 4,
+    n_classes: int = 3,
+    seed: int = 42,
+    chunk_size: int = 65536,
+    spread: float = 0.6,
+    workers: int = 1,
+    engine: str = "auto",
+) -> Iterator[Tuple[int, Any, Any]]:
+    """Gera ``n`` pontos como stream de blocos ``(início, X, y)``, em ordem.
+
+    Com ``workers > 1`` os blocos são produzidos em paralelo (threads com
+    numpy, que libera o GIL; processos em Python puro), com no máximo
+    ``2 * workers`` blocos prontos em memória.
+    """
+    engine = _engine(engine)
+    centroids = synthetic_centroids(n_classes, n_features, seed)
+    jobs = [
+        (c, n, centroids, seed, chunk_size, spread, engine)
+        for c in range((n + chunk_size - 1) // chunk_size)
+    ]
+    if workers <= 1:
+        for job in jobs:
+            X, y = synthetic_chunk(*job)
+            yield job[0] * chunk_size, X, y
+        return
+    # numpy libera o GIL no cálculo; Python puro precisa de processos
+    pool: Any = ThreadPoolExecutor(workers) if engine == "numpy" else ProcessPoolExecutor(workers)
+    task = synthetic_chunk if engine == "numpy" else _synthetic_task
+    with pool:
+        pending: Deque[Any] = deque()
+        for job in jobs:
+            pending.append((job[0], pool.submit(task, *job)))
+            if len(pending) >= 2 * workers:
+                yield _ready(*pending.popleft(), chunk_size)
+        while pending:
+            yield _ready(*pending.popleft(), chunk_size)
+
+
+def _ready(chunk: int, future: Any, chunk_size: int) -> Tuple[int, Any, Any]:
+    X, y = future.result()
+    if isinstance(X, bytes):
+        X, y = array("d", X), array("i", y)
+    return chunk * chunk_size, X, y
+
+
+def fill_synthetic(
+    X_out: Any,
+    y_out: Any,
+    n_classes: int = 3,
+    seed: int = 42,
+    chunk_size: int = 65536,
+    spread: float = 0.6,
+    workers: int = 1,
+) -> None:
+    """Preenche arrays já alocados (inclusive sobre mmap) com pontos sintéticos.
+
+    ``X_out`` é um array numpy ``(n, d)`` ou um buffer plano de floats
+    (``array('d')``, ``memoryview``) com ``n * d`` posições; ``y_out`` tem
+    ``n`` inteiros. Com numpy, os blocos são gravados direto no destino.
+    """
+    n = len(y_out)
+    numpy_out = np is not None and isinstance(X_out, np.ndarray)
+    d = X_out.shape[1] if numpy_out else (len(X_out) // n if n else 0)
+    engine = "numpy" if numpy_out else "python"
+    if numpy_out and workers > 1:
+        centroids = synthetic_centroids(n_classes, d, seed)
+
+        def fill(chunk: int) -> None:
+            X, y = synthetic_chunk(chunk, n, centroids, seed, chunk_size, spread, engine)
+            start = chunk * chunk_size
+            X_out[start:start + len(y)] = X
+            y_out[start:start + len(y)] = y
+
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(fill, range((n + chunk_size - 1) // chunk_size)))
+        return
+    for start, X, y in iter_synthetic(n, d, n_classes, seed, chunk_size, spread, workers, engine):
+        if numpy_out:
+            X_out[start:start + len(y)] = X
+            y_out[start:start + len(y)] = y
+        else:
+            X_out[start * d:(start + len(y)) * d] = X
+            y_out[start:start + len(y)] = y
+
+
+def write_synthetic_model(
+    path,
+    n: int,
+    n_features: int = 4,
+    n_classes: int = 3,
+    seed: int = 42,
+    chunk_size: int = 65536,
+    spread: float = 0.6,
+    workers: int = 1,
+    k: int = 5,
+) -> None:
+    """Gera ``n`` pontos direto num arquivo de modelo (`KNNModel.load`).
+
+    O arquivo é alocado com o tamanho final e os blocos são gravados sobre o
+    mmap: nada do conjunto precisa caber na memória.
+    """
+    labels = [f"class_{i}" for i in range(n_classes)]
+    sizes = {"X": ("d", n * n_features * 8), "y": ("i", n * 4)}
+    offsets = _write_model_file(path, _model_toc(k, n, n_features, labels), sizes)
+    with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as buf:
+        if np is not None:
+            X_out: Any = np.frombuffer(buf, np.float64, n * n_features, offsets["X"]).reshape(n, n_features)
+            y_out: Any = np.frombuffer(buf, np.int32, n, offsets["y"])
+        else:
+            view = memoryview(buf)
+            X_out = view[offsets["X"]:offsets["X"] + sizes["X"][1]].cast("d")
+            y_out = view[offsets["y"]:offsets["y"] + sizes["y"][1]].cast("i")
+        fill_synthetic(X_out, y_out, n_classes, seed, chunk_size, spread, workers)
+        del X_out, y_out
+        if np is None:
+            view.release()
+        buf.flush()
+
+
 def train_test_split(
     X: List[List[float]], y: List[int], test_size: float = 0.2, seed: int = 1
 ) -> Tuple:
-    random.seed(seed)
+    rng = random.Random(seed)
     indices = list(range(len(X)))
-    random.shuffle(indices)
+    rng.shuffle(indices)
     split = int(len(X) * (1 - test_size))
     train_idx = indices[:split]
     test_idx = indices[split:]
@@ -87,37 +338,1115 @@ def evaluate(
     return correct / len(X_test) if X_test else 0.0
 
 
+MODEL_MAGIC = b"KNNMODEL"
+MODEL_VERSION = 1
+# magic, versão, flags, offset e tamanho do índice (JSON) no fim do arquivo
+_MODEL_HEADER = struct.Struct("<8sIIQQ")
+# seções alinhadas para permitir arrays diretamente sobre o mmap
+_ALIGN = 64
+_BLOCK_ELEMENTS = 1 << 22
+
+
+class _Rows:
+    """Sequência de linhas sobre um buffer plano de floats (sem copiar)."""
+
+    def __init__(self, flat: memoryview, n_features: int) -> None:
+        self._flat = flat
+        self._d = n_features
+
+    def __len__(self) -> int:
+        return len(self._flat) // self._d if self._d else 0
+
+    def __getitem__(self, i: int) -> memoryview:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._flat[i * self._d:(i + 1) * self._d]
+
+
+class LSHIndex:
+    """Índice aproximado por projeções aleatórias (LSH de sinal, "SimHash").
+
+    Cada uma das ``n_tables`` tabelas resume um ponto (centrado na média do
+    treino) em ``n_bits`` sinais de projeções aleatórias; pontos próximos
+    tendem a cair no mesmo código. A busca junta os pontos com o mesmo código
+    da consulta em cada tabela (mais ``n_probe`` códigos vizinhos, trocando os
+    bits de projeção mais incerta) e só esses candidatos têm a distância
+    exata calculada.
+
+    Mais tabelas ou mais sondas aumentam o recall; mais bits deixam os baldes
+    menores e a busca mais rápida. Por tabela, os códigos ficam ordenados ao
+    lado da permutação dos pontos, então o índice é gravado junto com o
+    modelo e usado direto do mmap.
+
+    Pontos novos (`add`) vão para um buffer de delta, varrido linearmente nas
+    buscas, e só são intercalados nas tabelas ordenadas (`merge`, O(n) por
+    tabela) quando o buffer passa de ~n/16 pontos; a centragem continua a
+    média do primeiro `build`.
+    """
+
+    def __init__(self, n_tables: int = 8, n_bits: int = 16, n_probe: int = 2, seed: int = 0) -> None:
+        if not 1 <= n_bits <= 62:
+            raise ValueError("n_bits precisa estar entre 1 e 62")
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probe = min(n_probe, n_bits)
+        self.seed = seed
+        self.n = 0
+        self.planes: Any = []
+        self.mean: Any = []
+        self.codes: Any = []
+        self.order: Any = []
+        # pontos ainda fora das tabelas: índice e código por tabela
+        self.delta_ids: List[int] = []
+        self.delta_codes: List[List[int]] = []
+        self._delta_np: Any = None
+
+    def params(self) -> Dict[str, int]:
+        return {"n_tables": self.n_tables, "n_bits": self.n_bits, "n_probe": self.n_probe, "seed": self.seed}
+
+    def build(self, X: Any, engine: str) -> "LSHIndex":
+        n, d = len(X), len(X[0])
+        self.n = n
+        self.delta_ids, self.delta_codes, self._delta_np = [], [], None
+        # os mesmos planos nas duas engines: arquivos e resultados intercambiáveis
+        rng = random.Random(self.seed)
+        planes = [[rng.gauss(0.0, 1.0) for _ in range(d)] for _ in range(self.n_tables * self.n_bits)]
+        if engine == "numpy":
+            self.planes = np.asarray(planes)
+            self.mean = X.mean(0)
+            codes = self._codes_numpy(self._project_numpy(X))
+            self.order = np.argsort(codes, axis=0, kind="stable").T.astype(np.int32)
+            self.codes = np.take_along_axis(codes.T, self.order.astype(np.int64), axis=1)
+        else:
+            self.planes = planes
+            self.mean = [sum(col) / n for col in zip(*X)]
+            per_point = [self._codes_python(self._project_python(x)) for x in X]
+            self.codes, self.order = [], []
+            for t in range(self.n_tables):
+                order = sorted(range(n), key=lambda i: per_point[i][t])
+                self.order.append(order)
+                self.codes.append([per_point[i][t] for i in order])
+        return self
+
+    def add(self, X: Any, start: int, engine: str) -> None:
+        """Indexa os pontos ``X`` como ``start``, ``start + 1``, ..."""
+        if engine == "numpy":
+            codes = self._codes_numpy(self._project_numpy(np.asarray(X, dtype=np.float64))).tolist()
+        else:
+            codes = [self._codes_python(self._project_python(x)) for x in X]
+        self.delta_ids.extend(range(start, start + len(codes)))
+        self.delta_codes.extend(codes)
+        self._delta_np = None
+        if len(self.delta_ids) > max(_LSH_DELTA_MIN, self.n // 16):
+            self.merge(engine)
+
+    def merge(self, engine: str) -> None:
+        """Intercala o buffer de delta nas tabelas ordenadas."""
+        if not self.delta_ids:
+            return
+        # os índices novos são maiores que todos os indexados: em empates de
+        # código eles vão depois, como num `build` do zero
+        if engine == "numpy":
+            ids = np.asarray(self.delta_ids, dtype=np.int32)
+            dc = np.asarray(self.delta_codes, dtype=np.int64)
+            codes, order = [], []
+            for t in range(self.n_tables):
+                s = np.argsort(dc[:, t], kind="stable")
+                pos = np.searchsorted(self.codes[t], dc[s, t], side="right")
+                codes.append(np.insert(self.codes[t], pos, dc[s, t]))
+                order.append(np.insert(self.order[t], pos, ids[s]))
+            self.codes, self.order = np.stack(codes), np.stack(order)
+        else:
+            codes, order = [], []
+            for t in range(self.n_tables):
+                # o timsort aproveita a parte já ordenada: O(n + delta log delta)
+                pairs = list(zip(self.codes[t], self.order[t]))
+                pairs.extend((c[t], i) for i, c in zip(self.delta_ids, self.delta_codes))
+                pairs.sort()
+                codes.append([c for c, _ in pairs])
+                order.append([i for _, i in pairs])
+            self.codes, self.order = codes, order
+        self.n += len(self.delta_ids)
+        self.delta_ids, self.delta_codes, self._delta_np = [], [], None
+
+    def compact(self, keep: Sequence[bool], engine: str) -> None:
+        """Tira das tabelas os pontos com ``keep[i]`` falso e renumera os demais."""
+        self.merge(engine)
+        if engine == "numpy":
+            keep_arr = np.asarray(keep, dtype=bool)
+            new_id = (np.cumsum(keep_arr) - 1).astype(np.int32)
+            mask = keep_arr[self.order]
+            self.codes = self.codes[mask].reshape(self.n_tables, -1)
+            self.order = new_id[self.order[mask].reshape(self.n_tables, -1)]
+        else:
+            new_ids: List[int] = []
+            count = 0
+            for flag in keep:
+                new_ids.append(count)
+                count += bool(flag)
+            codes, order = [], []
+            for t in range(self.n_tables):
+                kept = [j for j, i in enumerate(self.order[t]) if keep[i]]
+                codes.append([self.codes[t][j] for j in kept])
+                order.append([new_ids[self.order[t][j]] for j in kept])
+            self.codes, self.order = codes, order
+        self.n = int(sum(1 for flag in keep if flag))
+
+    def _project_numpy(self, Q: "np.ndarray") -> "np.ndarray":
+        return ((Q - self.mean) @ self.planes.T).reshape(len(Q), self.n_tables, self.n_bits)
+
+    def _codes_numpy(self, P: "np.ndarray") -> "np.ndarray":
+        weights = np.left_shift(np.int64(1), np.arange(self.n_bits, dtype=np.int64))
+        return ((P > 0) * weights).sum(2)
+
+    def _project_python(self, x: Sequence[float]) -> List[float]:
+        c = [xi - mi for xi, mi in zip(x, self.mean)]
+        return [sum(ci * pi for ci, pi in zip(c, plane)) for plane in self.planes]
+
+    def _codes_python(self, proj: List[float]) -> List[int]:
+        B = self.n_bits
+        return [
+            sum(1 << b for b, v in enumerate(proj[t * B:(t + 1) * B]) if v > 0)
+            for t in range(self.n_tables)
+        ]
+
+    def _probes(self, code: int, proj: Sequence[float]) -> List[int]:
+        uncertain = sorted(range(self.n_bits), key=lambda b: abs(proj[b]))[:self.n_probe]
+        return [code] + [code ^ (1 << b) for b in uncertain]
+
+    def candidates_python(self, x: Sequence[float]) -> List[int]:
+        proj = self._project_python(x)
+        B = self.n_bits
+        found = set()
+        probes = []
+        for t, code in enumerate(self._codes_python(proj)):
+            codes, order = self.codes[t], self.order[t]
+            probes.append(set(self._probes(code, proj[t * B:(t + 1) * B])))
+            for c in probes[t]:
+                found.update(order[bisect_left(codes, c):bisect_right(codes, c)])
+        for i, codes in zip(self.delta_ids, self.delta_codes):
+            if any(c in probe for c, probe in zip(codes, probes)):
+                found.add(i)
+        return sorted(found)
+
+    def candidates_numpy(self, Q: "np.ndarray") -> List["np.ndarray"]:
+        P = self._project_numpy(Q)
+        codes = self._codes_numpy(P)
+        # códigos sondados: o próprio e os com um bit incerto trocado
+        flips = np.argsort(np.abs(P), axis=2)[:, :, :self.n_probe]
+        probes = np.concatenate([codes[:, :, None], codes[:, :, None] ^ np.left_shift(1, flips)], axis=2)
+        bounds = []
+        for t in range(self.n_tables):
+            lo = np.searchsorted(self.codes[t], probes[:, t, :], side="left")
+            hi = np.searchsorted(self.codes[t], probes[:, t, :], side="right")
+            bounds.append((lo, hi))
+        if self.delta_ids and self._delta_np is None:
+            self._delta_np = (np.asarray(self.delta_ids), np.asarray(self.delta_codes, dtype=np.int64))
+        out = []
+        for i in range(len(Q)):
+            parts = [
+                self.order[t][lo[i, j]:hi[i, j]]
+                for t, (lo, hi) in enumerate(bounds)
+                for j in range(probes.shape[2])
+                if hi[i, j] > lo[i, j]
+            ]
+            if self.delta_ids:
+                ids, dc = self._delta_np
+                parts.append(ids[(dc[:, :, None] == probes[i][None]).any((1, 2))])
+            out.append(np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int32))
+        return out
+
+    def sections(self, engine: str) -> Dict[str, Tuple[str, bytes]]:
+        self.merge(engine)
+        if engine == "numpy":
+            return {
+                "lsh_planes": ("d", np.ascontiguousarray(self.planes, dtype=np.float64).tobytes()),
+                "lsh_mean": ("d", np.asarray(self.mean, dtype=np.float64).tobytes()),
+                "lsh_codes": ("q", np.ascontiguousarray(self.codes, dtype=np.int64).tobytes()),
+                "lsh_order": ("i", np.ascontiguousarray(self.order, dtype=np.int32).tobytes()),
+            }
+        return {
+            "lsh_planes": ("d", array("d", (v for row in self.planes for v in row)).tobytes()),
+            "lsh_mean": ("d", array("d", self.mean).tobytes()),
+            "lsh_codes": ("q", array("q", (c for table in self.codes for c in table)).tobytes()),
+            "lsh_order": ("i", array("i", (i for table in self.order for i in table)).tobytes()),
+        }
+
+    @classmethod
+    def from_sections(cls, params: Dict[str, int], n: int, d: int, read, engine: str) -> "LSHIndex":
+        index = cls(**params)
+        index.n = n
+        T, TB = index.n_tables, index.n_tables * index.n_bits
+        if engine == "numpy":
+            index.planes = read("lsh_planes").reshape(TB, d)
+            index.mean = read("lsh_mean")
+            index.codes = read("lsh_codes").reshape(T, n)
+            index.order = read("lsh_order").reshape(T, n)
+        else:
+            index.planes = _Rows(read("lsh_planes"), d)
+            index.mean = read("lsh_mean")
+            index.codes = _Rows(read("lsh_codes"), n)
+            index.order = _Rows(read("lsh_order"), n)
+        return index
+
+
+_NP_TYPES = {"d": "float64", "i": "int32", "q": "int64"}
+# pontos novos acumulados no delta do LSH antes de intercalar nas tabelas
+_LSH_DELTA_MIN = 1024
+# fração de pontos removidos que dispara a compactação do modelo
+_COMPACT_RATIO = 0.25
+
+
+def _model_toc(k: int, n: int, n_features: int, labels: List[str]) -> Dict[str, Any]:
+    return {
+        "k": k,
+        "n": n,
+        "n_features": n_features,
+        "labels": labels,
+        "byteorder": sys.byteorder,
+        "index": None,
+        "sections": {},
+    }
+
+
+def _write_model_file(path, toc: Dict[str, Any], sections: Dict[str, Tuple[str, Any]]) -> Dict[str, int]:
+    """Grava cabeçalho, seções e TOC; devolve o offset de cada seção.
+
+    Uma seção pode ser ``(tipo, bytes)`` ou ``(tipo, tamanho)``: nesse caso o
+    espaço só é reservado (esparso, com zeros) para ser preenchido depois
+    sobre um mmap do arquivo.
+    """
+    offsets: Dict[str, int] = {}
+    with open(path, "wb") as f:
+        f.write(b"\0" * _MODEL_HEADER.size)
+        for name, (code, data) in sections.items():
+            f.write(b"\0" * (-f.tell() % _ALIGN))
+            offsets[name] = f.tell()
+            if isinstance(data, int):
+                size = data
+                f.seek(size, 1)
+            else:
+                size = len(data)
+                f.write(data)
+            toc["sections"][name] = {"offset": offsets[name], "size": size, "type": code}
+        toc_bytes = json.dumps(toc).encode("utf-8")
+        toc_offset = f.tell()
+        f.write(toc_bytes)
+        f.seek(0)
+        f.write(_MODEL_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, 0, toc_offset, len(toc_bytes)))
+    return offsets
+
+
+class KNNModel:
+    """Classificador k-NN com persistência binária.
+
+    ``engine`` escolhe o cálculo das distâncias: ``"python"`` (puro, igual a
+    `knn_predict`), ``"numpy"`` (em lote, vetorizado) ou ``"auto"`` (numpy
+    quando disponível). ``index="lsh"`` troca a busca exata pela aproximada
+    de `LSHIndex` (parâmetros em ``index_params``).
+
+    Depois do `fit` (ou do `load`), `partial_fit` acrescenta pontos e
+    `remove` os retira sem reconstruir nada: os dados crescem num buffer com
+    capacidade dobrada quando enche (custo amortizado constante por ponto) e
+    os removidos só são marcados. Quando eles passam de `_COMPACT_RATIO` dos
+    pontos, o modelo é compactado e os índices dos pontos restantes mudam.
+    """
+
+    def __init__(
+        self,
+        k: int = 5,
+        engine: str = "auto",
+        index: str = "exact",
+        index_params: Optional[Dict[str, int]] = None,
+    ) -> None:
+        if index not in ("exact", "lsh"):
+            raise ValueError(f"índice desconhecido: {index}")
+        self.k = k
+        self.engine = _engine(engine)
+        self.index_type = index
+        self.index_params = dict(index_params or {})
+        self.index: Optional[LSHIndex] = None
+        self.X: Any = []
+        self.y: Any = []
+        self.labels: List[str] = []
+        self.n_features = 0
+        self._mmap: Optional[mmap.mmap] = None
+        # removidos ainda presentes em X/y, e a máscara deles para o numpy
+        self._removed: set = set()
+        self._removed_mask: Any = None
+        # buffers com folga do numpy (X e y são views do início deles)
+        self._X_buf: Any = None
+        self._y_buf: Any = None
+
+    def fit(
+        self, X: Sequence[Sequence[float]], y: Sequence[int], labels: Optional[List[str]] = None
+    ) -> "KNNModel":
+        if len(X) != len(y):
+            raise ValueError("X e y precisam ter o mesmo tamanho")
+        self.n_features = len(X[0]) if len(X) else 0
+        if self.engine == "numpy":
+            self.X = np.asarray(X, dtype=np.float64).reshape(len(X), self.n_features)
+            self.y = np.asarray(y, dtype=np.int32)
+        else:
+            self.X = [list(map(float, row)) for row in X]
+            self.y = [int(v) for v in y]
+        n_classes = max(self.y) + 1 if len(self.y) else 0
+        self.labels = list(labels) if labels else [f"class_{i}" for i in range(n_classes)]
+        self.index = None
+        self._removed, self._removed_mask = set(), None
+        self._X_buf = self._y_buf = None
+        if self.index_type == "lsh" and len(X):
+            self.index = LSHIndex(**self.index_params).build(self.X, self.engine)
+        return self
+
+    def partial_fit(
+        self, X: Sequence[Sequence[float]], y: Sequence[int], labels: Optional[List[str]] = None
+    ) -> "KNNModel":
+        """Acrescenta pontos rotulados ao modelo; recebem os próximos índices."""
+        if len(X) != len(y):
+            raise ValueError("X e y precisam ter o mesmo tamanho")
+        if not len(X):
+            return self
+        if not len(self.y):
+            return self.fit(X, y, labels)
+        if any(len(row) != self.n_features for row in X):
+            raise ValueError(f"os pontos precisam ter {self.n_features} features")
+        start = len(self.y)
+        if self.engine == "numpy":
+            self._append_numpy(np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.int32))
+        else:
+            if not isinstance(self.X, list):
+                # modelo carregado do arquivo: uma cópia, depois só appends
+                self.X = [list(row) for row in self.X]
+                self.y = list(self.y)
+            self.X.extend([float(v) for v in row] for row in X)
+            self.y.extend(int(v) for v in y)
+        if labels:
+            self.labels = list(labels)
+        n_classes = max(int(v) for v in y) + 1
+        self.labels.extend(f"class_{i}" for i in range(len(self.labels), n_classes))
+        if self.index_type == "lsh":
+            if self.index is None:
+                self.index = LSHIndex(**self.index_params).build(self.X, self.engine)
+            else:
+                self.index.add(X, start, self.engine)
+        self._removed_mask = None
+        return self
+
+    def _append_numpy(self, X: "np.ndarray", y: "np.ndarray") -> None:
+        n, m = len(self.y), len(y)
+        if self._X_buf is None or len(self._X_buf) < n + m:
+            capacity = max(n + m, 2 * n, 1024)
+            X_buf = np.empty((capacity, self.n_features))
+            y_buf = np.empty(capacity, dtype=np.int32)
+            X_buf[:n] = self.X
+            y_buf[:n] = self.y
+            self._X_buf, self._y_buf = X_buf, y_buf
+        self._X_buf[n:n + m] = X
+        self._y_buf[n:n + m] = y
+        self.X = self._X_buf[:n + m]
+        self.y = self._y_buf[:n + m]
+
+    def remove(self, indices: Iterable[int]) -> int:
+        """Remove os pontos ``indices``; devolve quantos foram removidos.
+
+        Os pontos são só marcados; a compactação (que renumera os restantes)
+        acontece quando os marcados passam de `_COMPACT_RATIO` do total.
+        """
+        size = len(self.y)
+        before = len(self._removed)
+        for i in indices:
+            i = int(i)
+            if not 0 <= i < size:
+                raise IndexError(f"ponto {i} não existe")
+            self._removed.add(i)
+        self._removed_mask = None
+        removed = len(self._removed) - before
+        if len(self._removed) > _COMPACT_RATIO * size:
+            self.compact()
+        return removed
+
+    def compact(self) -> None:
+        """Apaga de vez os pontos removidos; os restantes são renumerados em ordem."""
+        if not self._removed:
+            return
+        keep = [i not in self._removed for i in range(len(self.y))]
+        if self.engine == "numpy":
+            mask = np.asarray(keep, dtype=bool)
+            self.X, self.y = self.X[mask], self.y[mask]
+            self._X_buf = self._y_buf = None
+        else:
+            self.X = [row for row, flag in zip(self.X, keep) if flag]
+            self.y = [label for label, flag in zip(self.y, keep) if flag]
+        if self.index is not None:
+            if len(self.y):
+                self.index.compact(keep, self.engine)
+            else:
+                self.index = None
+        self._removed, self._removed_mask = set(), None
+
+    def __len__(self) -> int:
+        return len(self.y) - len(self._removed)
+
+    def predict_one(self, x: Sequence[float]) -> int:
+        return self.predict([x])[0]
+
+    def _blocks(self, rows: Sequence[Sequence[float]]) -> Iterator["np.ndarray"]:
+        Q = np.asarray(rows, dtype=np.float64)
+        # limita a matriz de distâncias (lote x treino) a ~32 MB
+        step = max(1, _BLOCK_ELEMENTS // len(self.y))
+        for i in range(0, len(Q), step):
+            yield Q[i:i + step]
+
+    def kneighbors(self, rows: Sequence[Sequence[float]], k: Optional[int] = None) -> List[List[int]]:
+        """Índices dos ``k`` vizinhos de cada ponto, do mais próximo ao mais distante.
+
+        Empates de distância seguem a ordem do treino, como em `knn_predict`.
+        """
+        if not len(self):
+            raise ValueError("modelo vazio: chame fit() antes")
+        k = min(k or self.k, len(self))
+        if not len(rows):
+            return []
+        if self.engine == "numpy":
+            return np.concatenate([self._kneighbors_numpy(Q, k) for Q in self._blocks(rows)]).tolist()
+        out = []
+        for x in rows:
+            x = [float(v) for v in x]
+            cand: Sequence[int] = range(len(self.y))
+            if self.index is not None:
+                found = self._alive(self.index.candidates_python(x))
+                cand = found if len(found) >= k else cand
+            out.append(sorted(self._alive(cand), key=lambda i: (euclidean(x, self.X[i]), i))[:k])
+        return out
+
+    def _alive(self, cand: Sequence[int]) -> Sequence[int]:
+        if not self._removed:
+            return cand
+        return [i for i in cand if i not in self._removed]
+
+    def _dead(self) -> "np.ndarray":
+        if self._removed_mask is None:
+            self._removed_mask = np.zeros(len(self.y), dtype=bool)
+            self._removed_mask[list(self._removed)] = True
+        return self._removed_mask
+
+    def predict(self, rows: Sequence[Sequence[float]]) -> List[int]:
+        """Classifica um lote de pontos."""
+        if not len(rows):
+            return []
+        if not len(self):
+            raise ValueError("modelo vazio: chame fit() antes")
+        if self.engine == "numpy":
+            k = min(self.k, len(self))
+            return np.concatenate(
+                [_vote(self.y[self._kneighbors_numpy(Q, k)]) for Q in self._blocks(rows)]
+            ).tolist()
+        if self.index is None and not self._removed:
+            return [knn_predict(self.X, self.y, [float(v) for v in x], k=self.k) for x in rows]
+        return [_vote_python([self.y[i] for i in nb]) for nb in self.kneighbors(rows)]
+
+    def _kneighbors_numpy(self, Q: "np.ndarray", k: int, exact: bool = False) -> "np.ndarray":
+        index = self.index
+        if index is not None and not exact:
+            return self._kneighbors_lsh(Q, k, index)
+        X = self.X
+        n = len(X)
+        # ||q - x||² = ||q||² - 2 q·x + ||x||²: uma multiplicação de matrizes
+        d2 = (Q * Q).sum(1)[:, None] - 2.0 * (Q @ X.T) + (X * X).sum(1)[None, :]
+        if self._removed:
+            d2[:, self._dead()] = np.inf
+        # candidatos com folga; a ordem final usa a distância exata e, em
+        # empates, a ordem do treino (como o sort estável de `knn_predict`)
+        c = min(n, k + 8)
+        if c < n:
+            cand = np.argpartition(d2, c - 1, axis=1)[:, :c]
+        else:
+            cand = np.broadcast_to(np.arange(n), (len(Q), n))
+        exact = ((Q[:, None, :] - X[cand]) ** 2).sum(2)
+        if self._removed:
+            exact[self._dead()[cand]] = np.inf
+        order = np.lexsort((cand, exact), axis=1)[:, :k]
+        return np.take_along_axis(cand, order, axis=1)
+
+    def _kneighbors_lsh(self, Q: "np.ndarray", k: int, index: LSHIndex) -> "np.ndarray":
+        out = np.empty((len(Q), k), dtype=np.int64)
+        fallback = []
+        for i, cand in enumerate(index.candidates_numpy(Q)):
+            if self._removed:
+                cand = cand[~self._dead()[cand]]
+            if len(cand) < k:
+                fallback.append(i)
+                continue
+            d2 = ((self.X[cand] - Q[i]) ** 2).sum(1)
+            out[i] = cand[np.lexsort((cand, d2))[:k]]
+        if fallback:
+            # poucos candidatos: busca exata para essas consultas (sem tocar em
+            # self.index, que outras threads podem estar lendo)
+            out[fallback] = self._kneighbors_numpy(Q[fallback], k, exact=True)
+        return out
+
+    def score(self, X: Sequence[Sequence[float]], y: Sequence[int]) -> float:
+        if not len(X):
+            return 0.0
+        preds = self.predict(X)
+        return sum(int(p == t) for p, t in zip(preds, y)) / len(X)
+
+    def save(self, path) -> None:
+        """Grava o modelo no formato binário lido por `KNNModel.load`."""
+        self.compact()
+        n, d = len(self), self.n_features
+        if self.engine == "numpy":
+            sections = {
+                "X": ("d", np.ascontiguousarray(self.X, dtype=np.float64).tobytes()),
+                "y": ("i", np.ascontiguousarray(self.y, dtype=np.int32).tobytes()),
+            }
+        else:
+            sections = {
+                "X": ("d", array("d", (v for row in self.X for v in row)).tobytes()),
+                "y": ("i", array("i", self.y).tobytes()),
+            }
+        toc = _model_toc(self.k, n, d, self.labels)
+        if self.index is not None:
+            toc["index"] = {"type": "lsh", "params": self.index.params()}
+            sections.update(self.index.sections(self.engine))
+        _write_model_file(path, toc, sections)
+
+    @classmethod
+    def load(cls, path, engine: str = "auto", use_mmap: bool = True) -> "KNNModel":
+        """Carrega um modelo salvo; com ``use_mmap`` os dados não são copiados."""
+        with open(path, "rb") as f:
+            if use_mmap:
+                buf: Any = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buf = f.read()
+        magic, version, _, toc_offset, toc_len = _MODEL_HEADER.unpack_from(buf, 0)
+        if magic != MODEL_MAGIC:
+            raise ValueError(f"{path}: não é um modelo k-NN")
+        if version > MODEL_VERSION:
+            raise ValueError(f"{path}: versão {version} do formato não suportada")
+        toc = json.loads(bytes(buf[toc_offset:toc_offset + toc_len]).decode("utf-8"))
+        if toc["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: gravado em outra ordem de bytes ({toc['byteorder']})")
+
+        index_meta = toc.get("index")
+        model = cls(
+            k=toc["k"],
+            engine=engine,
+            index=index_meta["type"] if index_meta else "exact",
+            index_params=index_meta["params"] if index_meta else None,
+        )
+        model.labels = toc["labels"]
+        model.n_features = d = toc["n_features"]
+        n = toc["n"]
+        view = memoryview(buf)
+
+        def read(name: str) -> Any:
+            sec = toc["sections"][name]
+            if model.engine == "numpy":
+                dtype = np.dtype(_NP_TYPES[sec["type"]])
+                return np.frombuffer(buf, dtype=dtype, count=sec["size"] // dtype.itemsize, offset=sec["offset"])
+            return view[sec["offset"]:sec["offset"] + sec["size"]].cast(sec["type"])
+
+        if model.engine == "numpy":
+            model.X = read("X").reshape(n, d)
+        else:
+            model.X = _Rows(read("X"), d)
+        model.y = read("y")
+        if index_meta:
+            model.index = LSHIndex.from_sections(index_meta["params"], n, d, read, model.engine)
+        if use_mmap:
+            model._mmap = buf
+        return model
+
+
+def _vote_python(top: Sequence[int]) -> int:
+    """Voto majoritário de `knn_predict` sobre rótulos já ordenados por distância."""
+    counts: Dict[int, int] = {}
+    for label in top:
+        counts[label] = counts.get(label, 0) + 1
+    return max(counts.items(), key=lambda t: t[1])[0]
+
+
+def _vote(top: "np.ndarray") -> "np.ndarray":
+    """Voto majoritário por linha; empate: o rótulo que aparece primeiro."""
+    m, k = top.shape
+    n_classes = int(top.max()) + 1
+    rows = np.arange(m)
+    counts = np.zeros((m, n_classes), dtype=np.int64)
+    np.add.at(counts, (rows[:, None], top), 1)
+    first = np.full((m, n_classes), k, dtype=np.int64)
+    for j in range(k - 1, -1, -1):
+        first[rows, top[:, j]] = j
+    return (counts * (k + 1) - first).argmax(1)
+
+
 def predict_interactive(
-    X_train: List[List[float]], y_train: List[int], labels: List[str]
-) -> None:
-    prompt = "Digite 4 números (sep_l sep_w pet_l pet_w) separados por espaços, ou ENTER para sair: "
+    X_train: List[List[float]],
+    y_train: List[int],
+    labels: List[str],
+    model: Optional[KNNModel] = None,
+) -> Optional[Tuple[List[float], int]]:
+    """Pede um ponto, mostra a predição e devolve ``(ponto, predição)``."""
+    n_features = model.n_features if model else 4
+    if n_features == 4:
+        prompt = "Digite 4 números (sep_l sep_w pet_l pet_w) separados por espaços, ou ENTER para sair: "
+    else:
+        prompt = f"Digite {n_features} números separados por espaços, ou ENTER para sair: "
     s = input(prompt).strip()
     if not s:
-        return
+        return None
     try:
         vals = [float(x) for x in s.split()]
-        if len(vals) != 4:
-            print("Preciso exatamente 4 valores.")
-            return
-        pred = knn_predict(X_train, y_train, vals, k=5)
+        if len(vals) != n_features:
+            print(f"Preciso exatamente {n_features} valores.")
+            return None
+        if model is not None:
+            pred = model.predict_one(vals)
+        else:
+            pred = knn_predict(X_train, y_train, vals, k=5)
         print(f"Predição: {labels[pred]}")
     except Exception as e:
         print("Entrada inválida:", e)
+        return None
+    return vals, pred
+
+
+def iter_feature_rows(stream: IO[str], fmt: str = "csv") -> Iterator[Tuple[Any, Any]]:
+    """Lê pontos de um CSV ou NDJSON, um por vez.
+
+    Gera ``(features, extra)``: ``features`` é uma lista de floats ou a
+    exceção que impediu a leitura da linha; ``extra`` é o ``id`` do objeto
+    NDJSON (se houver). Um cabeçalho CSV não numérico é ignorado.
+    """
+    if fmt == "csv":
+        for i, row in enumerate(csv.reader(stream)):
+            if not row or not "".join(row).strip():
+                continue
+            try:
+                yield [float(v) for v in row], None
+            except ValueError as e:
+                if i == 0:
+                    continue  # cabeçalho
+                yield e, None
+    elif fmt == "ndjson":
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+                extra = None
+                if isinstance(obj, dict):
+                    extra = obj.get("id")
+                    obj = obj.get("features", obj.get("x"))
+                if not isinstance(obj, list):
+                    raise ValueError("esperado uma lista de números ou {\"features\": [...]}")
+                yield [float(v) for v in obj], extra
+            except (ValueError, TypeError) as e:
+                yield e, None
+    else:
+        raise ValueError(f"formato desconhecido: {fmt}")
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def predict_stream(
+    model: KNNModel,
+    source: IO[str],
+    out: IO[str],
+    fmt: str = "csv",
+    chunk_size: int = 4096,
+) -> Dict[str, Any]:
+    """Classifica todas as linhas de ``source`` em blocos e grava em ``out``.
+
+    Cada bloco de ``chunk_size`` pontos válidos é classificado numa única
+    chamada a `KNNModel.predict`. Linhas inválidas geram uma saída vazia (CSV)
+    ou ``{"error": ...}`` (NDJSON), mantendo a correspondência linha a linha.
+    Retorna as contagens e a vazão em linhas por segundo.
+    """
+    t0 = time.perf_counter()
+    rows = errors = 0
+    writer = csv.writer(out, lineterminator="\n") if fmt == "csv" else None
+    for chunk in _chunks(iter_feature_rows(source, fmt), max(1, chunk_size)):
+        valid = [
+            feats for feats, _ in chunk
+            if isinstance(feats, list) and len(feats) == model.n_features
+        ]
+        preds = iter(model.predict(valid))
+        for feats, extra in chunk:
+            rows += 1
+            if not isinstance(feats, list) or len(feats) != model.n_features:
+                errors += 1
+                err = str(feats) if isinstance(feats, Exception) else f"esperado {model.n_features} valores"
+                if writer:
+                    writer.writerow([""])
+                else:
+                    out.write(json.dumps({"id": extra, "error": err}) + "\n")
+                continue
+            pred = int(next(preds))
+            if writer:
+                writer.writerow([model.labels[pred]])
+            else:
+                entry: Dict[str, Any] = {"label": model.labels[pred], "class": pred}
+                if extra is not None:
+                    entry = {"id": extra, **entry}
+                out.write(json.dumps(entry) + "\n")
+    elapsed = time.perf_counter() - t0
+    return {
+        "rows": rows,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+class CrossValidator:
+    """Validação cruzada k-fold do k-NN com os vizinhos calculados uma vez.
+
+    No k-fold, o conjunto de treino de um ponto é sempre "todos os pontos de
+    outros folds". Então basta uma passada: para cada ponto, as distâncias a
+    todos os demais são calculadas em blocos de linhas (memória limitada, como
+    em `KNNModel`), os do mesmo fold são mascarados e só os ``max_k``
+    vizinhos mais próximos são guardados. As predições de qualquer fold e de
+    qualquer ``k <= max_k`` saem desse cache, sem recalcular distâncias.
+
+    Os resultados são os mesmos de `evaluate` com o treino de cada fold na
+    ordem original dos pontos (empates pelo índice, como em `knn_predict`).
+    """
+
+    def __init__(
+        self,
+        X: Sequence[Sequence[float]],
+        y: Sequence[int],
+        folds: int = 5,
+        max_k: int = 15,
+        seed: int = 0,
+        engine: str = "auto",
+    ) -> None:
+        n = len(X)
+        if not 2 <= folds <= n:
+            raise ValueError("folds precisa estar entre 2 e o número de pontos")
+        self.engine = _engine(engine)
+        self.n_folds = folds
+        order = list(range(n))
+        random.Random(seed).shuffle(order)
+        self.fold = [0] * n
+        for pos, i in enumerate(order):
+            self.fold[i] = pos % folds
+        # o menor treino (n menos o maior fold) limita o k
+        self.max_k = min(max_k, n - (n + folds - 1) // folds)
+        if self.engine == "numpy":
+            self.y: Any = np.asarray(y, dtype=np.int32)
+            self.neighbors: Any = self._neighbors_numpy(np.asarray(X, dtype=np.float64))
+        else:
+            self.y = [int(v) for v in y]
+            self.neighbors = self._neighbors_python([[float(v) for v in row] for row in X])
+
+    def _neighbors_numpy(self, X: "np.ndarray") -> "np.ndarray":
+        n, k = len(X), self.max_k
+        fold = np.asarray(self.fold)
+        norms = (X * X).sum(1)
+        out = np.empty((n, k), dtype=np.int64)
+        step = max(1, _BLOCK_ELEMENTS // n)
+        c = min(n, k + 8)
+        for a in range(0, n, step):
+            Q, F = X[a:a + step], fold[a:a + step]
+            d2 = norms[a:a + step, None] - 2.0 * (Q @ X.T) + norms[None, :]
+            same = F[:, None] == fold[None, :]
+            d2[same] = np.inf
+            # candidatos com folga e ordem final pela distância exata, como em
+            # `KNNModel._kneighbors_numpy`
+            cand = np.argpartition(d2, c - 1, axis=1)[:, :c] if c < n else np.broadcast_to(np.arange(n), (len(Q), n))
+            exact = ((Q[:, None, :] - X[cand]) ** 2).sum(2)
+            exact[np.take_along_axis(same, cand, axis=1)] = np.inf
+            order = np.lexsort((cand, exact), axis=1)[:, :k]
+            out[a:a + step] = np.take_along_axis(cand, order, axis=1)
+        return out
+
+    def _neighbors_python(self, X: List[List[float]]) -> List[List[int]]:
+        fold, k = self.fold, self.max_k
+        out = []
+        for i, x in enumerate(X):
+            f = fold[i]
+            dists = [(euclidean(x, xt), j) for j, xt in enumerate(X) if fold[j] != f]
+            out.append([j for _, j in heapq.nsmallest(k, dists)])
+        return out
+
+    def predictions(self, k: int) -> List[int]:
+        """Predição de cada ponto pelo modelo treinado sem o seu fold."""
+        if not 1 <= k <= self.max_k:
+            raise ValueError(f"k precisa estar entre 1 e {self.max_k}")
+        if self.engine == "numpy":
+            return _vote(self.y[self.neighbors[:, :k]]).tolist()
+        return [_vote_python([self.y[j] for j in nb[:k]]) for nb in self.neighbors]
+
+    def fold_scores(self, k: int) -> List[float]:
+        """Acurácia de cada fold com ``k`` vizinhos."""
+        correct = [0] * self.n_folds
+        total = [0] * self.n_folds
+        for f, pred, true in zip(self.fold, self.predictions(k), self.y):
+            total[f] += 1
+            correct[f] += int(pred == true)
+        return [c / t for c, t in zip(correct, total)]
+
+    def score(self, k: int) -> Dict[str, Any]:
+        """``{"k", "folds", "mean", "std"}`` (desvio padrão populacional)."""
+        scores = self.fold_scores(k)
+        mean = sum(scores) / len(scores)
+        std = math.sqrt(sum((s - mean) ** 2 for s in scores) / len(scores))
+        return {"k": k, "folds": [round(s, 4) for s in scores], "mean": round(mean, 4), "std": round(std, 4)}
+
+
+def clustered_data(
+    n: int, n_features: int, n_classes: int = 10, spread: float = 1.0, seed: int = 0
+) -> Tuple[List[List[float]], List[int]]:
+    """Pontos gaussianos em torno de ``n_classes`` centros (parecidos com embeddings)."""
+    rng = random.Random(seed)
+    centers = [[rng.gauss(0.0, 4.0) for _ in range(n_features)] for _ in range(n_classes)]
+    X: List[List[float]] = []
+    y: List[int] = []
+    for i in range(n):
+        c = i % n_classes
+        X.append([v + rng.gauss(0.0, spread) for v in centers[c]])
+        y.append(c)
+    return X, y
+
+
+def ann_benchmark(
+    n: int = 20000,
+    n_features: int = 128,
+    n_queries: int = 200,
+    k: int = 10,
+    engine: str = "auto",
+    index_params: Optional[Dict[str, int]] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Compara a busca LSH com a exata: recall@k e aceleração das consultas."""
+    # muitos grupos pequenos, como vizinhanças de embeddings
+    X, y = clustered_data(n + n_queries, n_features, n_classes=max(10, n // 100), seed=seed)
+    queries, X, y = X[:n_queries], X[n_queries:], y[n_queries:]
+    exact = KNNModel(k=k, engine=engine).fit(X, y)
+    t0 = time.perf_counter()
+    lsh = KNNModel(k=k, engine=engine, index="lsh", index_params=index_params).fit(X, y)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    truth = exact.kneighbors(queries)
+    exact_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    approx = lsh.kneighbors(queries)
+    lsh_s = time.perf_counter() - t0
+
+    hits = sum(len(set(a) & set(b)) for a, b in zip(approx, truth))
+    return {
+        "engine": exact.engine,
+        "n": n,
+        "n_features": n_features,
+        "k": k,
+        "index_params": lsh.index.params() if lsh.index else {},
+        "recall_at_k": round(hits / (k * len(queries)), 4),
+        "build_seconds": round(build, 3),
+        "exact_qps": round(len(queries) / exact_s, 1),
+        "lsh_qps": round(len(queries) / lsh_s, 1),
+        "speedup": round(exact_s / lsh_s, 2),
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Exemplo de classificador k-NN sem dependências")
+    p.add_argument("--model", help="Carregar um modelo salvo (sem gerar/treinar os dados)")
+    p.add_argument("--save-model", help="Salvar o modelo treinado neste arquivo")
+    p.add_argument("-k", type=int, help="Número de vizinhos (padrão: 5; com --model, o k do modelo)")
+    p.add_argument(
+        "--engine", choices=("auto", "python", "numpy"), default="auto", help="Cálculo das distâncias"
+    )
+    p.add_argument("--predict-file", help="Classificar os pontos deste CSV/NDJSON ('-' para stdin)")
+    p.add_argument(
+        "--format", choices=("auto", "csv", "ndjson"), default="auto", help="Formato de --predict-file"
+    )
+    p.add_argument("--output", help="Arquivo para as predições (padrão: stdout)")
+    p.add_argument("--chunk-size", type=int, default=4096, help="Pontos classificados por bloco")
+    p.add_argument(
+        "--index", choices=("exact", "lsh"), default="exact", help="Busca exata ou aproximada (LSH)"
+    )
+    p.add_argument("--lsh-tables", type=int, default=8, help="LSH: tabelas (mais = maior recall)")
+    p.add_argument("--lsh-bits", type=int, default=16, help="LSH: bits por tabela (mais = mais rápido)")
+    p.add_argument("--lsh-probe", type=int, default=2, help="LSH: códigos vizinhos sondados por tabela")
+    p.add_argument(
+        "--ann-bench",
+        action="store_true",
+        help="Medir recall@k e aceleração do LSH contra a busca exata (use com --dims/--points)",
+    )
+    p.add_argument("--cv", type=int, metavar="FOLDS", help="Validação cruzada com FOLDS folds")
+    p.add_argument("--cv-k", default="1,3,5,7,9", help="Com --cv: valores de k avaliados (ex.: 1,3,5)")
+    p.add_argument(
+        "--generate",
+        type=int,
+        metavar="N",
+        help="Gerar N pontos sintéticos direto no arquivo de --save-model (em blocos, sem limite de memória)",
+    )
+    p.add_argument("--classes", type=int, default=3, help="Com --generate: número de classes")
+    p.add_argument("--seed", type=int, default=42, help="Com --generate: semente dos dados")
+    p.add_argument("--workers", type=int, default=1, help="Com --generate: blocos gerados em paralelo")
+    p.add_argument(
+        "--dims", type=int, help="Dimensões dos pontos (--ann-bench: 128, --generate: 4)"
+    )
+    p.add_argument("--points", type=int, default=20000, help="Com --ann-bench: pontos de treino")
+    return p.parse_args(argv)
+
+
+def _index_params(args) -> Dict[str, int]:
+    return {"n_tables": args.lsh_tables, "n_bits": args.lsh_bits, "n_probe": args.lsh_probe}
+
+
+def _run_predict_file(model: KNNModel, args) -> int:
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "ndjson" if args.predict_file.endswith((".ndjson", ".jsonl")) else "csv"
+    try:
+        with contextlib.ExitStack() as files:
+            source = sys.stdin
+            if args.predict_file != "-":
+                source = files.enter_context(open(args.predict_file, encoding="utf-8", newline=""))
+            out = sys.stdout
+            if args.output:
+                out = files.enter_context(open(args.output, "w", encoding="utf-8", newline=""))
+            stats = predict_stream(model, source, out, fmt=fmt, chunk_size=args.chunk_size)
+    except (OSError, UnicodeDecodeError) as e:
+        # arquivo ausente, sem permissão, disco cheio ou entrada que não é UTF-8
+        print(f"Erro em --predict-file/--output: {e}", file=sys.stderr)
+        return 1
+    # estatísticas no stderr: o stdout pode ser o próprio resultado
+    print(
+        f"{stats['rows']} linhas ({stats['errors']} inválidas) em {stats['seconds']}s: "
+        f"{stats['rows_per_second']} linhas/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _run_cross_validation(args) -> int:
+    try:
+        ks = [int(v) for v in args.cv_k.split(",") if v.strip()]
+    except ValueError:
+        ks = []
+    if not ks or min(ks) < 1:
+        print(f"--cv-k inválido: {args.cv_k!r} (use inteiros positivos, ex.: 1,3,5)", file=sys.stderr)
+        return 1
+    if args.model:
+        try:
+            model = KNNModel.load(args.model, engine=args.engine)
+        except (OSError, ValueError) as e:
+            print(f"Não foi possível carregar o modelo: {e}", file=sys.stderr)
+            return 1
+        X, y = model.X, model.y
+    else:
+        X, y, _ = generate_synthetic_data(n_per_class=50, seed=42)
+    t0 = time.perf_counter()
+    try:
+        cv = CrossValidator(X, y, folds=args.cv, max_k=max(ks), engine=args.engine)
+    except ValueError as e:
+        print(f"--cv {args.cv}: {e}", file=sys.stderr)
+        return 1
+    too_big = [k for k in ks if k > cv.max_k]
+    if too_big:
+        print(
+            f"--cv-k {','.join(map(str, too_big))}: com {len(X)} pontos e {args.cv} folds, "
+            f"k pode ir no máximo até {cv.max_k}",
+            file=sys.stderr,
+        )
+        return 1
+    for k in ks:
+        r = cv.score(k)
+        folds = " ".join(f"{s:.3f}" for s in r["folds"])
+        print(f"k={k}: acurácia {r['mean']:.3f} ± {r['std']:.3f} (folds: {folds})")
+    print(f"{args.cv} folds, {len(ks)} valores de k em {time.perf_counter() - t0:.2f}s")
+    return 0
 
 
-def main() -> None:
-    print("Gerando dados sintéticos e avaliando um classificador k-NN simples...")
-    X, y, labels = generate_synthetic_data(n_per_class=50, seed=42)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, seed=7)
-    acc = evaluate(X_train, y_train, X_test, y_test, k=5)
-    print(f"Acurácia do k-NN (k=5) no conjunto de teste sintético: {acc:.3f}")
-    print("Teste interativo: você pode inserir 4 valores para uma previsão.")
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    k = 5 if args.k is None else args.k
+    if k < 1:
+        print("-k precisa ser pelo menos 1", file=sys.stderr)
+        return 1
+    if args.generate is not None:
+        if not args.save_model:
+            print("--generate requer --save-model", file=sys.stderr)
+            return 1
+        t0 = time.perf_counter()
+        write_synthetic_model(
+            args.save_model,
+            args.generate,
+            n_features=args.dims or 4,
+            n_classes=args.classes,
+            seed=args.seed,
+            workers=args.workers,
+            k=k,
+        )
+        elapsed = time.perf_counter() - t0
+        print(f"{args.generate} pontos gerados em {args.save_model} em {elapsed:.2f}s")
+        return 0
+    if args.cv:
+        return _run_cross_validation(args)
+    if args.ann_bench:
+        result = ann_benchmark(
+            n=args.points, n_features=args.dims or 128, k=k, engine=args.engine, index_params=_index_params(args)
+        )
+        print(json.dumps(result, indent=2))
+        return 0
+    # com --predict-file o stdout pode ser o resultado: mensagens vão ao stderr
+    log = sys.stderr if args.predict_file else sys.stdout
+    if args.model:
+        try:
+            model = KNNModel.load(args.model, engine=args.engine)
+        except (OSError, ValueError) as e:
+            print(f"Não foi possível carregar o modelo: {e}", file=sys.stderr)
+            return 1
+        if args.k is not None:
+            # -k explícito substitui o k salvo no modelo
+            model.k = k
+        print(
+            f"Modelo carregado de {args.model}: {len(model)} pontos, {model.n_features} features, k={model.k}",
+            file=log,
+        )
+    else:
+        print("Gerando dados sintéticos e avaliando um classificador k-NN simples...", file=log)
+        X, y, labels = generate_synthetic_data(n_per_class=50, seed=42)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, seed=7)
+        model = KNNModel(
+            k=k, engine=args.engine, index=args.index, index_params=_index_params(args)
+        ).fit(X_train, y_train, labels)
+        acc = model.score(X_test, y_test)
+        print(f"Acurácia do k-NN (k={k}) no conjunto de teste sintético: {acc:.3f}", file=log)
+        if args.save_model:
+            model.save(args.save_model)
+            print(f"Modelo salvo em {args.save_model}", file=log)
+    if args.predict_file:
+        return _run_predict_file(model, args)
+    print(f"Teste interativo: você pode inserir {model.n_features} valores para uma previsão.")
     while True:
-        predict_interactive(X_train, y_train, labels)
+        result = predict_interactive(model.X, model.y, model.labels, model=model)
+        if result is not None:
+            vals, pred = result
+            ok = input("A predição está correta? Se sim, o ponto entra no modelo (s/n): ").strip().lower()
+            if ok == "s":
+                model.partial_fit([vals], [pred])
+                print(f"Ponto adicionado ({len(model)} pontos no modelo).")
         cont = input("Outra previsão? (s/n): ").strip().lower()
         if cont != "s":
             break
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
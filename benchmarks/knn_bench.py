@@ -0,0 +1,316 @@
+"""Benchmarks do classificador k-NN de `app.py`.
+
+Varre tamanho do conjunto (`--n`), dimensões (`--dims`) e vizinhos (`-k`)
+para cada engine disponível:
+
+- `python`: Python puro (`knn_predict`/`euclidean`, a referência);
+- `numpy`: distâncias vetorizadas em lote;
+- `lsh`: busca aproximada com `LSHIndex` (sobre numpy, se instalado).
+
+Em cada caso são medidos o tempo de `fit` e de `predict` (o menor de
+`--repeat` execuções) e o pico de memória alocada (`tracemalloc`). As
+predições de cada engine são comparadas com as da referência: as engines
+exatas precisam concordar em 100% dos pontos; para o LSH a concordância só
+é registrada.
+
+O resultado vai para um JSON (`--output`) e pode ser comparado com um
+baseline salvo antes (`--baseline`): um caso fica mais lento ou usa mais
+memória que a tolerância permite, ou uma engine exata discorda da
+referência, e o comando termina com código 1. Os tempos dependem da
+máquina: gere o baseline na mesma máquina em que vai comparar. Por isso
+nenhum baseline é versionado (`benchmarks/baseline.json` está no
+.gitignore) e o CI não compara tempos.
+
+Uso:
+  python -m benchmarks.knn_bench --save-baseline benchmarks/baseline.json
+  python -m benchmarks.knn_bench --baseline benchmarks/baseline.json
+  python -m benchmarks.knn_bench --quick --output resultado.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import app
+
+DEFAULT_N = (1000, 5000)
+DEFAULT_DIMS = (4, 64)
+DEFAULT_K = (1, 10)
+QUICK = {"n": (500,), "dims": (4, 16), "k": (1, 5)}
+# the reference engine is skipped above this many n * d * queries multiply-adds
+PYTHON_BUDGET = 2e8
+# below this many seconds a timing is not compared against the baseline
+TIME_FLOOR = 0.01
+
+
+def available_engines() -> List[str]:
+    return ["python"] + (["numpy"] if app.np is not None else []) + ["lsh"]
+
+
+def _model(engine: str, k: int) -> "app.KNNModel":
+    if engine == "lsh":
+        return app.KNNModel(k=k, engine="auto", index="lsh")
+    return app.KNNModel(k=k, engine=engine)
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Tuple[float, int, Any]:
+    """Best wall time over ``repeat`` runs, peak traced bytes and the result.
+
+    The timed runs happen without tracemalloc, which slows allocation-heavy
+    Python code several times; one extra traced run measures the memory.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Time a fixed pure-Python workload: a yardstick for the machine's speed."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        total = 0.0
+        for i in range(200000):
+            total += (i % 97) * 0.5
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_case(
+    n: int, d: int, k: int, engines: Sequence[str], queries: int = 50, repeat: int = 3, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Benchmark every engine on one (n, d, k) point of the grid."""
+    X, y = app.clustered_data(n + queries, d, n_classes=max(10, n // 100), seed=seed)
+    Q, X, y = X[:queries], X[queries:], y[queries:]
+    reference: Optional[List[int]] = None
+    results = []
+    # exact engines first: the first one that runs is the reference
+    for engine in sorted(engines, key=lambda e: e == "lsh"):
+        row: Dict[str, Any] = {"n": n, "d": d, "k": k, "engine": engine, "queries": queries}
+        if engine == "python" and n * d * queries > PYTHON_BUDGET:
+            row["skipped"] = "grande demais para Python puro"
+            results.append(row)
+            continue
+        fit_s, fit_peak, model = _measure(lambda: _model(engine, k).fit(X, y), repeat)
+        predict_s, predict_peak, preds = _measure(lambda: model.predict(Q), repeat)
+        if reference is None:
+            reference = preds
+        agreement = sum(int(a == b) for a, b in zip(preds, reference)) / len(preds)
+        row.update(
+            {
+                "fit_seconds": round(fit_s, 6),
+                "predict_seconds": round(predict_s, 6),
+                "queries_per_second": round(queries / predict_s, 1) if predict_s > 0 else 0.0,
+                "peak_kib": round(max(fit_peak, predict_peak) / 1024, 1),
+                "agreement": round(agreement, 4),
+                "exact": engine != "lsh",
+            }
+        )
+        results.append(row)
+    return results
+
+
+def run_suite(
+    ns: Sequence[int] = DEFAULT_N,
+    dims: Sequence[int] = DEFAULT_DIMS,
+    ks: Sequence[int] = DEFAULT_K,
+    engines: Optional[Sequence[str]] = None,
+    queries: int = 50,
+    repeat: int = 3,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the whole n x d x k grid and return the JSON-ready report."""
+    engines = list(engines or available_engines())
+    calibration = calibrate()
+    results = []
+    for n in ns:
+        for d in dims:
+            for k in ks:
+                for row in run_case(n, d, k, engines, queries=queries, repeat=repeat):
+                    results.append(row)
+                    if progress:
+                        progress(row)
+    calibration = min(calibration, calibrate())
+    return {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": getattr(app.np, "__version__", None),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "queries": queries,
+            "repeat": repeat,
+            "calibration_seconds": round(calibration, 6),
+        },
+        "results": results,
+    }
+
+
+def _key(row: Dict[str, Any]) -> Tuple[int, int, int, str]:
+    return row["n"], row["d"], row["k"], row["engine"]
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], time_tolerance: float = 0.5, memory_tolerance: float = 0.2
+) -> List[str]:
+    """Return one message per regression of ``report`` against ``baseline``.
+
+    A case regresses when its predict or fit time grows more than
+    ``time_tolerance`` (0.5 = 50%), its peak memory more than
+    ``memory_tolerance``, or an exact engine disagrees with the reference.
+    Cases missing from the baseline are not compared. When the calibration
+    run shows the machine slower than at baseline time, baseline timings are
+    scaled up by that ratio, so a busier machine does not look like a
+    regression (they are never scaled down: the calibration is noisy too).
+    """
+    return [msg for _, msg in _regressions(report, baseline, time_tolerance, memory_tolerance)]
+
+
+def _regressions(
+    report: Dict[str, Any], baseline: Dict[str, Any], time_tolerance: float, memory_tolerance: float
+) -> List[Tuple[Optional[Tuple[int, int, int, str]], str]]:
+    # (key of a case whose timing regressed, or None, message)
+    old = {_key(r): r for r in baseline.get("results", []) if "skipped" not in r}
+    scale = 1.0
+    cal_new = report.get("meta", {}).get("calibration_seconds")
+    cal_old = baseline.get("meta", {}).get("calibration_seconds")
+    if cal_new and cal_old:
+        scale = max(1.0, cal_new / cal_old)
+    problems: List[Tuple[Optional[Tuple[int, int, int, str]], str]] = []
+    for row in report["results"]:
+        if "skipped" in row:
+            continue
+        name = "n={} d={} k={} {}".format(*_key(row))
+        if row["exact"] and row["agreement"] < 1.0:
+            problems.append((None, f"{name}: predições diferem da referência ({row['agreement']:.2%} iguais)"))
+        before = old.get(_key(row))
+        if before is None:
+            continue
+        for field in ("predict_seconds", "fit_seconds"):
+            # timings of a few milliseconds are mostly noise
+            if row[field] > max(before[field] * scale, TIME_FLOOR) * (1 + time_tolerance):
+                problems.append((_key(row), f"{name}: {field} {before[field]:.4f} -> {row[field]:.4f}"))
+        if row["peak_kib"] > before["peak_kib"] * (1 + memory_tolerance) + 64:
+            problems.append((None, f"{name}: peak_kib {before['peak_kib']} -> {row['peak_kib']}"))
+    return problems
+
+
+def recheck(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    time_tolerance: float = 0.5,
+    memory_tolerance: float = 0.2,
+    repeat: int = 3,
+) -> List[str]:
+    """Like `compare`, but cases that only got slower are measured again first.
+
+    On a shared machine a single slow run is common; only a slowdown that
+    shows up again (best of both runs) is reported.
+    """
+    slow = {key[:3] for key, _ in _regressions(report, baseline, time_tolerance, memory_tolerance) if key}
+    if slow:
+        rows = {_key(r): r for r in report["results"]}
+        engines = sorted({r["engine"] for r in report["results"]})
+        queries = report["meta"]["queries"]
+        for n, d, k in sorted(slow):
+            for again in run_case(n, d, k, engines, queries=queries, repeat=repeat):
+                row = rows[_key(again)]
+                for field in ("fit_seconds", "predict_seconds"):
+                    if field in again:
+                        row[field] = min(row[field], again[field])
+                if "predict_seconds" in row and row["predict_seconds"] > 0:
+                    row["queries_per_second"] = round(queries / row["predict_seconds"], 1)
+    return compare(report, baseline, time_tolerance, memory_tolerance)
+
+
+def _ints(text: str) -> List[int]:
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Benchmarks do k-NN de app.py (tempo, memória e concordância)")
+    p.add_argument("--n", type=_ints, help="Tamanhos do treino, separados por vírgula (padrão: 1000,5000)")
+    p.add_argument("--dims", type=_ints, help="Dimensões (padrão: 4,64)")
+    p.add_argument("-k", type=_ints, help="Vizinhos (padrão: 1,10)")
+    p.add_argument("--engines", help="Engines, separadas por vírgula (padrão: todas as disponíveis)")
+    p.add_argument("--queries", type=int, default=50, help="Pontos classificados por caso")
+    p.add_argument("--repeat", type=int, default=3, help="Execuções por medida (vale a mais rápida)")
+    p.add_argument("--quick", action="store_true", help="Grade pequena, para uma checagem rápida")
+    p.add_argument("--output", help="Gravar o resultado neste JSON")
+    p.add_argument("--baseline", help="Comparar com este resultado salvo antes")
+    p.add_argument("--save-baseline", metavar="PATH", help="Gravar o resultado como novo baseline")
+    p.add_argument("--time-tolerance", type=float, default=0.5, help="Aumento de tempo tolerado (0.5 = 50%%)")
+    p.add_argument("--memory-tolerance", type=float, default=0.2, help="Aumento de memória tolerado")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    grid = QUICK if args.quick else {"n": DEFAULT_N, "dims": DEFAULT_DIMS, "k": DEFAULT_K}
+    engines = args.engines.split(",") if args.engines else None
+    for engine in engines or []:
+        if engine not in available_engines():
+            print(f"engine indisponível: {engine}")
+            return 2
+
+    def progress(row: Dict[str, Any]) -> None:
+        name = "n={:<6} d={:<4} k={:<3} {:<7}".format(*_key(row))
+        if "skipped" in row:
+            print(f"{name} pulado ({row['skipped']})")
+        else:
+            print(
+                f"{name} fit {row['fit_seconds']:.4f}s  predict {row['predict_seconds']:.4f}s  "
+                f"{row['queries_per_second']:>10} q/s  pico {row['peak_kib']:>9} KiB  "
+                f"concordância {row['agreement']:.2%}"
+            )
+
+    report = run_suite(
+        args.n or grid["n"],
+        args.dims or grid["dims"],
+        args.k or grid["k"],
+        engines=engines,
+        queries=args.queries,
+        repeat=args.repeat,
+        progress=progress,
+    )
+    # without a baseline only the agreement of the exact engines is checked
+    problems = compare(report, {}, args.time_tolerance, args.memory_tolerance)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        problems = recheck(report, baseline, args.time_tolerance, args.memory_tolerance, args.repeat)
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+            print(f"Resultado gravado em {path}")
+    if problems:
+        print("Regressões:", file=sys.stderr)
+        for msg in problems:
+            print(f"  {msg}", file=sys.stderr)
+        return 1
+    if args.baseline:
+        print(f"Sem regressões em relação a {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""Escrita de projetos gerados direto em arquivos zip ou tar.gz.
+
+Os arquivos renderizados vão direto para o writer do arquivo compactado, sem
+criar uma árvore temporária em disco. O destino pode ser um caminho, um
+objeto file-like (inclusive não-seekable, como um socket) ou, com
+`iter_archive`, um iterador de blocos de bytes para respostas HTTP em stream.
+"""
+
+from __future__ import annotations
+
+import io
+import tarfile
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union
+
+FORMATS = ("zip", "tar.gz")
+
+Files = Iterable[Tuple[PurePosixPath, bytes]]
+
+
+def format_for(path: Union[str, Path]) -> str:
+    """Guess the archive format from a file name (``zip`` by default)."""
+    name = str(path).lower()
+    if name.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    return "zip"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream that buffers bytes until drained."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:  # type: ignore[override]
+        data = bytes(b)
+        if data:
+            self._chunks.append(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entries(files: Files, root: str) -> Iterator[Tuple[str, bytes]]:
+    for rel, data in files:
+        name = str(PurePosixPath(root) / rel) if root else str(rel)
+        yield name, data
+
+
+class _Writer:
+    """Minimal common interface over ZipFile and a streaming TarFile."""
+
+    def __init__(self, fileobj: BinaryIO, fmt: str) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato de arquivo não suportado: {fmt}")
+        self.fmt = fmt
+        self._mtime = time.time()
+        if fmt == "zip":
+            self._zip = zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED)
+        else:
+            # "w|gz" writes a pure stream: no seeks on fileobj
+            self._tar = tarfile.open(fileobj=fileobj, mode="w|gz")
+
+    def add(self, name: str, data: bytes) -> None:
+        if self.fmt == "zip":
+            info = zipfile.ZipInfo(name, time.localtime(self._mtime)[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, data)
+        else:
+            tinfo = tarfile.TarInfo(name)
+            tinfo.size = len(data)
+            tinfo.mtime = int(self._mtime)
+            tinfo.mode = 0o644
+            self._tar.addfile(tinfo, io.BytesIO(data))
+
+    def close(self) -> None:
+        if self.fmt == "zip":
+            self._zip.close()
+        else:
+            self._tar.close()
+
+
+def write_archive(
+    files: Files,
+    dest: Union[str, Path, BinaryIO],
+    fmt: str | None = None,
+    root: str = "",
+) -> int:
+    """Write ``files`` into a zip/tar.gz archive at ``dest``.
+
+    ``dest`` is a path or a writable binary file object. Entries are placed
+    under ``root`` inside the archive. Returns the number of files written.
+    """
+    if isinstance(dest, (str, Path)):
+        fmt = fmt or format_for(dest)
+        with open(dest, "wb") as fh:
+            return write_archive(files, fh, fmt, root)
+    writer = _Writer(dest, fmt or "zip")
+    count = 0
+    try:
+        for name, data in _entries(files, root):
+            writer.add(name, data)
+            count += 1
+    finally:
+        writer.close()
+    return count
+
+
+def iter_archive(files: Files, fmt: str = "zip", root: str = "") -> Iterator[bytes]:
+    """Yield the archive as chunks of bytes, one or more per file.
+
+    Only the file being compressed is held in memory, so this can feed a
+    streaming HTTP response directly.
+    """
+    sink = _ChunkSink()
+    writer = _Writer(sink, fmt)  # type: ignore[arg-type]
+    try:
+        for name, data in _entries(files, root):
+            writer.add(name, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
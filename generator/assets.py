@@ -0,0 +1,228 @@
+"""Estágio de assets estáticos aplicado depois da renderização dos templates.
+
+Para os arquivos estáticos de um projeto (`static/` no flask/fastapi/django,
+`public/` no express/react):
+
+- minifica CSS e HTML (inclusive os templates HTML do Flask);
+- renomeia CSS, JS, imagens e fontes com o hash do conteúdo
+  (`style.css` → `style.3f2a9c1b.css`) e reescreve as referências em HTML e
+  CSS; o mapeamento fica em `<static>/assets-manifest.json`;
+- grava irmãos pré-comprimidos `.gz` (e `.br`, se o pacote `brotli` estiver
+  instalado) dos arquivos de texto, para o servidor entregar sem comprimir a
+  cada requisição.
+
+Os nomes com hash podem ser servidos com cache longo (`immutable`), já que um
+conteúdo novo gera um nome novo. Páginas HTML mantêm o nome.
+
+O estágio trabalha sobre a sequência `(caminho relativo, bytes)` produzida por
+`generate.project_files`, então vale igualmente para pastas, arquivos zip e
+atualizações.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import posixpath
+import re
+from pathlib import PurePosixPath
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+try:  # optional: .br siblings are written only when brotli is installed
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+Files = Iterable[Tuple[PurePosixPath, bytes]]
+
+MANIFEST_NAME = "assets-manifest.json"
+
+# folder with the static files and the URL prefix it is served under
+ASSET_ROOTS = {
+    "express": ("public", "/"),
+    "react": ("public", "/"),
+}
+DEFAULT_ASSET_ROOT = ("static", "/static/")
+
+FINGERPRINT_EXTS = {
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp",
+    ".ico", ".woff", ".woff2", ".ttf",
+}
+COMPRESS_EXTS = {".css", ".js", ".mjs", ".html", ".svg", ".json", ".txt", ".xml"}
+# below this size the gzip header costs more than it saves
+MIN_COMPRESS_SIZE = 128
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+# ":" is left alone: "a :hover" and "a:hover" are different selectors
+_CSS_SPACE = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON = re.compile(r"(?<=[\w-]):\s+")
+_WS = re.compile(r"\s+")
+# blocks whose content must be kept verbatim
+_HTML_RAW = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.S | re.I)
+_HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_HTML_REF = re.compile(r"""((?:href|src)\s*=\s*["'])([^"'#?]+)""", re.I)
+_CSS_REF = re.compile(r"""(url\(\s*["']?)([^"')#?]+)""", re.I)
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{8}\.[A-Za-z0-9]+$")
+
+
+def minify_css(text: str) -> str:
+    """Drop comments and whitespace that CSS does not need."""
+    text = _CSS_COMMENT.sub("", text)
+    text = _CSS_SPACE.sub(r"\1", text)
+    text = _CSS_COLON.sub(":", text)
+    text = _WS.sub(" ", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_html(text: str) -> str:
+    """Conservative HTML minifier.
+
+    Comments are removed and whitespace runs become a single space (never
+    removed, so inline layout is unchanged). ``pre``, ``textarea``,
+    ``script`` and ``style`` blocks are left alone; Jinja tags are plain text
+    to it and survive untouched.
+    """
+    parts = _HTML_RAW.split(text)
+    out: List[str] = []
+    # split() with two groups yields: text, block, tag name, text, ...
+    for i in range(0, len(parts), 3):
+        chunk = _HTML_COMMENT.sub("", parts[i])
+        out.append(_WS.sub(" ", chunk))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip() + "\n"
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:8]
+
+
+def _fingerprinted(rel: PurePosixPath, data: bytes) -> PurePosixPath:
+    return rel.with_name(f"{rel.stem}.{_content_hash(data)}{rel.suffix}")
+
+
+def _rewrite(text: str, pattern: re.Pattern, base_url: str, mapping: Dict[str, str]) -> str:
+    """Replace every reference in ``text`` that points to a renamed asset.
+
+    References are resolved against ``base_url`` (the URL of the file that
+    contains them), so both absolute and relative paths are found.
+    """
+
+    def sub(m: re.Match) -> str:
+        ref = m.group(2).strip()
+        if "://" in ref or ref.startswith(("//", "data:")):
+            return m.group(0)
+        url = ref if ref.startswith("/") else posixpath.normpath(posixpath.join(base_url, ref))
+        new = mapping.get(url)
+        if new is None:
+            return m.group(0)
+        if ref.startswith("/"):
+            replacement = new
+        else:
+            replacement = posixpath.relpath(new, base_url)
+        return m.group(1) + replacement
+
+    return pattern.sub(sub, text)
+
+
+def _compressed(rel: PurePosixPath, data: bytes, use_brotli: bool) -> Iterator[Tuple[PurePosixPath, bytes]]:
+    if rel.suffix not in COMPRESS_EXTS or len(data) < MIN_COMPRESS_SIZE:
+        return
+    # mtime=0: the same input always produces the same .gz
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        yield rel.with_name(rel.name + ".gz"), gz
+    if use_brotli and brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            yield rel.with_name(rel.name + ".br"), br
+
+
+def process_assets(
+    files: Files,
+    framework: str = "flask",
+    minify: bool = True,
+    fingerprint: bool = True,
+    compress: bool = True,
+    use_brotli: bool = True,
+) -> Iterator[Tuple[PurePosixPath, bytes]]:
+    """Run the asset stage over the rendered files of a project.
+
+    Files outside the static folder pass through unchanged, except HTML
+    templates (``templates/*.html``), which are minified and have their
+    asset references rewritten.
+    """
+    root_name, prefix = ASSET_ROOTS.get(framework, DEFAULT_ASSET_ROOT)
+    root = PurePosixPath(root_name)
+    items: List[Tuple[PurePosixPath, bytes]] = [(PurePosixPath(r), d) for r, d in files]
+
+    def is_static(rel: PurePosixPath) -> bool:
+        return rel.parts[:1] == root.parts
+
+    def url_of(rel: PurePosixPath) -> str:
+        return prefix + rel.relative_to(root).as_posix()
+
+    def is_html(rel: PurePosixPath) -> bool:
+        return rel.suffix == ".html" and (is_static(rel) or rel.parts[:1] == ("templates",))
+
+    # 1. minify
+    if minify:
+        minified = []
+        for rel, data in items:
+            try:
+                if rel.suffix == ".css" and is_static(rel):
+                    data = minify_css(data.decode("utf-8")).encode("utf-8")
+                elif is_html(rel):
+                    data = minify_html(data.decode("utf-8")).encode("utf-8")
+            except UnicodeDecodeError:
+                pass
+            minified.append((rel, data))
+        items = minified
+
+    # 2. fingerprint: leaves (images, fonts, JS) first, then CSS (which may
+    # point to them) once its references are rewritten, then HTML pages
+    mapping: Dict[str, str] = {}
+    if fingerprint:
+        renamed: Dict[PurePosixPath, Tuple[PurePosixPath, bytes]] = {}
+
+        def candidates(css: bool):
+            for rel, data in items:
+                if (
+                    is_static(rel)
+                    and rel.suffix in FINGERPRINT_EXTS
+                    and (rel.suffix == ".css") == css
+                    and not _FINGERPRINTED.search(rel.name)
+                ):
+                    yield rel, data
+
+        for css in (False, True):
+            for rel, data in list(candidates(css)):
+                if css:
+                    base_url = posixpath.dirname(url_of(rel)) + "/"
+                    data = _rewrite(data.decode("utf-8"), _CSS_REF, base_url, mapping).encode("utf-8")
+                new_rel = _fingerprinted(rel, data)
+                renamed[rel] = (new_rel, data)
+                mapping[url_of(rel)] = url_of(new_rel)
+        items = [renamed.get(rel, (rel, data)) for rel, data in items]
+
+        rewritten = []
+        for rel, data in items:
+            if is_html(rel) and mapping:
+                base_url = posixpath.dirname(url_of(rel)) + "/" if is_static(rel) else prefix
+                text = _rewrite(data.decode("utf-8"), _HTML_REF, base_url, mapping)
+                data = text.encode("utf-8")
+            rewritten.append((rel, data))
+        items = rewritten
+        if mapping:
+            manifest = {
+                k[len(prefix):]: v[len(prefix):] for k, v in sorted(mapping.items())
+            }
+            payload = json.dumps(manifest, indent=2) + "\n"
+            items.append((root / MANIFEST_NAME, payload.encode("utf-8")))
+
+    # 3. precompressed siblings
+    for rel, data in items:
+        yield rel, data
+        if compress and is_static(rel):
+            yield from _compressed(rel, data, use_brotli)
@@ -0,0 +1,390 @@
+"""Execução de batches de projetos a partir de arquivos JSON ou NDJSON.
+
+Um batch NDJSON (um projeto por linha) é lido como stream: cada linha é
+enviada a um pool de threads com buffer limitado, então a memória não cresce
+com o tamanho do arquivo. O relatório (opcional) é gravado incrementalmente,
+uma linha NDJSON por item, e registra o offset a partir do qual o batch pode
+ser retomado depois de uma queda (`--batch-offset`).
+
+Cada execução também mantém um journal de checkpoints com o estágio de cada
+item (created, llm_done, integrated ou failed) e o tempo gasto nele. Com
+`--resume`, apenas os estágios não concluídos (ou que falharam) são refeitos.
+Antes de criar a pasta de um projeto o journal registra `creating`: só uma
+pasta marcada assim, e sem o manifesto da geração, é apagada e gerada de novo
+ao retomar; pastas que já existiam são apenas atualizadas.
+
+O formato antigo (um arquivo JSON com uma lista de projetos) continua aceito;
+nesse caso o offset é o índice do item na lista.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .blobstore import storage_for
+from .generate import MANIFEST_NAME, create_project
+
+
+def _is_json_list(path: Path) -> bool:
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(1)
+            if not chunk:
+                return False
+            if not chunk.isspace():
+                return chunk == b"["
+
+
+def iter_batch(path: Path, offset: int = 0) -> Iterator[Tuple[int, int, Any]]:
+    """Yield ``(start, end, item)`` for each project in the batch file.
+
+    For NDJSON, ``start``/``end`` are byte offsets of the line and the file is
+    read lazily from ``offset``. For a JSON list they are item indexes.
+    Lines that are not valid JSON objects are yielded as ``ValueError``
+    instances so the caller can report them.
+    """
+    path = Path(path)
+    if _is_json_list(path):
+        data = json.loads(path.read_text())
+        if not isinstance(data, list):
+            raise ValueError("Arquivo de batch deve conter uma lista de projetos")
+        for idx in range(offset, len(data)):
+            yield idx, idx + 1, data[idx]
+        return
+
+    with path.open("rb") as f:
+        f.seek(offset)
+        start = end = offset
+        for line in f:
+            end += len(line)
+            if not line.strip():
+                # blank lines belong to the range of the next item
+                continue
+            try:
+                item = json.loads(line)
+                if not isinstance(item, dict):
+                    raise ValueError("linha não é um objeto JSON")
+            except ValueError as e:
+                item = ValueError(f"JSON inválido no offset {start}: {e}")
+            yield start, end, item
+            start = end
+
+
+STAGES = ("created", "llm_done", "integrated")
+
+
+class Journal:
+    """Append-only NDJSON checkpoint journal of a batch run.
+
+    Each line records that an item (identified by its batch offset) reached a
+    stage, or ``failed`` while running ``failed_stage``, with the stage time.
+    ``creating`` is written just before the batch creates a project folder
+    that did not exist, so a resume knows the folder is its own.
+    """
+
+    def __init__(self, path: Path, resume: bool = False) -> None:
+        self.path = Path(path)
+        self.state: Dict[str, Dict[str, Any]] = self.load(self.path) if resume else {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a" if resume else "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(path: Path) -> Dict[str, Dict[str, Any]]:
+        """Return the last journal entry of each item."""
+        state: Dict[str, Dict[str, Any]] = {}
+        if not Path(path).exists():
+            return state
+        with Path(path).open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    state[str(entry["key"])] = entry
+                except (ValueError, KeyError, TypeError):
+                    # a torn last line after a crash is expected
+                    continue
+        return state
+
+    def resume_point(self, key: str) -> Optional[str]:
+        """Return the last stage an item completed, or None to start over.
+
+        ``creating`` means the batch created the project folder but never
+        finished generating it.
+        """
+        entry = self.state.get(key)
+        if entry is None:
+            return None
+        if entry["stage"] != "failed":
+            return entry["stage"]
+        idx = STAGES.index(entry.get("failed_stage", "created"))
+        return STAGES[idx - 1] if idx > 0 else "failed"
+
+    def record(
+        self,
+        key: str,
+        name: Optional[str],
+        stage: str,
+        seconds: float,
+        error: Optional[str] = None,
+        failed_stage: Optional[str] = None,
+    ) -> None:
+        entry: Dict[str, Any] = {
+            "key": key,
+            "name": name,
+            "stage": stage,
+            "seconds": round(seconds, 4),
+            "time": time.time(),
+        }
+        if stage == "failed":
+            entry["failed_stage"] = failed_stage
+            entry["error"] = error
+        with self._lock:
+            self.state[key] = entry
+            self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+def final_stage(item: Dict[str, Any], args) -> str:
+    """Return the stage at which an item is complete."""
+    if not (item.get("use_llm", False) or args.use_llm):
+        return "created"
+    if item.get("dry_run", False) or args.dry_run:
+        return "llm_done"
+    return "integrated"
+
+
+def process_item(
+    item: Dict[str, Any],
+    args,
+    sandbox=None,
+    journal: Optional[Journal] = None,
+    key: str = "",
+    resume_from: Optional[str] = None,
+    resuming: bool = False,
+) -> Path:
+    """Create one batch project and run its LLM stages, checkpointing each one.
+
+    Missing fields fall back to the CLI arguments in ``args``. ``resume_from``
+    is the last stage completed in a previous run; stages up to it are
+    skipped. A failing stage is recorded in the journal and re-raised.
+
+    With ``resuming``, an existing project folder is updated in place, never
+    removed, unless the journal says this batch created it (``creating``)
+    and it has no generation manifest (written last): then a crash left it
+    half-written, possibly with a truncated file, and it is generated again
+    from scratch. A folder created by a generation that raised is removed
+    before the error is recorded.
+
+    With ``provision`` (item field or CLI flag) the venv of a Python project
+    is built as part of ``created``, so a failed provisioning is redone by
+    ``--resume``.
+    """
+    name = item.get("name")
+    if not name:
+        raise ValueError("item sem 'name'")
+    mode = item.get("mode", "minimal")
+    framework = item.get("framework", args.framework)
+    profile = item.get("profile", args.profile)
+    outdir = Path.cwd() / Path(item.get("out", args.out))
+    final = final_stage(item, args)
+    fs = storage_for(outdir, item.get("dedup", getattr(args, "dedup", False)))
+
+    def run_stage(stage: str, func):
+        t0 = time.perf_counter()
+        try:
+            result = func()
+        except Exception as e:
+            if journal:
+                journal.record(
+                    key, name, "failed", time.perf_counter() - t0, str(e), stage
+                )
+            raise
+        if journal:
+            journal.record(key, name, stage, time.perf_counter() - t0)
+        return result
+
+    def create() -> Path:
+        outdir.mkdir(parents=True, exist_ok=True)
+        folder = outdir / name
+        if resume_from == "creating" and folder.is_dir() and not (folder / MANIFEST_NAME).exists():
+            shutil.rmtree(folder)
+        fresh = not folder.exists()
+        if fresh and journal:
+            journal.record(key, name, "creating", 0.0)
+        try:
+            project_dir = create_project(
+                name,
+                outdir,
+                mode=mode,
+                framework=framework,
+                author=item.get("author") or args.author,
+                license=item.get("license") or args.license,
+                description=item.get("description") or args.description,
+                # an existing folder is completed in place when resuming
+                update=item.get("update", False) or args.update or (resuming and not fresh),
+                sandbox=sandbox,
+                profile=profile,
+                assets=item.get("assets", args.assets),
+            )
+        except Exception:
+            if fresh and folder.is_dir() and not (folder / MANIFEST_NAME).exists():
+                shutil.rmtree(folder, ignore_errors=True)
+            raise
+        if item.get("provision", getattr(args, "provision", False)) and framework != "express":
+            from .provision import provision
+
+            provision(project_dir, offline=item.get("offline", getattr(args, "offline", False)))
+        return project_dir
+
+    if resume_from in STAGES:
+        project_dir = outdir / name
+    else:
+        project_dir = run_stage("created", create)
+    if final == "created":
+        return project_dir
+
+    # LLM integration for batch items
+    from . import llm as _llm
+
+    snippet_file = project_dir / "llm_generated.txt"
+
+    def generate() -> str:
+        prompt_text = (
+            item.get("llm_prompt")
+            or args.llm_prompt
+            or f"Gerar snippet para projeto {name} ({framework})"
+        )
+        text = _llm.generate_code_from_prompt(prompt_text)
+        if text.startswith("# Erro ao chamar LLM"):
+            raise RuntimeError(text[2:])
+        fs.write_text(snippet_file, text)
+        return text
+
+    if resume_from in ("llm_done", "integrated") and fs.is_file(snippet_file):
+        snippet = fs.read_text(snippet_file)
+    else:
+        snippet = run_stage("llm_done", generate)
+    if final == "llm_done":
+        return project_dir
+
+    def integrate() -> None:
+        if not _llm.integrate_snippet(
+            project_dir, framework, snippet, sandbox=sandbox, storage=fs
+        ):
+            raise RuntimeError("integração do snippet falhou")
+
+    run_stage("integrated", integrate)
+    return project_dir
+
+
+class _Report:
+    """Thread-safe incremental NDJSON report with a resume watermark."""
+
+    def __init__(self, path: Optional[Path], offset: int) -> None:
+        self._fh = path.open("a", encoding="utf-8") if path else None
+        self._lock = threading.Lock()
+        self._done: Dict[int, int] = {}
+        self.resume_offset = offset
+        self.counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def record(self, start: int, end: int, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.counts[entry["status"]] += 1
+            # advance the watermark over the contiguous prefix of finished items
+            self._done[start] = end
+            while self.resume_offset in self._done:
+                self.resume_offset = self._done.pop(self.resume_offset)
+            if self._fh:
+                entry = dict(entry, offset=start, resume_offset=self.resume_offset)
+                self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._fh.flush()
+
+    def finish(self, summary: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._fh:
+                self._fh.write(json.dumps({"summary": summary}, ensure_ascii=False) + "\n")
+                self._fh.close()
+                self._fh = None
+
+
+def run_batch(
+    path: Path,
+    args,
+    workers: int = 1,
+    offset: int = 0,
+    report_path: Optional[Path] = None,
+    sandbox=None,
+    max_pending: Optional[int] = None,
+    journal_path: Optional[Path] = None,
+    resume: bool = False,
+) -> Dict[str, Any]:
+    """Run every project of a batch file through a bounded worker pool.
+
+    At most ``max_pending`` items (default ``2 * workers``) are read ahead of
+    the workers. Returns a summary dict with counts, elapsed time and the
+    ``resume_offset`` to pass as ``offset`` to continue an interrupted run.
+
+    With ``journal_path`` every stage of every item is checkpointed; with
+    ``resume`` the existing journal is read first and items only redo the
+    stages they did not finish (failed stages included).
+    """
+    workers = max(1, workers)
+    journal = Journal(journal_path, resume=resume) if journal_path else None
+    slots = threading.BoundedSemaphore(max_pending or 2 * workers)
+    report = _Report(Path(report_path) if report_path else None, offset)
+    started = time.perf_counter()
+
+    def run_one(start: int, end: int, item: Any) -> None:
+        t0 = time.perf_counter()
+        entry: Dict[str, Any] = {"name": None, "status": "ok"}
+        try:
+            if isinstance(item, Exception):
+                raise item
+            entry["name"] = item.get("name")
+            key = str(start)
+            last = journal.resume_point(key) if journal else None
+            if last is not None and last == final_stage(item, args):
+                entry["status"] = "skipped"
+                return
+            process_item(
+                item, args, sandbox=sandbox, journal=journal, key=key, resume_from=last, resuming=resume
+            )
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            print(f"Falha no item do batch (offset {start}): {e}")
+        finally:
+            entry["seconds"] = round(time.perf_counter() - t0, 4)
+            report.record(start, end, entry)
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start, end, item in iter_batch(path, offset):
+            slots.acquire()
+            pool.submit(run_one, start, end, item)
+
+    if journal:
+        journal.close()
+    elapsed = time.perf_counter() - started
+    processed = report.counts["ok"] + report.counts["failed"]
+    summary = {
+        "total": processed + report.counts["skipped"],
+        "ok": report.counts["ok"],
+        "failed": report.counts["failed"],
+        "skipped": report.counts["skipped"],
+        "seconds": round(elapsed, 3),
+        "items_per_second": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+        "resume_offset": report.resume_offset,
+    }
+    report.finish(summary)
+    return summary
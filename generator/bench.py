@@ -0,0 +1,444 @@
+"""Teste de carga embutido para os projetos gerados.
+
+`bench` sobe o projeto localmente (flask/fastapi/django com Python, express
+com `node` se estiver instalado), espera a porta abrir e roda um gerador de
+carga em asyncio (HTTP/1.1 com keep-alive, sem dependências externas) contra
+`/` e cada rota GET descoberta no código do projeto (arquivo principal e
+handlers integrados pelo LLM). Para cada rota são medidos RPS e latências
+p50/p95/p99; depois o app é encerrado.
+
+Cada execução é anexada a `llm_bench.jsonl`, ao lado de
+`llm_integration.log`, e comparada com a execução anterior.
+
+Uso:
+  python -m generator.cli bench generated/myapp --duration 10 --concurrency 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import llm
+
+RESULTS_NAME = "llm_bench.jsonl"
+SERVER_LOG_NAME = "llm_bench_server.log"
+# a request still pending this long after the deadline counts as an error
+RESPONSE_GRACE = 1.0
+
+# decorator/call and its arguments, up to the first ")"
+_PY_ROUTE = re.compile(r"""@\w+\.(route|get|api_route)\(\s*(?:path\s*=\s*)?['"]([^'"]+)['"]([^)]*)""")
+_JS_ROUTE = re.compile(r"""\b\w+\.(get|all)\(\s*['"]([^'"]+)['"]()""")
+# path parameters cannot be requested without knowing valid values
+_PARAM = re.compile(r"[<{:*(]")
+
+
+def detect_framework(project_dir: Path) -> Optional[str]:
+    """Guess the framework of a generated project from its main file."""
+    p = Path(project_dir)
+    if (p / "manage.py").exists():
+        return "django"
+    if (p / "main.py").exists() and "FastAPI" in (p / "main.py").read_text(errors="replace"):
+        return "fastapi"
+    if (p / "app.py").exists():
+        return "flask"
+    if (p / "index.js").exists():
+        return "express"
+    return None
+
+
+def discover_routes(project_dir: Path, framework: str) -> List[str]:
+    """Return ``/`` plus every static GET route declared in the project.
+
+    Routes are read from the main file and from the LLM handlers
+    (``llm_snippets/`` and a legacy ``llm_handlers.*``). Routes with path
+    parameters are skipped.
+    """
+    p = Path(project_dir)
+    if framework == "express":
+        sources = [p / "index.js", p / "llm_handlers.js"]
+        sources += sorted((p / llm.SNIPPETS_DIR).glob("*.js"))
+        pattern = _JS_ROUTE
+    else:
+        sources = [p / "app.py", p / "main.py", p / "llm_handlers.py"]
+        sources += sorted((p / llm.SNIPPETS_DIR).glob("*.py"))
+        pattern = _PY_ROUTE
+    routes = ["/"]
+    for src in sources:
+        if not src.is_file():
+            continue
+        for m in pattern.finditer(src.read_text(encoding="utf-8", errors="replace")):
+            _, route, rest = m.groups()
+            if "methods" in rest and "GET" not in rest:
+                continue  # e.g. @app.route("/x", methods=["POST"])
+            if route.startswith("/") and not _PARAM.search(route) and route not in routes:
+                routes.append(route)
+    return routes
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def _has_module(name: str) -> bool:
+    import importlib.util
+
+    return importlib.util.find_spec(name) is not None
+
+
+def server_command(
+    project_dir: Path, framework: str, host: str, port: int
+) -> Tuple[List[str], Dict[str, str]]:
+    """Return the command (and extra env) that serves the project on host:port.
+
+    Projects generated with the perf profile (``gunicorn.conf.py``) are
+    served with gunicorn when it is installed, so the numbers reflect the
+    production setup.
+    """
+    p = Path(project_dir)
+    env = {"PORT": str(port), "HOST": host}
+    use_gunicorn = (p / "gunicorn.conf.py").exists() and _has_module("gunicorn")
+    bind = f"{host}:{port}"
+    if framework == "express":
+        node = shutil.which("node")
+        if not node:
+            raise RuntimeError("node não encontrado no PATH")
+        return [node, "index.js"], env
+    if use_gunicorn:
+        target = {
+            "flask": "app:app",
+            "fastapi": "main:app",
+            "django": "project.wsgi:application",
+        }[framework]
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", bind, target]
+        return cmd, env
+    if framework == "fastapi":
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(port)]
+        return cmd, env
+    if framework == "django":
+        return [sys.executable, "manage.py", "runserver", "--noreload", bind], env
+    # flask: the threaded werkzeug server, without debugger or reloader
+    code = (
+        "import sys; sys.path.insert(0, '.')\n"
+        "from app import app\n"
+        "from werkzeug.serving import run_simple\n"
+        f"run_simple({host!r}, {port}, app, threaded=True)\n"
+    )
+    return [sys.executable, "-c", code], env
+
+
+def _server_name(cmd: List[str]) -> str:
+    for name in ("gunicorn", "uvicorn", "runserver"):
+        if name in cmd:
+            return name
+    return "node" if cmd[1:] == ["index.js"] else "werkzeug"
+
+
+def wait_for_port(host: str, port: int, timeout: float, proc=None) -> bool:
+    """Wait until host:port accepts connections (False on timeout or exit)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def stop_server(proc: subprocess.Popen, timeout: float = 10.0) -> None:
+    """Stop the app (and its workers) with SIGTERM, then SIGKILL."""
+    if proc.poll() is not None:
+        return
+    if os.name == "posix":
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+    else:
+        proc.terminate()
+    try:
+        proc.wait(timeout)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        else:
+            proc.kill()
+        proc.wait()
+
+
+# -- load generator ----------------------------------------------------------
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bool]:
+    """Read one HTTP/1.1 response; return (status, keep_alive)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip().lower()
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        # no length: the body ends when the server closes the connection
+        await reader.read()
+        return status, False
+    keep_alive = headers.get("connection") != "close" and lines[0].startswith("HTTP/1.1")
+    return status, keep_alive
+
+
+async def _client(
+    host: str, port: int, request: bytes, deadline: float, latencies: List[float], errors: List[str]
+) -> None:
+    reader = writer = None
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline:
+        try:
+            # a stalled server must not keep the client past the deadline
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), deadline - loop.time() + RESPONSE_GRACE
+                )
+            start = loop.time()
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(
+                _read_response(reader), deadline - start + RESPONSE_GRACE  # type: ignore[arg-type]
+            )
+            if status >= 400:
+                errors.append(f"HTTP {status}")
+            else:
+                latencies.append(loop.time() - start)
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except asyncio.TimeoutError:
+            errors.append("Timeout")
+            if writer is not None:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+                writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100.0 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+async def _load(host: str, port: int, path: str, duration: float, concurrency: int) -> Dict[str, Any]:
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        "User-Agent: iaapp-bench\r\nAccept: */*\r\n\r\n"
+    ).encode("latin-1")
+    latencies: List[float] = []
+    errors: List[str] = []
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + duration
+    await asyncio.gather(
+        *(_client(host, port, request, deadline, latencies, errors) for _ in range(concurrency))
+    )
+    elapsed = loop.time() - started
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+    }
+
+
+def run_load(
+    host: str, port: int, paths: List[str], duration: float = 5.0, concurrency: int = 10
+) -> List[Dict[str, Any]]:
+    """Load-test each path in turn for ``duration`` seconds; return per-path stats."""
+    return [asyncio.run(_load(host, port, path, duration, concurrency)) for path in paths]
+
+
+# -- orchestration -----------------------------------------------------------
+
+
+def bench_project(
+    project_dir: Path,
+    framework: Optional[str] = None,
+    duration: float = 5.0,
+    concurrency: int = 10,
+    warmup: float = 0.5,
+    startup_timeout: float = 30.0,
+    routes: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Start the project, load-test its routes, stop it and record the run.
+
+    Returns the run record (also appended to ``llm_bench.jsonl``). Raises
+    RuntimeError if the app cannot be started.
+    """
+    p = Path(project_dir).resolve()
+    framework = framework or detect_framework(p)
+    if framework is None:
+        raise RuntimeError(f"Não foi possível detectar o framework de {p}")
+    paths = routes or discover_routes(p, framework)
+    host = "127.0.0.1"
+    port = _free_port(host)
+    cmd, extra_env = server_command(p, framework, host, port)
+    log_path = p / SERVER_LOG_NAME
+    with log_path.open("wb") as log:
+        proc = subprocess.Popen(
+            cmd,
+            cwd=p,
+            env=dict(os.environ, **extra_env),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=(os.name == "posix"),
+        )
+        try:
+            if not wait_for_port(host, port, startup_timeout, proc):
+                raise RuntimeError(
+                    f"O app não abriu a porta {port} em {startup_timeout:.0f}s (veja {log_path})"
+                )
+            if warmup > 0:
+                run_load(host, port, paths[:1], warmup, concurrency)
+            results = run_load(host, port, paths, duration, concurrency)
+        finally:
+            stop_server(proc)
+
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "framework": framework,
+        "server": _server_name(cmd),
+        "duration": duration,
+        "concurrency": concurrency,
+        "routes": results,
+    }
+    with (p / RESULTS_NAME).open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    return record
+
+
+def previous_run(project_dir: Path, skip_last: bool = True) -> Optional[Dict[str, Any]]:
+    """Return the run before the last one recorded in ``llm_bench.jsonl``."""
+    path = Path(project_dir) / RESULTS_NAME
+    try:
+        lines = [ln for ln in path.read_text(encoding="utf-8").splitlines() if ln.strip()]
+    except OSError:
+        return None
+    if skip_last:
+        lines = lines[:-1]
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+
+def format_report(record: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> str:
+    """Render a run as a text table, with deltas against ``previous``."""
+    before = {r["path"]: r for r in (previous or {}).get("routes", [])}
+    lines = [
+        f"{'rota':<30} {'req':>8} {'erros':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    ]
+    for r in record["routes"]:
+        line = (
+            f"{r['path'][:30]:<30} {r['requests']:>8} {r['errors']:>6} {r['rps']:>9.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+        old = before.get(r["path"])
+        if old and old.get("rps"):
+            delta = (r["rps"] - old["rps"]) / old["rps"] * 100
+            line += f"  ({delta:+.1f}% rps, p95 {old['p95_ms']:.2f} -> {r['p95_ms']:.2f})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="generator.cli bench",
+        description="Subir um projeto gerado e medir RPS e latência das rotas",
+    )
+    p.add_argument("project", help="Pasta do projeto gerado")
+    p.add_argument(
+        "--framework",
+        "-f",
+        choices=("flask", "fastapi", "django", "express"),
+        help="Framework do projeto (padrão: detectado pelos arquivos)",
+    )
+    p.add_argument("--duration", "-d", type=float, default=5.0, help="Segundos de carga por rota")
+    p.add_argument("--concurrency", "-c", type=int, default=10, help="Conexões simultâneas")
+    p.add_argument("--warmup", type=float, default=0.5, help="Segundos de aquecimento")
+    p.add_argument("--timeout", type=float, default=30.0, help="Tempo máximo para o app subir")
+    p.add_argument(
+        "--route", "-r", action="append", help="Rota a testar (repetível; padrão: descobertas)"
+    )
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    project = Path(args.project)
+    if not project.is_dir():
+        print(f"Projeto não encontrado: {project}")
+        return 1
+    try:
+        record = bench_project(
+            project,
+            framework=args.framework,
+            duration=args.duration,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            startup_timeout=args.timeout,
+            routes=args.route,
+        )
+    except RuntimeError as e:
+        print(f"Benchmark falhou: {e}")
+        return 1
+    print(format_report(record, previous_run(project)))
+    print(f"Resultados gravados em {project / RESULTS_NAME}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,191 @@
+"""Armazenamento deduplicado (endereçado por conteúdo) dos artefatos do LLM.
+
+Em batches grandes, `llm_generated.txt`, `llm_pending.txt` e as versões em
+`llm_history/` (ou `llm_backup/`, em projetos antigos) costumam ser idênticos
+em centenas de projetos. Com `--dedup`, esses arquivos são gravados uma
+única vez em `<out>/.blobs/objects/`, com o nome igual ao sha256 do
+conteúdo, e cada projeto recebe um hardlink para o blob: o arquivo continua
+no mesmo lugar e é lido normalmente, mas os bytes existem uma vez só no
+disco.
+
+A contagem de referências é a do próprio sistema de arquivos: um blob com
+`st_nlink == 1` não é mais usado por nenhum projeto (que pode ter sido
+apagado com um simples `rm -r`) e é removido pelo `gc`. As gravações feitas
+pelo gerador (`storage.LocalStorage`) nunca alteram um arquivo compartilhado,
+apenas o substituem por uma cópia própria. Os blobs não são marcados como
+somente leitura: o atributo valeria também para os hardlinks dos projetos, e
+no Windows um arquivo somente leitura não pode ser apagado, o que quebraria
+`shutil.rmtree`/`rm -r` da pasta do projeto. O `gc` libera a escrita dos
+blobs gravados por versões antigas. Em sistemas de arquivos sem hardlink, o
+arquivo é gravado como cópia comum.
+
+Uso:
+  python -m generator.cli --batch projetos.ndjson --use-llm --dedup
+  python -m generator.cli blobs generated          # estatísticas
+  python -m generator.cli blobs generated --gc     # remove blobs sem referência
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import stat
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .storage import LocalStorage, PathLike
+
+BLOBS_DIR = ".blobs"
+# project files that are stored in the blob store when deduplication is on
+DEDUP_NAMES = ("llm_generated.txt", "llm_pending.txt")
+DEDUP_DIRS = ("llm_history", "llm_backup")
+# rewritten on every change: linking it would only leave garbage blobs behind
+DEDUP_SKIP = ("index.json",)
+
+
+class BlobStore:
+    """Content-addressed store of blobs under ``root``."""
+
+    def __init__(self, root: PathLike) -> None:
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+
+    def path_for(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` (once) and return its sha256."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            # concurrent writers of the same content race harmlessly here
+            os.replace(tmp, path)
+        return digest
+
+    def link(self, target: PathLike, data: bytes) -> bool:
+        """Make ``target`` a hardlink to the blob holding ``data``.
+
+        Returns False (and leaves ``target`` alone) when the filesystem
+        cannot hardlink, so the caller can fall back to a plain write.
+        """
+        blob = self.path_for(self.put(data))
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists() and os.path.samefile(blob, target):
+            return True
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        try:
+            if tmp.exists():
+                tmp.unlink()
+            os.link(blob, tmp)
+        except OSError:
+            return False
+        os.replace(tmp, target)
+        return True
+
+    def refcount(self, digest: str) -> int:
+        """Number of project files that point to the blob ``digest``."""
+        path = self.path_for(digest)
+        return path.stat().st_nlink - 1 if path.exists() else 0
+
+    def _blobs(self):
+        if not self.objects.is_dir():
+            return
+        for sub in sorted(self.objects.iterdir()):
+            if not sub.is_dir():
+                continue
+            for path in sorted(sub.iterdir()):
+                if not path.name.startswith("."):
+                    yield sub.name + path.name, path
+
+    def stats(self) -> Dict[str, int]:
+        """Return blob count, stored bytes, references and bytes saved."""
+        blobs = size = refs = saved = 0
+        for _, path in self._blobs():
+            st = path.stat()
+            blobs += 1
+            size += st.st_size
+            refs += st.st_nlink - 1
+            saved += st.st_size * max(st.st_nlink - 2, 0)
+        return {"blobs": blobs, "bytes": size, "references": refs, "saved_bytes": saved}
+
+    def gc(self, dry_run: bool = False) -> List[str]:
+        """Remove blobs no project refers to; return their digests.
+
+        Blobs left read-only by older versions are made writable again (the
+        mode is shared with every project link).
+        """
+        removed = []
+        for digest, path in self._blobs():
+            st = path.stat()
+            if not dry_run and not st.st_mode & stat.S_IWUSR:
+                path.chmod(st.st_mode | stat.S_IWUSR)
+            if st.st_nlink <= 1:
+                removed.append(digest)
+                if not dry_run:
+                    path.unlink()
+        return removed
+
+
+def is_dedup_path(path: PathLike) -> bool:
+    p = Path(path)
+    if p.name in DEDUP_SKIP:
+        return False
+    return p.name in DEDUP_NAMES or p.parent.name in DEDUP_DIRS
+
+
+class DedupStorage(LocalStorage):
+    """``LocalStorage`` that stores the LLM artifacts in a ``BlobStore``.
+
+    Only the files matched by :func:`is_dedup_path` are deduplicated; every
+    other file is written as usual.
+    """
+
+    def __init__(self, blobs: BlobStore) -> None:
+        self.blobs = blobs
+
+    def write_bytes(self, path: PathLike, data: bytes) -> None:
+        if is_dedup_path(path) and self.blobs.link(path, data):
+            return
+        super().write_bytes(path, data)
+
+
+def storage_for(out_dir: PathLike, dedup: bool = False) -> LocalStorage:
+    """Return the storage backend for projects generated under ``out_dir``."""
+    if not dedup:
+        return LocalStorage()
+    return DedupStorage(BlobStore(Path(out_dir) / BLOBS_DIR))
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="generator.cli blobs",
+        description="Estatísticas e coleta de lixo do armazenamento deduplicado",
+    )
+    p.add_argument("out", nargs="?", default="generated", help="Diretório de saída dos projetos")
+    p.add_argument("--gc", action="store_true", help="Remover blobs sem nenhuma referência")
+    p.add_argument("--dry-run", action="store_true", help="Com --gc: só listar o que seria removido")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    store = BlobStore(Path(args.out) / BLOBS_DIR)
+    if args.gc:
+        removed = store.gc(dry_run=args.dry_run)
+        verb = "seriam removidos" if args.dry_run else "removidos"
+        print(f"{len(removed)} blobs sem referência {verb}")
+    s: Dict[str, Any] = store.stats()
+    print(
+        f"{s['blobs']} blobs ({s['bytes']} bytes), {s['references']} referências, "
+        f"{s['saved_bytes']} bytes economizados"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
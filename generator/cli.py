@@ -3,16 +3,27 @@
 Uso:
   python -m generator.cli --name myapp --mode full
   python -m generator.cli --name myapp --mode minimal
+  python -m generator.cli --name myapp --mode full --update
+  python -m generator.cli --name myapp --mode full --framework fastapi --profile perf
 
 Se nenhum argumento for passado, o CLI fará perguntas interativas.
+
+Subcomandos:
+  python -m generator.cli scan generated --format sarif --report scan.sarif
+  python -m generator.cli bench generated/myapp --duration 10 --concurrency 50
+  python -m generator.cli provision generated/myapp --offline
+  python -m generator.cli blobs generated --gc
+  python -m generator.cli history generated/myapp --rollback 1
 """
 
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
-from .generate import create_project
+from .blobstore import storage_for
+from .generate import FRAMEWORKS, MODES, PROFILES, create_project
 
 
 def parse_args(argv=None):
@@ -21,16 +32,47 @@ def parse_args(argv=None):
     p.add_argument(
         "--mode",
         "-m",
-        choices=("minimal", "full"),
+        choices=MODES,
         default="minimal",
         help="Modo de template (minimal ou full)",
     )
     p.add_argument(
         "--framework",
         "-f",
-        choices=("flask", "express"),
+        choices=FRAMEWORKS,
         default="flask",
-        help="Framework alvo (flask ou express)",
+        help="Framework alvo (flask, fastapi, django ou express)",
+    )
+    p.add_argument(
+        "--profile",
+        choices=PROFILES,
+        default="dev",
+        help="Perfil dos templates full: dev (servidor de desenvolvimento) ou perf "
+        "(gunicorn/uvicorn/cluster dimensionados pelas CPUs, compressão, cache de estáticos)",
+    )
+    p.add_argument(
+        "--assets",
+        action="store_true",
+        help="Otimizar os assets estáticos (modo full): minificar CSS/HTML, nomes com hash "
+        "do conteúdo e cópias pré-comprimidas .gz/.br",
+    )
+    p.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Guardar os artefatos do LLM (snippets, pendentes, backups) uma única vez em <out>/.blobs",
+    )
+    p.add_argument(
+        "--provision",
+        action="store_true",
+        help=(
+            "Criar o venv do projeto Python a partir do cache compartilhado de wheels/ambientes "
+            "(em --batch, para cada item; o campo 'provision' do item tem precedência)"
+        ),
+    )
+    p.add_argument(
+        "--offline",
+        action="store_true",
+        help="Com --provision: usar apenas as wheels já em cache (sem rede)",
     )
     p.add_argument(
         "--port",
@@ -49,7 +91,49 @@ def parse_args(argv=None):
     p.add_argument("--description", help="Breve descrição do projeto")
     p.add_argument("--out", "-o", default="generated", help="Diretório de saída")
     p.add_argument(
-        "--batch", "-b", help="Arquivo JSON com lista de projetos para gerar (batch)"
+        "--batch",
+        "-b",
+        help="Arquivo de batch: NDJSON (um projeto por linha) ou JSON com lista de projetos",
+    )
+    p.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="Número de itens do batch processados em paralelo",
+    )
+    p.add_argument(
+        "--batch-offset",
+        type=int,
+        default=0,
+        help="Retomar o batch a partir deste offset (byte no NDJSON, índice no JSON)",
+    )
+    p.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retomar um batch pelo journal: refaz apenas estágios não concluídos ou com falha",
+    )
+    p.add_argument(
+        "--journal",
+        help="Journal de checkpoints do batch (padrão: <out>/.<nome do batch>.journal)",
+    )
+    p.add_argument(
+        "--report",
+        help="Arquivo NDJSON onde o relatório do batch é gravado incrementalmente",
+    )
+    p.add_argument(
+        "--update",
+        action="store_true",
+        help="Atualizar projeto existente: regrava apenas arquivos alterados no template",
+    )
+    p.add_argument(
+        "--archive",
+        help="Gerar o projeto direto em um arquivo .zip ou .tar.gz (sem criar a pasta)",
+    )
+    p.add_argument(
+        "--sandbox",
+        action="store_true",
+        help="Renderizar templates e analisar snippets em processos isolados (com limites)",
     )
     p.add_argument(
         "--use-llm",
@@ -76,74 +160,147 @@ def parse_args(argv=None):
     return p.parse_args(argv)
 
 
+def _scan(argv) -> int:
+    from .scan import main as scan_main
+
+    return scan_main(argv)
+
+
+def _bench(argv) -> int:
+    from .bench import main as bench_main
+
+    return bench_main(argv)
+
+
+def _provision(argv) -> int:
+    from .provision import main as provision_main
+
+    return provision_main(argv)
+
+
+def _provision_project(project_dir: Path, offline: bool) -> bool:
+    from .provision import ProvisionError, provision
+
+    try:
+        record = provision(project_dir, offline=offline)
+    except (ProvisionError, OSError) as e:
+        print(f"Provisionamento falhou: {e}")
+        return False
+    origin = "reutilizado" if record["reused_base"] else "criado"
+    print(f"venv pronto em {record['seconds']}s (ambiente base {record['key']} {origin})")
+    return True
+
+
+def _blobs(argv) -> int:
+    from .blobstore import main as blobs_main
+
+    return blobs_main(argv)
+
+
+def _history(argv) -> int:
+    from .history import main as history_main
+
+    return history_main(argv)
+
+
+SUBCOMMANDS = {
+    "scan": _scan,
+    "bench": _bench,
+    "provision": _provision,
+    "blobs": _blobs,
+    "history": _history,
+}
+
+
 def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
     args = parse_args(argv)
-    if not args.name:
-        # interação simples
-        name = input("Nome do projeto (ex: my_flask_app): ").strip()
-        if not name:
-            print("Nome inválido. Saindo.")
+    if args.archive:
+        # the archive is written straight from the templates: there is no
+        # project folder to update, provision or integrate a snippet into
+        flags = (
+            ("--batch", args.batch),
+            ("--update", args.update),
+            ("--use-llm", args.use_llm),
+            ("--provision", args.provision),
+        )
+        conflicts = [flag for flag, value in flags if value]
+        if conflicts:
+            print(f"--archive não pode ser combinado com {', '.join(conflicts)}")
             return 1
-        args.name = name
-
     target = Path.cwd() / args.out
+    if args.profile != "dev" and args.mode != "full" and not args.batch:
+        print(f"Aviso: --profile {args.profile} só se aplica a --mode full; ignorado.")
     target.mkdir(exist_ok=True)
 
+    pool = None
+    if args.sandbox:
+        from .sandbox import get_pool
+
+        pool = get_pool()
+
     # batch mode
     if args.batch:
-        import json
+        from .batch import run_batch
 
         batch_path = Path(args.batch)
         if not batch_path.exists():
             print(f"Arquivo de batch não encontrado: {batch_path}")
             return 1
-        data = json.loads(batch_path.read_text())
-        if not isinstance(data, list):
-            print("Arquivo de batch deve conter uma lista de projetos")
-            return 1
-        for item in data:
-            name = item.get("name")
-            mode = item.get("mode", "minimal")
-            framework = item.get("framework", args.framework)
-            outdir = Path(item.get("out", args.out))
-            outdir = Path.cwd() / outdir
-            outdir.mkdir(parents=True, exist_ok=True)
-            author = item.get("author") or args.author
-            license = item.get("license") or args.license
-            description = item.get("description") or args.description
-            project_dir = create_project(
-                name,
-                outdir,
-                mode=mode,
-                framework=framework,
-                author=author,
-                license=license,
-                description=description,
+        journal_path = (
+            Path(args.journal) if args.journal else target / f".{batch_path.stem}.journal"
+        )
+        try:
+            summary = run_batch(
+                batch_path,
+                args,
+                workers=args.workers,
+                offset=args.batch_offset,
+                report_path=Path(args.report) if args.report else None,
+                sandbox=pool,
+                journal_path=journal_path,
+                resume=args.resume,
             )
-            # LLM integration for batch items
-            use_llm_item = item.get("use_llm", False) or args.use_llm
-            prompt_item = item.get("llm_prompt") or args.llm_prompt
-            if use_llm_item:
-                try:
-                    from . import llm as _llm
-
-                    prompt_text = (
-                        prompt_item
-                        or f"Gerar snippet para projeto {name} ({framework})"
-                    )
-                    snippet = _llm.generate_code_from_prompt(prompt_text)
-                    # if dry-run requested for batch item, only save snippet
-                    if item.get("dry_run", False) or args.dry_run:
-                        try:
-                            (project_dir / "llm_generated.txt").write_text(snippet)
-                        except Exception:
-                            pass
-                    else:
-                        _llm.integrate_snippet(project_dir, framework, snippet)
-                except Exception:
-                    pass
+        except ValueError as e:
+            print(e)
+            return 1
+        print(
+            f"Batch concluído: {summary['ok']} ok, {summary['failed']} falhas, "
+            f"{summary['skipped']} já concluídos, {summary['items_per_second']} itens/s "
+            f"(offset para retomar: {summary['resume_offset']})"
+        )
+        if summary["failed"]:
+            print(f"Use --resume para refazer os itens com falha (journal: {journal_path})")
+            return 1
         return 0
 
+    if not args.name:
+        # interação simples
+        name = input("Nome do projeto (ex: my_flask_app): ").strip()
+        if not name:
+            print("Nome inválido. Saindo.")
+            return 1
+        args.name = name
+
+    if args.archive:
+        from .generate import create_archive
+
+        ok = create_archive(
+            args.name,
+            Path(args.archive),
+            mode=args.mode,
+            framework=args.framework,
+            author=args.author,
+            license=args.license,
+            description=args.description,
+            sandbox=pool,
+            profile=args.profile,
+            assets=args.assets,
+        )
+        return 0 if ok else 1
+
     project_dir = create_project(
         args.name,
         target,
@@ -152,7 +309,14 @@ def main(argv=None) -> int:
         author=args.author,
         license=args.license,
         description=args.description,
+        update=args.update,
+        sandbox=pool,
+        profile=args.profile,
+        assets=args.assets,
     )
+    if args.provision and args.framework != "express":
+        if not _provision_project(project_dir, args.offline):
+            return 1
     if args.use_llm:
         try:
             from . import llm as _llm
@@ -162,13 +326,16 @@ def main(argv=None) -> int:
                 or f"Gerar snippet para projeto {args.name} ({args.framework})"
             )
             snippet = _llm.generate_code_from_prompt(prompt)
+            fs = storage_for(target, args.dedup)
             if args.dry_run:
                 try:
-                    (project_dir / "llm_generated.txt").write_text(snippet)
+                    fs.write_text(project_dir / "llm_generated.txt", snippet)
                 except Exception:
                     pass
             else:
-                _llm.integrate_snippet(project_dir, args.framework, snippet)
+                _llm.integrate_snippet(
+                    project_dir, args.framework, snippet, sandbox=pool, storage=fs
+                )
         except Exception:
             pass
     # approval actions
@@ -176,7 +343,12 @@ def main(argv=None) -> int:
         try:
             from . import llm as _llm
 
-            ok = _llm.approve_pending(Path(target) / args.approve, args.framework)
+            ok = _llm.approve_pending(
+                Path(target) / args.approve,
+                args.framework,
+                sandbox=pool,
+                storage=storage_for(target, args.dedup),
+            )
             if ok:
                 print(f"Aprovado pending para: {args.approve}")
         except Exception:
@@ -189,7 +361,9 @@ def main(argv=None) -> int:
             if base.exists():
                 for p in base.iterdir():
                     if p.is_dir():
-                        _llm.approve_pending(p, "flask")
+                        _llm.approve_pending(
+                            p, "flask", sandbox=pool, storage=storage_for(base, args.dedup)
+                        )
         except Exception:
             pass
     return 0
@@ -12,8 +12,13 @@ O script pergunta o nome do projeto e gera os arquivos.
 
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Any
+import hashlib
+import json
+import re
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .storage import LOCAL, LocalStorage
 
 APP_PY_TEMPLATE = """from flask import Flask
 
@@ -60,13 +65,29 @@ venv/
 
 TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
 
+# template profiles: "dev" renders the full templates as they are; the others
+# overlay the files in templates/_profiles/<profile>/<framework>_full/ on top
+PROFILES = ("dev", "perf")
+PROFILES_DIR = TEMPLATES_DIR / "_profiles"
 
-def copy_tree(src: Path, dst: Path, context: dict | None = None) -> None:
-    """Copy files from src to dst (similar to distutils.dir_util.copy_tree but simple).
+# choices offered by the CLI and the UI (other templates, such as react_full,
+# are only reachable through project_files/create_project)
+MODES = ("minimal", "full")
+FRAMEWORKS = ("flask", "fastapi", "django", "express")
+
+MANIFEST_NAME = ".generator_manifest.json"
+
+
+def render_tree(
+    src: Path, context: dict | None = None, sandbox: Any = None
+) -> Iterator[Tuple[PurePosixPath, bytes]]:
+    """Yield ``(relative_path, content)`` for every file under ``src``.
 
-    Preserva subfolders. Overwrites existing files if present.
+    Text files are rendered with Jinja2 when it is available and a context is
+    given; everything else is passed through unchanged. If ``sandbox`` (a
+    ``generator.sandbox.SandboxPool``) is given, rendering happens in its
+    worker processes and a render that fails or times out keeps the raw file.
     """
-    # no local alias required here
     # local alias for Jinja2 Template if available
     _JINJA_TEMPLATE: Any = None
     try:
@@ -74,80 +95,380 @@ def copy_tree(src: Path, dst: Path, context: dict | None = None) -> None:
     except Exception:
         _JINJA_TEMPLATE = None
 
-    for p in src.rglob("*"):
+    for p in sorted(src.rglob("*")):
         if p.is_dir():
             continue
-        rel = p.relative_to(src)
-        target = dst / rel
-        target.parent.mkdir(parents=True, exist_ok=True)
+        rel = PurePosixPath(p.relative_to(src).as_posix())
+        data = p.read_bytes()
         # try to render text files with Jinja2 if available
         try:
-            data = p.read_bytes()
-            text_like = True
+            data_text = data.decode("utf-8")
+        except Exception:
+            yield rel, data
+            continue
+        if sandbox is not None and context:
+            from .sandbox import SandboxError
+
+            try:
+                data = sandbox.render_text(data_text, context).encode("utf-8")
+            except SandboxError as e:
+                print(f"Renderização de {rel} falhou no sandbox: {e}")
+        elif _JINJA_TEMPLATE and context:
             try:
-                data_text = data.decode("utf-8")
+                data = _JINJA_TEMPLATE(data_text).render(**context).encode("utf-8")
             except Exception:
-                text_like = False
-            if text_like and _JINJA_TEMPLATE and context:
-                rendered = _JINJA_TEMPLATE(data_text).render(**context)
-                target.write_text(rendered)
-            else:
-                target.write_bytes(data)
-        except Exception:
-            # fallback binary copy
-            target.write_bytes(p.read_bytes())
+                # fallback: keep the raw template
+                pass
+        yield rel, data
+
+
+def copy_tree(
+    src: Path,
+    dst: Path,
+    context: dict | None = None,
+    sandbox: Any = None,
+    storage: LocalStorage | None = None,
+) -> None:
+    """Copy files from src to dst (similar to distutils.dir_util.copy_tree but simple).
 
+    Preserva subfolders. Overwrites existing files if present. ``dst`` is
+    written through ``storage`` (the real disk by default).
+    """
+    storage = storage or LOCAL
+    for rel, data in render_tree(src, context, sandbox=sandbox):
+        storage.write_bytes(dst / rel, data)
 
-def create_project(
+
+def project_files(
     project_name: str,
-    target_dir: Path,
     mode: str = "minimal",
     framework: str = "flask",
     author: str | None = None,
     license: str | None = None,
     description: str | None = None,
-) -> Path:
-    project_dir = target_dir / project_name
-    if project_dir.exists():
-        print(f"Pasta {project_dir} já existe. Abortando para evitar sobrescrita.")
-        return project_dir
-
-    project_dir.mkdir(parents=True)
-
+    sandbox: Any = None,
+    cache: Any = None,
+    profile: str = "dev",
+    assets: bool = False,
+) -> Iterator[Tuple[PurePosixPath, bytes]] | None:
+    """Return the rendered files of a project, or None if the template is missing.
+
+    With ``cache`` (a ``generator.template_cache.TemplateCache``) templates
+    are read and compiled once instead of on every call. ``profile`` selects
+    a variant of the full templates (see ``PROFILES``) and ``assets`` runs
+    the static asset stage (``generator.assets``: minify, fingerprint,
+    precompress); neither has an effect in minimal mode.
+    """
     if mode == "full":
-        template_name = f"{framework}_full"
-        template_path = TEMPLATES_DIR / template_name
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil desconhecido: {profile}")
+        template_path = TEMPLATES_DIR / f"{framework}_full"
+        # the name becomes part of a path: it must stay a template of TEMPLATES_DIR
+        if not re.fullmatch(r"[a-z][a-z0-9_]*", framework):
+            raise ValueError(f"Framework desconhecido: {framework}")
         if not template_path.exists():
-            print(f"Template '{template_name}' não encontrado. Abortando.")
-            return project_dir
+            return None
         context = {
             "project_name": project_name,
             "author": author or "",
             "license": license or "",
             "description": description or "",
+            "profile": profile,
         }
-        copy_tree(template_path, project_dir, context=context)
-    else:
-        # minimal
-        (project_dir / "app.py").write_text(
-            APP_PY_TEMPLATE.format(project_name=project_name)
+        render = cache.render_tree if cache is not None else render_tree
+        files = render(template_path, context, sandbox=sandbox)
+        overlay_path = PROFILES_DIR / profile / f"{framework}_full"
+        if profile != "dev" and overlay_path.is_dir():
+            files = _overlay(files, render(overlay_path, context, sandbox=sandbox))
+        if assets:
+            from .assets import process_assets
+
+            files = process_assets(files, framework)
+        return files
+
+    # minimal
+    readme_text = README_TEMPLATE.format(project_name=project_name)
+    if author:
+        readme_text = readme_text + f"\nAuthor: {author}\n"
+    if license:
+        readme_text = readme_text + f"License: {license}\n"
+    if description:
+        readme_text = readme_text + f"\n{description}\n"
+    files = {
+        "app.py": APP_PY_TEMPLATE.format(project_name=project_name),
+        "requirements.txt": REQUIREMENTS + "\n",
+        "README.md": readme_text,
+        ".gitignore": GITIGNORE,
+    }
+    return iter((PurePosixPath(k), v.encode("utf-8")) for k, v in files.items())
+
+
+def _overlay(
+    base: Iterator[Tuple[PurePosixPath, bytes]],
+    overlay: Iterator[Tuple[PurePosixPath, bytes]],
+) -> Iterator[Tuple[PurePosixPath, bytes]]:
+    """Yield ``base`` with files replaced (or added) by the ones in ``overlay``."""
+    extra = dict(overlay)
+    for rel, data in base:
+        yield rel, extra.pop(rel, data)
+    yield from extra.items()
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_manifest(
+    project_dir: Path, storage: LocalStorage | None = None
+) -> Dict[str, str]:
+    """Return the ``{relative_path: sha256}`` map written at the last generation."""
+    storage = storage or LOCAL
+    path = Path(project_dir) / MANIFEST_NAME
+    try:
+        data = json.loads(storage.read_text(path))
+        return dict(data.get("files", {}))
+    except Exception:
+        return {}
+
+
+def _manifest_bytes(files: Dict[str, str]) -> bytes:
+    payload = {"version": 1, "files": dict(sorted(files.items()))}
+    return (json.dumps(payload, indent=2) + "\n").encode("utf-8")
+
+
+def write_manifest(
+    project_dir: Path, files: Dict[str, str], storage: LocalStorage | None = None
+) -> None:
+    storage = storage or LOCAL
+    storage.write_bytes(Path(project_dir) / MANIFEST_NAME, _manifest_bytes(files))
+
+
+def update_project(
+    project_name: str,
+    target_dir: Path,
+    mode: str = "minimal",
+    framework: str = "flask",
+    author: str | None = None,
+    license: str | None = None,
+    description: str | None = None,
+    sandbox: Any = None,
+    storage: LocalStorage | None = None,
+    cache: Any = None,
+    profile: str = "dev",
+    assets: bool = False,
+) -> Dict[str, List[str]]:
+    """Re-render an existing project and write only the files that changed.
+
+    Each file on disk is compared with the hash recorded in the manifest at
+    the last generation. Files the user edited by hand are never overwritten;
+    they are reported under ``conflicts``.
+
+    Returns a dict with lists of relative paths under the keys ``created``,
+    ``updated``, ``unchanged``, ``removed`` and ``conflicts``.
+    """
+    storage = storage or LOCAL
+    project_dir = Path(target_dir) / project_name
+    report: Dict[str, List[str]] = {
+        "created": [],
+        "updated": [],
+        "unchanged": [],
+        "removed": [],
+        "conflicts": [],
+    }
+    files = project_files(
+        project_name,
+        mode=mode,
+        framework=framework,
+        profile=profile,
+        assets=assets,
+        author=author,
+        license=license,
+        description=description,
+        sandbox=sandbox,
+        cache=cache,
+    )
+    if files is None:
+        print(f"Template '{framework}_full' não encontrado. Abortando.")
+        return report
+
+    storage.mkdir(project_dir)
+    old = read_manifest(project_dir, storage)
+    new: Dict[str, str] = {}
+    for rel, data in files:
+        key = rel.as_posix()
+        digest = _sha256(data)
+        target = project_dir / rel
+        if not storage.exists(target):
+            storage.write_bytes(target, data)
+            new[key] = digest
+            report["created"].append(key)
+            continue
+        current = _sha256(storage.read_bytes(target))
+        if current == digest:
+            new[key] = digest
+            report["unchanged"].append(key)
+        elif old.get(key) == current:
+            # untouched since last generation: safe to rewrite
+            storage.write_bytes(target, data)
+            new[key] = digest
+            report["updated"].append(key)
+        else:
+            # edited by hand (or unknown origin): keep the old record so the
+            # edit is still detected on the next update
+            if key in old:
+                new[key] = old[key]
+            report["conflicts"].append(key)
+
+    for key, digest in old.items():
+        if key in new:
+            continue
+        target = project_dir / key
+        if not storage.exists(target):
+            continue
+        if _sha256(storage.read_bytes(target)) == digest:
+            storage.unlink(target)
+            report["removed"].append(key)
+        else:
+            new[key] = digest
+            report["conflicts"].append(key)
+
+    write_manifest(project_dir, new, storage)
+    return report
+
+
+def create_project(
+    project_name: str,
+    target_dir: Path,
+    mode: str = "minimal",
+    framework: str = "flask",
+    author: str | None = None,
+    license: str | None = None,
+    description: str | None = None,
+    update: bool = False,
+    sandbox: Any = None,
+    storage: LocalStorage | None = None,
+    cache: Any = None,
+    profile: str = "dev",
+    assets: bool = False,
+) -> Path:
+    """Generate ``target_dir/project_name`` from the minimal or full template.
+
+    Files are written through ``storage`` (the real disk by default); pass a
+    ``MemoryStorage`` to generate the project in memory only.
+    """
+    storage = storage or LOCAL
+    project_dir = Path(target_dir) / project_name
+    if storage.exists(project_dir):
+        if not update:
+            print(f"Pasta {project_dir} já existe. Abortando para evitar sobrescrita.")
+            return project_dir
+        report = update_project(
+            project_name,
+            target_dir,
+            mode=mode,
+            framework=framework,
+            profile=profile,
+            assets=assets,
+            author=author,
+            license=license,
+            description=description,
+            sandbox=sandbox,
+            storage=storage,
+            cache=cache,
+        )
+        print(
+            f"Projeto atualizado em: {project_dir} "
+            f"(novos: {len(report['created'])}, "
+            f"atualizados: {len(report['updated'])}, "
+            f"removidos: {len(report['removed'])}, "
+            f"inalterados: {len(report['unchanged'])})"
         )
-        (project_dir / "requirements.txt").write_text(REQUIREMENTS + "\n")
-        # render README with placeholders
-        readme_text = README_TEMPLATE.format(project_name=project_name)
-        if author:
-            readme_text = readme_text + f"\nAuthor: {author}\n"
-        if license:
-            readme_text = readme_text + f"License: {license}\n"
-        if description:
-            readme_text = readme_text + f"\n{description}\n"
-        (project_dir / "README.md").write_text(readme_text)
-        (project_dir / ".gitignore").write_text(GITIGNORE)
+        for key in report["conflicts"]:
+            print(f"Conflito: {key} foi editado manualmente; mantido sem alterações.")
+        return project_dir
+
+    storage.mkdir(project_dir)
+
+    files = project_files(
+        project_name,
+        mode=mode,
+        framework=framework,
+        profile=profile,
+        assets=assets,
+        author=author,
+        license=license,
+        description=description,
+        sandbox=sandbox,
+        cache=cache,
+    )
+    if files is None:
+        print(f"Template '{framework}_full' não encontrado. Abortando.")
+        return project_dir
+
+    manifest: Dict[str, str] = {}
+    for rel, data in files:
+        storage.write_bytes(project_dir / rel, data)
+        manifest[rel.as_posix()] = _sha256(data)
+    write_manifest(project_dir, manifest, storage)
 
     print(f"Projeto gerado em: {project_dir}")
     return project_dir
 
 
+def with_manifest(
+    files: Iterator[Tuple[PurePosixPath, bytes]]
+) -> Iterator[Tuple[PurePosixPath, bytes]]:
+    """Pass ``files`` through and append the generation manifest at the end."""
+    manifest: Dict[str, str] = {}
+    for rel, data in files:
+        manifest[rel.as_posix()] = _sha256(data)
+        yield rel, data
+    yield PurePosixPath(MANIFEST_NAME), _manifest_bytes(manifest)
+
+
+def create_archive(
+    project_name: str,
+    dest: Any,
+    fmt: str | None = None,
+    mode: str = "minimal",
+    framework: str = "flask",
+    author: str | None = None,
+    license: str | None = None,
+    description: str | None = None,
+    sandbox: Any = None,
+    cache: Any = None,
+    profile: str = "dev",
+    assets: bool = False,
+) -> bool:
+    """Render a project straight into a zip/tar.gz archive, with no temp tree.
+
+    ``dest`` is a path or a writable binary file object; files are placed
+    under ``<project_name>/`` inside the archive. Returns False if the
+    template does not exist.
+    """
+    from .archive import write_archive
+
+    files = project_files(
+        project_name,
+        mode=mode,
+        framework=framework,
+        profile=profile,
+        assets=assets,
+        author=author,
+        license=license,
+        description=description,
+        sandbox=sandbox,
+        cache=cache,
+    )
+    if files is None:
+        print(f"Template '{framework}_full' não encontrado. Abortando.")
+        return False
+    count = write_archive(with_manifest(files), dest, fmt=fmt, root=project_name)
+    if isinstance(dest, (str, Path)):
+        print(f"Projeto gerado em: {dest} ({count} arquivos)")
+    return True
+
+
 def main() -> int:
     print("Gerador de app Flask (simples)")
     project_name = input("Nome do projeto (ex: my_flask_app): ").strip()
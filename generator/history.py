@@ -0,0 +1,231 @@
+"""Histórico versionado dos arquivos alterados pela integração do LLM.
+
+Cada vez que `llm.integrate_snippet` modifica o arquivo principal de um
+projeto (`app.py`, `main.py`, `index.js`) ou o índice de handlers
+(`llm_snippets/index.json`, alterado em toda integração), as versões anterior
+e nova são registradas em `<projeto>/llm_history/`:
+
+- `index.json`: para cada arquivo, a lista de versões (número, sha256,
+  tamanho, horário, mensagem e o tipo do objeto);
+- `<arquivo>.<versão>.z`: o conteúdo comprimido com zlib. A cada
+  `SNAPSHOT_EVERY` versões é gravada uma cópia completa; as demais guardam só
+  o delta (por linhas, via difflib) em relação à versão anterior.
+
+Reconstruir qualquer versão lê no máximo `SNAPSHOT_EVERY` objetos pequenos,
+então o rollback é imediato e o diff entre duas versões quaisquer não
+precisa de cópias completas de cada uma. Um rollback também vira uma versão
+nova, e pode ser desfeito.
+
+Uso:
+  python -m generator.cli history generated/myapp
+  python -m generator.cli history generated/myapp --diff 1 3
+  python -m generator.cli history generated/myapp --file app.py --rollback 1
+  python -m generator.cli history generated/myapp --file llm_snippets/index.json --rollback 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import hashlib
+import json
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .storage import LOCAL
+
+HISTORY_DIR = "llm_history"
+INDEX_NAME = "index.json"
+# a full copy every N versions bounds the length of a delta chain
+SNAPSHOT_EVERY = 8
+
+
+class HistoryError(LookupError):
+    """Raised for an unknown file or version."""
+
+
+def _dir(project_dir) -> Path:
+    return Path(project_dir) / HISTORY_DIR
+
+
+def _object_path(project_dir, rel: str, version: int) -> Path:
+    return _dir(project_dir) / f"{rel.replace('/', '__')}.{version:06d}.z"
+
+
+def read_index(project_dir, storage=None) -> Dict[str, List[Dict[str, Any]]]:
+    """Return ``{file: [version entries]}`` (empty when there is no history)."""
+    fs = storage or LOCAL
+    path = _dir(project_dir) / INDEX_NAME
+    if not fs.is_file(path):
+        return {}
+    return json.loads(fs.read_text(path)).get("files", {})
+
+
+def _write_index(project_dir, files, fs) -> None:
+    payload = {"format": 1, "files": files}
+    fs.write_text(_dir(project_dir) / INDEX_NAME, json.dumps(payload, indent=2) + "\n")
+
+
+def _lines(data: bytes) -> List[str]:
+    # surrogateescape keeps arbitrary bytes round-trippable through JSON
+    return data.decode("utf-8", "surrogateescape").splitlines(keepends=True)
+
+
+def _encode_delta(old: bytes, new: bytes) -> bytes:
+    """Line delta: ``["c", i, j]`` copies old lines i..j, ``["i", lines]`` inserts."""
+    a, b = _lines(old), _lines(new)
+    ops: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif j2 > j1:
+            ops.append(["i", b[j1:j2]])
+    return json.dumps(ops, ensure_ascii=False).encode("utf-8", "surrogateescape")
+
+
+def _apply_delta(old: bytes, delta: bytes) -> bytes:
+    a = _lines(old)
+    out: List[str] = []
+    for op in json.loads(delta.decode("utf-8", "surrogateescape")):
+        if op[0] == "c":
+            out.extend(a[op[1]:op[2]])
+        else:
+            out.extend(op[1])
+    return "".join(out).encode("utf-8", "surrogateescape")
+
+
+def _entry(files, rel: str, version: int) -> Dict[str, Any]:
+    for entry in files.get(rel, []):
+        if entry["version"] == version:
+            return entry
+    raise HistoryError(f"{rel}: versão {version} não existe")
+
+
+def read_version(project_dir, rel: str, version: int, storage=None) -> bytes:
+    """Rebuild the content of ``rel`` at ``version``."""
+    fs = storage or LOCAL
+    files = read_index(project_dir, storage=fs)
+    chain = []
+    entry = _entry(files, rel, version)
+    while entry["kind"] == "delta":
+        chain.append(entry)
+        entry = _entry(files, rel, entry["base"])
+    data = zlib.decompress(fs.read_bytes(_object_path(project_dir, rel, entry["version"])))
+    for entry in reversed(chain):
+        delta = zlib.decompress(fs.read_bytes(_object_path(project_dir, rel, entry["version"])))
+        data = _apply_delta(data, delta)
+    if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+        raise HistoryError(f"{rel}: versão {version} corrompida")
+    return data
+
+
+def record(project_dir, rel: str, data: bytes, message: str = "", storage=None) -> int:
+    """Add ``data`` as the newest version of ``rel`` and return its number.
+
+    Nothing is written when ``data`` equals the latest version.
+    """
+    fs = storage or LOCAL
+    files = read_index(project_dir, storage=fs)
+    versions = files.setdefault(rel, [])
+    digest = hashlib.sha256(data).hexdigest()
+    if versions and versions[-1]["sha256"] == digest:
+        return versions[-1]["version"]
+
+    version = versions[-1]["version"] + 1 if versions else 1
+    entry: Dict[str, Any] = {
+        "version": version,
+        "sha256": digest,
+        "size": len(data),
+        "time": datetime.now(timezone.utc).isoformat(),
+        "message": message,
+    }
+    if (version - 1) % SNAPSHOT_EVERY == 0:
+        entry["kind"] = "full"
+        payload = data
+    else:
+        entry["kind"] = "delta"
+        entry["base"] = versions[-1]["version"]
+        payload = _encode_delta(read_version(project_dir, rel, entry["base"], storage=fs), data)
+    fs.write_bytes(_object_path(project_dir, rel, version), zlib.compress(payload, 9))
+    versions.append(entry)
+    _write_index(project_dir, files, fs)
+    return version
+
+
+def diff(project_dir, rel: str, a: int, b: Optional[int] = None, storage=None) -> str:
+    """Unified diff of ``rel`` from version ``a`` to ``b`` (the current file if None)."""
+    fs = storage or LOCAL
+    before = read_version(project_dir, rel, a, storage=fs)
+    if b is None:
+        after = fs.read_bytes(Path(project_dir) / rel)
+        to_name = rel
+    else:
+        after = read_version(project_dir, rel, b, storage=fs)
+        to_name = f"{rel}@v{b}"
+    return "".join(
+        difflib.unified_diff(_lines(before), _lines(after), fromfile=f"{rel}@v{a}", tofile=to_name)
+    )
+
+
+def rollback(project_dir, rel: str, version: int, storage=None) -> int:
+    """Restore ``rel`` to ``version``; returns the number of the new version.
+
+    Unrecorded edits of the current file are saved as a version first, so
+    the rollback itself can be undone.
+    """
+    fs = storage or LOCAL
+    path = Path(project_dir) / rel
+    data = read_version(project_dir, rel, version, storage=fs)
+    if fs.is_file(path):
+        record(project_dir, rel, fs.read_bytes(path), "before rollback", storage=fs)
+    fs.write_bytes(path, data)
+    return record(project_dir, rel, data, f"rollback to v{version}", storage=fs)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="generator.cli history",
+        description="Listar, comparar e restaurar versões dos arquivos alterados pelo LLM",
+    )
+    p.add_argument("project", help="Pasta do projeto gerado")
+    p.add_argument("--file", help="Arquivo (padrão: o único arquivo com histórico)")
+    p.add_argument(
+        "--diff", nargs="+", type=int, metavar="V", help="Diff da versão A para B (ou para o arquivo atual)"
+    )
+    p.add_argument("--rollback", type=int, metavar="V", help="Restaurar o arquivo para a versão V")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    files = read_index(args.project)
+    if not files:
+        print(f"Nenhum histórico em {args.project}")
+        return 1
+    rel = args.file
+    if rel is None:
+        if len(files) > 1:
+            print("Vários arquivos com histórico; escolha com --file: " + ", ".join(sorted(files)))
+            return 1
+        rel = next(iter(files))
+    try:
+        if args.diff:
+            b = args.diff[1] if len(args.diff) > 1 else None
+            print(diff(args.project, rel, args.diff[0], b), end="")
+        elif args.rollback is not None:
+            new = rollback(args.project, rel, args.rollback)
+            print(f"{rel} restaurado para a versão {args.rollback} (nova versão {new})")
+        else:
+            for entry in read_index(args.project).get(rel, []):
+                print(f"v{entry['version']}  {entry['time']}  {entry['size']:>7} B  {entry['message']}")
+    except HistoryError as e:
+        print(e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,12 +8,22 @@ existência da variável de ambiente `OPENAI_API_KEY`.
 from __future__ import annotations
 
 import os
+import re
 import sys
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Tuple
+
+from . import history
+from .storage import LOCAL
 
 OPENAI_KEY = os.environ.get("OPENAI_API_KEY")
 
+# bump whenever analyze_snippet/is_risky change, so cached scans are redone
+RULESET_VERSION = "3"
+
+# frameworks whose snippets are JavaScript (analyzed by analyze_js_snippet)
+JS_FRAMEWORKS = ("express", "react", "react_native")
+
 
 def generate_code_from_prompt(prompt: str, model: str = "gpt-3.5-turbo") -> str:
     """Gera texto/código a partir do prompt usando OpenAI quando a chave estiver definida.
@@ -38,120 +48,308 @@ def generate_code_from_prompt(prompt: str, model: str = "gpt-3.5-turbo") -> str:
         return f"# Erro ao chamar LLM: {e}"
 
 
-def integrate_snippet(project_dir, framework: str, snippet: str) -> bool:
+SNIPPETS_DIR = "llm_snippets"
+HANDLER_INDEX = "index.json"
+
+# the single block added to app.py/main.py; its import line is the marker
+# used to tell whether a main file is already wired
+_PY_REGISTER_CODE = (
+    "\n\ntry:\n"
+    "    from llm_handlers import register as _llm_register\n"
+    "    _llm_register(app)\n"
+    "except Exception as _e:\n"
+    "    print('LLM handlers registration failed:', _e)\n"
+)
+_PY_REGISTER_MARKER = "from llm_handlers import register as _llm_register"
+_JS_REGISTER_CODE = "\nconst llm_handlers = require('./llm_handlers');\nllm_handlers(app);\n"
+_JS_REGISTER_MARKER = "require('./llm_handlers')"
+
+# loader hooks: written once, they register every handler listed in the index
+_PY_LOADER = '''"""Registra os handlers gerados por LLM listados em llm_snippets/index.json.
+
+Arquivo gerado pelo gerador: não edite, cada snippet fica no seu próprio
+módulo dentro de llm_snippets/.
+"""
+
+import importlib.util
+import json
+from pathlib import Path
+
+_DIR = Path(__file__).resolve().parent / "llm_snippets"
+_registered = set()
+
+
+def register(app):
+    try:
+        index = json.loads((_DIR / "index.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    for entry in index.get("handlers", []):
+        key = (id(app), entry["id"])
+        if key in _registered:
+            continue
+        spec = importlib.util.spec_from_file_location(
+            "llm_snippets." + entry["id"], _DIR / entry["file"]
+        )
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+            module.register(app)
+            _registered.add(key)
+        except Exception as e:
+            print(f"LLM handler {entry['id']} failed:", e)
+'''
+
+_JS_LOADER = """// Registra os handlers gerados por LLM listados em llm_snippets/index.json.
+// Arquivo gerado pelo gerador: não edite, cada snippet fica no seu próprio
+// módulo dentro de llm_snippets/.
+const fs = require('fs');
+const path = require('path');
+
+const dir = path.join(__dirname, 'llm_snippets');
+
+module.exports = function (app) {
+  let index;
+  try {
+    index = JSON.parse(fs.readFileSync(path.join(dir, 'index.json'), 'utf8'));
+  } catch (e) {
+    return;
+  }
+  for (const entry of index.handlers || []) {
+    try {
+      require(path.join(dir, entry.file))(app);
+    } catch (e) {
+      console.error('LLM handler ' + entry.id + ' failed:', e);
+    }
+  }
+};
+"""
+
+
+def is_loader(text: str) -> bool:
+    """True if ``text`` is the handler loader written by the generator.
+
+    The loader imports the registered snippets by path (a dynamic import by
+    design); the snippets themselves are analyzed on their own.
+    """
+    return text in (_PY_LOADER, _JS_LOADER)
+
+
+def snippet_hash(snippet: str) -> str:
+    """Hash identifying a snippet, insensitive to trailing whitespace."""
+    import hashlib
+
+    normalized = "\n".join(line.rstrip() for line in snippet.splitlines()).strip("\n")
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def read_handler_index(project_dir, storage=None) -> dict:
+    """Return the handler index of a project (empty if there is none)."""
+    import json
+
+    fs = storage or LOCAL
+    path = Path(project_dir) / SNIPPETS_DIR / HANDLER_INDEX
+    try:
+        index = json.loads(fs.read_text(path))
+    except (OSError, ValueError):
+        return {"version": 1, "handlers": []}
+    index.setdefault("handlers", [])
+    return index
+
+
+def _write_handler_index(project_dir, index: dict, storage, log_lines) -> None:
+    """Write the handler index, recording the old and new versions in the history.
+
+    The index is the handler set the loader registers, so rolling it back
+    undoes any integration, not only the one that wired the main file.
+    """
+    import json
+
+    rel = f"{SNIPPETS_DIR}/{HANDLER_INDEX}"
+    path = Path(project_dir) / rel
+    if storage.is_file(path):
+        old = storage.read_bytes(path)
+    else:
+        old = (json.dumps({"version": 1, "handlers": []}, indent=2) + "\n").encode("utf-8")
+    new = json.dumps(index, indent=2) + "\n"
+    before = history.record(project_dir, rel, old, "before integration", storage)
+    storage.write_text(path, new)
+    after = history.record(
+        project_dir, rel, new.encode("utf-8"), f"{len(index['handlers'])} handler(s)", storage
+    )
+    log_lines.append(f"Recorded {rel} v{before} -> v{after} in {history.HISTORY_DIR}/")
+
+
+def _handler_module(snippet: str, lang: str, digest: str) -> str:
+    if lang == "py":
+        indented = "\n".join(
+            ("    " + line) if line.strip() else "" for line in snippet.splitlines()
+        )
+        return f"# sha256: {digest}\n\n\ndef register(app):\n{indented}\n"
+    indented = "\n".join(
+        ("  " + line) if line.strip() else "" for line in snippet.splitlines()
+    )
+    return f"// sha256: {digest}\nmodule.exports = function(app) {{\n{indented}\n}}\n"
+
+
+def _add_handler(fs, p: Path, index: dict, module_text: str, digest: str, lang: str) -> str:
+    from datetime import datetime, timezone
+
+    handler_id = "h_" + digest[:12]
+    name = f"{handler_id}.{lang}"
+    fs.write_text(p / SNIPPETS_DIR / name, module_text)
+    index["handlers"].append(
+        {
+            "id": handler_id,
+            "sha256": digest,
+            "file": name,
+            "created": datetime.now(timezone.utc).isoformat(),
+        }
+    )
+    return name
+
+
+def _migrate_legacy_handlers(fs, p: Path, index: dict, hook: Path, lang: str, log_lines) -> None:
+    """Turn a pre-registry ``llm_handlers.*`` (one snippet) into a handler module."""
+    loader = _PY_LOADER if lang == "py" else _JS_LOADER
+    if not fs.is_file(hook):
+        return
+    text = fs.read_text(hook)
+    if text == loader:
+        return
+    digest = snippet_hash(text)
+    if not any(h["sha256"] == digest for h in index["handlers"]):
+        name = _add_handler(fs, p, index, text, digest, lang)
+        log_lines.append(f"Migrated {hook.name} to {SNIPPETS_DIR}/{name}")
+
+
+def _wire_main_file(fs, p: Path, main_file: Path, lang: str, log_lines) -> None:
+    """Add the registration block to the main file once.
+
+    Duplicated blocks left by older versions of the generator are collapsed
+    into one.
+    """
+    text = fs.read_text(main_file)
+    code, marker = (
+        (_PY_REGISTER_CODE, _PY_REGISTER_MARKER)
+        if lang == "py"
+        else (_JS_REGISTER_CODE, _JS_REGISTER_MARKER)
+    )
+    if marker in text:
+        if text.count(code) <= 1:
+            return
+        first = text.index(code) + len(code)
+        new_text = text[:first] + text[first:].replace(code, "")
+        message = f"Removed duplicated llm_handlers blocks from {main_file.name}"
+    else:
+        if lang == "py":
+            insert_point = text.rfind('\nif __name__ == "__main__":')
+        else:
+            insert_point = text.rfind("\napp.listen(")
+        if insert_point != -1:
+            new_text = text[:insert_point] + code + text[insert_point:]
+        else:
+            new_text = text + code
+        message = f"Modified {main_file.name} to call llm_handlers"
+
+    # both versions go to the project history (rollback / diff any two)
+    before = history.record(p, main_file.name, fs.read_bytes(main_file), "before integration", fs)
+    fs.write_text(main_file, new_text)
+    after = history.record(p, main_file.name, new_text.encode("utf-8"), message, fs)
+    log_lines.append(message)
+    log_lines.append(f"Recorded {main_file.name} v{before} -> v{after} in {history.HISTORY_DIR}/")
+
+
+def integrate_snippet(
+    project_dir, framework: str, snippet: str, sandbox=None, storage=None
+) -> bool:
     """Integrate a generated snippet into the generated project.
 
     Strategy:
-    - For Python frameworks (flask, fastapi): create `llm_handlers.py` with a
-      `def register(app):` wrapper around the snippet, and then modify the main
-      app file to call that register(app) before the server start.
-    - For express: create `llm_handlers.js` that exports a function (app) and
-      call it from `index.js` before app.listen.
+    - Each snippet becomes its own module in `llm_snippets/`
+      (`h_<hash>.py` with a `def register(app):` wrapper for flask/fastapi,
+      `h_<hash>.js` exporting a function (app) for express) and is appended
+      to `llm_snippets/index.json`.
+    - `llm_handlers.py`/`llm_handlers.js` is a fixed loader that registers
+      every handler in the index; the main app file (`app.py`/`main.py` or
+      `index.js`) calls it once, before the server start. The call is added
+      only the first time.
+    - A snippet whose hash is already in the index is not integrated again.
+    - A `llm_handlers.*` written by older versions (a single snippet) is
+      migrated into the registry the first time a new snippet arrives.
+    - Every change of `llm_snippets/index.json` and of the main file is
+      recorded in `llm_history/` (see `generator.history`), so any
+      integration can be rolled back.
+
+    If ``sandbox`` (a ``generator.sandbox.SandboxPool``) is given, the snippet
+    is analyzed in a worker process instead of in-process. Files are read and
+    written through ``storage`` (a ``generator.storage`` backend, the real
+    disk by default).
 
     Returns True on success.
     """
     from pathlib import Path
 
+    fs = storage or LOCAL
     p = Path(project_dir)
     try:
         # analyze snippet for risky constructs
-        analysis = analyze_snippet(snippet)
+        analysis = _analyze(snippet, sandbox, framework)
         # prepare log
         log_lines = []
         log_lines.append(f"Snippet analysis: {analysis}")
         from datetime import datetime, timezone
 
-        log_lines.append(f"Timestamp: {datetime.now(timezone.utc).isoformat()}Z")
-        if framework.lower() in ("flask", "fastapi"):
-            handlers = p / "llm_handlers.py"
-            # wrap snippet into register(app)
-            indented = "\n".join(
-                ("    " + line) if line.strip() else "" for line in snippet.splitlines()
-            )
-            content = f"def register(app):\n{indented}\n"
-            handlers.write_text(content)
-            log_lines.append("Wrote llm_handlers.py")
+        log_lines.append(f"Timestamp: {datetime.now(timezone.utc).isoformat()}")
+        fw = framework.lower()
+        if fw in ("flask", "fastapi", "express"):
+            if fw == "express":
+                lang, loader, main_candidates = "js", _JS_LOADER, ["index.js"]
+            else:
+                lang, loader, main_candidates = "py", _PY_LOADER, ["app.py", "main.py"]
+            hook = p / f"llm_handlers.{lang}"
+            index = read_handler_index(p, storage=fs)
+            known = len(index["handlers"])
+            _migrate_legacy_handlers(fs, p, index, hook, lang, log_lines)
+
+            digest = snippet_hash(snippet)
+            if any(h["sha256"] == digest for h in index["handlers"]):
+                log_lines.append(f"Snippet {digest[:12]} already integrated; nothing to do")
+            else:
+                name = _add_handler(
+                    fs, p, index, _handler_module(snippet, lang, digest), digest, lang
+                )
+                log_lines.append(f"Wrote {SNIPPETS_DIR}/{name}")
+            if len(index["handlers"]) == known:
+                _write_log(project_dir, log_lines, storage=fs)
+                return True
+            _write_handler_index(p, index, fs, log_lines)
+            if not fs.is_file(hook) or fs.read_text(hook) != loader:
+                fs.write_text(hook, loader)
+                log_lines.append(f"Wrote {hook.name}")
 
-            # find main file to modify
-            main_candidates = ["app.py", "main.py"]
             main_file = None
             for name in main_candidates:
-                if (p / name).exists():
+                if fs.exists(p / name):
                     main_file = p / name
                     break
-            if not main_file:
-                # nothing to modify, but handlers file written
-                _write_log(project_dir, log_lines)
-                return True
-
-            # backup original
-            backup_dir = p / "llm_backup"
-            backup_dir.mkdir(parents=True, exist_ok=True)
-            backup_path = backup_dir / main_file.name
-            backup_path.write_bytes(main_file.read_bytes())
-            log_lines.append(f"Backed up {main_file.name} to {backup_path}")
-
-            text = main_file.read_text()
-            insert_point = text.rfind('\nif __name__ == "__main__":')
-            register_code = (
-                "\n\ntry:\n"
-                "    from llm_handlers import register as _llm_register\n"
-                "    _llm_register(app)\n"
-                "except Exception as _e:\n"
-                "    print('LLM handlers registration failed:', _e)\n"
-            )
-            if insert_point != -1:
-                new_text = text[:insert_point] + register_code + text[insert_point:]
-            else:
-                new_text = text + register_code
-            main_file.write_text(new_text)
-            log_lines.append(f"Modified {main_file.name} to call llm_handlers.register")
-            _write_log(project_dir, log_lines)
-            return True
-
-        elif framework.lower() == "express":
-            handlers = p / "llm_handlers.js"
-            # wrap snippet into module.exports = function(app) { ... }
-            indented = "\n".join(
-                ("  " + line) if line.strip() else "" for line in snippet.splitlines()
-            )
-            content = f"module.exports = function(app) {{\n{indented}\n}}\n"
-            handlers.write_text(content)
-            log_lines.append("Wrote llm_handlers.js")
-
-            index_js = p / "index.js"
-            if not index_js.exists():
-                _write_log(project_dir, log_lines)
-                return True
-            # backup
-            backup_dir = p / "llm_backup"
-            backup_dir.mkdir(parents=True, exist_ok=True)
-            backup_path = backup_dir / index_js.name
-            backup_path.write_bytes(index_js.read_bytes())
-            log_lines.append(f"Backed up {index_js.name} to {backup_path}")
-
-            text = index_js.read_text()
-            # insert require and call before app.listen
-            call_code = "\nconst llm_handlers = require('./llm_handlers');\nllm_handlers(app);\n"
-            listen_idx = text.rfind("\napp.listen(")
-            if listen_idx != -1:
-                new_text = text[:listen_idx] + call_code + text[listen_idx:]
-            else:
-                new_text = text + call_code
-            index_js.write_text(new_text)
-            log_lines.append(f"Modified {index_js.name} to call llm_handlers")
-            _write_log(project_dir, log_lines)
+            if main_file:
+                _wire_main_file(fs, p, main_file, lang, log_lines)
+            # else: nothing to modify, but the handler is registered
+            _write_log(project_dir, log_lines, storage=fs)
             return True
 
         else:
             # unsupported framework: just save snippet file
-            (p / "llm_generated.txt").write_text(snippet)
+            fs.write_text(p / "llm_generated.txt", snippet)
             log_lines.append("Saved llm_generated.txt for unsupported framework")
-            _write_log(project_dir, log_lines)
+            _write_log(project_dir, log_lines, storage=fs)
             return True
     except Exception:
         try:
-            _write_log(project_dir, [f"Integration failed: {sys.exc_info()}"])
+            _write_log(
+                project_dir, [f"Integration failed: {sys.exc_info()}"], storage=fs
+            )
         except Exception:
             pass
         return False
@@ -163,24 +361,24 @@ def process_snippet(
     snippet: str,
     force: bool = False,
     dry_run: bool = False,
+    sandbox=None,
+    storage=None,
 ) -> dict:
     """Process a snippet: analyze and either integrate, save pending, or save as dry-run.
 
     Returns dict with keys: integrated(bool), pending(bool), reason(str)
     """
+    fs = storage or LOCAL
     p = Path(project_dir)
-    analysis = analyze_snippet(snippet)
-    # consider risky if exec/eval/subprocess present
-    risky = (
-        analysis.get("has_exec")
-        or analysis.get("has_eval")
-        or analysis.get("has_subprocess")
-    )
+    analysis = _analyze(snippet, sandbox, framework)
+    risky = is_risky(analysis)
     if dry_run:
         try:
-            (p / "llm_generated.txt").write_text(snippet)
+            fs.write_text(p / "llm_generated.txt", snippet)
             _write_log(
-                p, ["Dry-run saved snippet (no integration)", f"Analysis: {analysis}"]
+                p,
+                ["Dry-run saved snippet (no integration)", f"Analysis: {analysis}"],
+                storage=fs,
             )
         except Exception:
             pass
@@ -189,8 +387,10 @@ def process_snippet(
     if risky and not force:
         # save pending file for manual approval
         try:
-            (p / "llm_pending.txt").write_text(snippet)
-            _write_log(p, [f"Snippet marked as pending due to risk: {analysis}"])
+            fs.write_text(p / "llm_pending.txt", snippet)
+            _write_log(
+                p, [f"Snippet marked as pending due to risk: {analysis}"], storage=fs
+            )
         except Exception:
             pass
         return {
@@ -200,28 +400,37 @@ def process_snippet(
         }
 
     # safe or forced -> integrate
-    ok = integrate_snippet(project_dir, framework, snippet)
+    ok = integrate_snippet(
+        project_dir, framework, snippet, sandbox=sandbox, storage=fs
+    )
     if ok:
-        _write_log(p, ["Snippet integrated successfully", f"Analysis: {analysis}"])
+        _write_log(
+            p, ["Snippet integrated successfully", f"Analysis: {analysis}"], storage=fs
+        )
         return {"integrated": True, "pending": False, "reason": "integrated"}
     else:
-        _write_log(p, ["Integration attempted but failed", f"Analysis: {analysis}"])
+        _write_log(
+            p, ["Integration attempted but failed", f"Analysis: {analysis}"], storage=fs
+        )
         return {"integrated": False, "pending": False, "reason": "integration_failed"}
 
 
-def approve_pending(project_dir, framework: str) -> bool:
+def approve_pending(project_dir, framework: str, sandbox=None, storage=None) -> bool:
     """Approve a pending snippet: read llm_pending.txt and integrate forcefully."""
+    fs = storage or LOCAL
     p = Path(project_dir)
     pending = p / "llm_pending.txt"
-    if not pending.exists():
+    if not fs.exists(pending):
         return False
-    snippet = pending.read_text()
+    snippet = fs.read_text(pending)
     # integrate forcefully
-    res = integrate_snippet(project_dir, framework, snippet)
+    res = integrate_snippet(
+        project_dir, framework, snippet, sandbox=sandbox, storage=fs
+    )
     if res:
         try:
-            pending.unlink()
-            _write_log(p, ["Pending snippet approved and integrated"])
+            fs.unlink(pending)
+            _write_log(p, ["Pending snippet approved and integrated"], storage=fs)
         except Exception:
             pass
         return True
@@ -306,16 +515,267 @@ def analyze_snippet(snippet: str) -> dict:
     return flags
 
 
-def _write_log(project_dir, lines):
+# One pass over the source: comments are consumed (and dropped) as whole
+# tokens and string bodies use the unrolled-loop form so there is no
+# backtracking. An unterminated comment runs to the end of the input; a
+# quote with no closing quote (on its line, or anywhere for a backtick) is a
+# lone punctuation token, so it cannot hide the code after it. Neither is
+# retried at every offset: after a failed quote there is no other quote of
+# that kind to try, and a failed regex literal stops regex attempts until
+# the end of its line. Whitespace is skipped, so the scan stays linear.
+_JS_TOKEN = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*[^*]*(?:\*+[^*/][^*]*)*(?:\*+/|\Z))
+    |(?P<string>'[^'\\\n]*(?:\\.[^'\\\n]*)*'
+               |"[^"\\\n]*(?:\\.[^"\\\n]*)*")
+    |(?P<template>`[^`\\]*(?:\\[\s\S][^`\\]*)*`)
+    |(?P<ident>(?:[^\W\d]|\$)[\w$]*)
+    |(?P<number>\d[\w.]*)
+    |(?P<punct>\?\.(?!\d)|[\s\S])
+    """,
+    re.VERBOSE,
+)
+_JS_SPACE = re.compile(r"\s+")
+# a regex literal, tried only where a "/" cannot be a division
+_JS_REGEX = re.compile(r"/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+# a "/" after a value divides, but these keywords are followed by an expression
+_JS_EXPR_KEYWORDS = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete",
+    "void", "throw", "case", "do", "else", "yield", "await",
+}
+_JS_INTERPOLATION = re.compile(r"\$\{([^}]*)\}")
+
+# module -> flag raised when it is required/imported
+_JS_DANGEROUS_MODULES = {
+    "child_process": "has_subprocess",
+    "cluster": "has_subprocess",
+    "worker_threads": "has_subprocess",
+    "vm": "has_exec",
+    "module": "has_importlib",
+}
+_JS_EVAL_CALLS = {"eval", "Function"}
+_JS_TIMERS = {"setTimeout", "setInterval", "setImmediate"}
+
+
+def _js_tokens(source: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(kind, value)`` tokens of a JS source, without comments.
+
+    String values are returned without quotes. The ``${...}`` parts of
+    template literals are tokenized too, since they hold code.
+    """
+    pos, end = 0, len(source)
+    prev = ("", "")
+    no_regex_until = -1
+    while pos < end:
+        space = _JS_SPACE.match(source, pos)
+        if space:
+            pos = space.end()
+            continue
+        if source[pos] == "/" and pos > no_regex_until and not (
+            prev[0] in ("number", "string", "template", "regex")
+            or (prev[0] == "ident" and prev[1] not in _JS_EXPR_KEYWORDS)
+            or prev[1] in (")", "]", "}")
+        ):
+            regex = _JS_REGEX.match(source, pos)
+            if regex:
+                pos = regex.end()
+                prev = ("regex", "")
+                continue
+            newline = source.find("\n", pos)
+            no_regex_until = end if newline < 0 else newline
+        m = _JS_TOKEN.match(source, pos)
+        assert m is not None  # "punct" takes any character
+        pos = m.end()
+        kind = m.lastgroup or ""
+        if kind == "comment":
+            continue
+        text = m.group()
+        prev = (kind, text)
+        if kind == "string":
+            yield "string", text[1:-1]
+        elif kind == "template":
+            body = text[1:-1]
+            if "${" in body:
+                yield "punct", "("
+                for part in _JS_INTERPOLATION.finditer(body):
+                    yield from _js_tokens(part.group(1))
+                    yield "punct", ";"
+                yield "punct", ")"
+            else:
+                yield "string", body
+        else:
+            yield kind, text
+
+
+def analyze_js_snippet(snippet: str) -> dict:
+    """Static analysis of a JavaScript snippet (Express/React handlers).
+
+    Returns the same flags as :func:`analyze_snippet`, so ``is_risky`` and
+    the scan reports treat both languages alike:
+
+    - ``has_eval``: ``eval(...)``, ``Function(...)``/``new Function(...)``
+      and timers called with a string (``setTimeout("code")``);
+    - ``has_exec``: the ``vm`` module;
+    - ``has_subprocess``: ``child_process`` (and ``cluster``/
+      ``worker_threads``), ``process.binding``/``process.dlopen``;
+    - ``has_importlib``: ``require``/``import()`` with a non-literal argument
+      and the ``module`` module.
+
+    ``imports`` lists every module loaded with ``require('x')`` or
+    ``import ... from 'x'``. The scan is a single linear pass over the
+    tokens, so it stays fast on very large snippets.
+    """
+    flags: Dict[str, Any] = {
+        "has_exec": False,
+        "has_eval": False,
+        "has_subprocess": False,
+        "has_importlib": False,
+        "has___import__": False,
+        "imports": [],
+    }
+    # the last four significant tokens, newest first
+    p1 = p2 = p3 = p4 = ("", "")
+    # what the next token is expected to be: a module name, a timer argument
+    # or the ")" closing a require('literal')
+    expect = ""
+
+    def add_import(name: str) -> None:
+        name = name[5:] if name.startswith("node:") else name
+        top = name.split("/")[0]
+        flags["imports"].append(top)
+        flag = _JS_DANGEROUS_MODULES.get(top)
+        if flag:
+            flags[flag] = True
+
+    for kind, value in _js_tokens(snippet):
+        if expect == "module":
+            if kind == "string":
+                add_import(value)
+                expect = "close"
+            else:
+                flags["has_importlib"] = True
+                expect = ""
+        elif expect == "close":
+            if value != ")":
+                # require('child_' + name) and friends
+                flags["has_importlib"] = True
+            expect = ""
+        elif expect == "timer":
+            if kind == "string":
+                flags["has_eval"] = True
+            expect = ""
+
+        # the callee of "name(" or of the optional call "name?.("
+        callee = (p1, p2, p3) if p1[0] == "ident" else (p2, p3, p4) if p1[1] == "?." else None
+        if kind == "punct" and value == "(" and callee and callee[0][0] == "ident":
+            name = callee[0][1]
+            member = callee[1][1] in (".", "?.")
+            owner = callee[2][1]
+            if name in _JS_EVAL_CALLS:
+                flags["has_eval"] = True
+            elif name in _JS_TIMERS:
+                expect = "timer"
+            elif name == "require" or (name == "import" and not member):
+                expect = "module"
+            elif member and name in ("binding", "dlopen") and owner == "process":
+                flags["has_subprocess"] = True
+        elif kind == "string" and p1[0] == "ident" and p2[1] not in (".", "?."):
+            # import x from 'mod' / export { x } from 'mod' / import 'mod'
+            if p1[1] in ("from", "import"):
+                add_import(value)
+
+        p4, p3, p2, p1 = p3, p2, p1, (kind, value)
+
+    return flags
+
+
+def analyze_for_framework(snippet: str, framework: str | None = None) -> dict:
+    """Analyze ``snippet`` with the analyzer for the framework's language."""
+    if framework and framework.lower() in JS_FRAMEWORKS:
+        return analyze_js_snippet(snippet)
+    return analyze_snippet(snippet)
+
+
+def is_risky(analysis: dict) -> bool:
+    """Return True if an analysis requires manual approval before integration."""
+    # consider risky if exec/eval/subprocess present or analysis did not finish;
+    # a dynamic import (require(name), import(expr), importlib, __import__)
+    # can load any of those modules under a name the analysis cannot see
+    return bool(
+        analysis.get("error")
+        or analysis.get("has_exec")
+        or analysis.get("has_eval")
+        or analysis.get("has_subprocess")
+        or analysis.get("has_importlib")
+        or analysis.get("has___import__")
+    )
+
+
+def _analyze(snippet: str, sandbox=None, framework: str | None = None) -> dict:
+    """Run the analyzer for ``framework`` in-process or in the sandbox pool.
+
+    A sandboxed analysis that fails or times out returns all-false flags plus
+    an ``error`` key, which process_snippet treats as risky.
+    """
+    if sandbox is None:
+        return analyze_for_framework(snippet, framework)
+    from .sandbox import SandboxError
+
+    try:
+        if framework and framework.lower() in JS_FRAMEWORKS:
+            return sandbox.analyze_js_snippet(snippet)
+        return sandbox.analyze_snippet(snippet)
+    except SandboxError as e:
+        return {
+            "has_exec": False,
+            "has_eval": False,
+            "has_subprocess": False,
+            "has_importlib": False,
+            "has___import__": False,
+            "imports": [],
+            "error": str(e),
+        }
+
+
+def backup_diff(project_dir, storage=None) -> str:
+    """Return a unified diff of every integrated file against its original.
+
+    The original is the first version in the project history; projects
+    generated before the history existed are diffed against llm_backup/.
+    """
+    import difflib
+
+    fs = storage or LOCAL
+    base = Path(project_dir)
+    tracked = history.read_index(base, storage=fs)
+    if tracked:
+        return "".join(
+            history.diff(base, rel, versions[0]["version"], storage=fs)
+            for rel, versions in sorted(tracked.items())
+            if versions and fs.is_file(base / rel)
+        )
+    backup_dir = base / "llm_backup"
+    if not fs.is_dir(backup_dir):
+        return ""
+    diffs = []
+    for b in fs.iterdir(backup_dir):
+        orig = base / b.name
+        if fs.exists(orig):
+            before = fs.read_text(b).splitlines(keepends=True)
+            after = fs.read_text(orig).splitlines(keepends=True)
+            ud = difflib.unified_diff(before, after, fromfile=str(b), tofile=str(orig))
+            diffs.extend(list(ud))
+    return "".join(diffs)
+
+
+def _write_log(project_dir, lines, storage=None):
     try:
         from datetime import datetime, timezone
 
-        p = Path(project_dir)
-        log = p / "llm_integration.log"
-        with log.open("a", encoding="utf-8") as f:
-            f.write("---\n")
-            f.write(datetime.now(timezone.utc).isoformat() + "Z\n")
-            for line in lines:
-                f.write(str(line) + "\n")
+        fs = storage or LOCAL
+        log = Path(project_dir) / "llm_integration.log"
+        text = "---\n" + datetime.now(timezone.utc).isoformat() + "Z\n"
+        text += "".join(str(line) + "\n" for line in lines)
+        fs.append_text(log, text)
     except Exception:
         pass
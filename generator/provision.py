@@ -0,0 +1,287 @@
+"""Provisionamento de ambientes Python para os projetos gerados.
+
+Em vez de cada projeto criar um venv e rodar `pip install` do zero, os
+pacotes vêm de um cache compartilhado:
+
+- `wheels/`: wheelhouse local. Com rede, `pip wheel` baixa/compila para cá
+  apenas o que falta; depois disso tudo funciona offline (`--offline`).
+- `envs/<chave>/`: um venv base por conjunto de requirements. A chave é o
+  hash dos requirements normalizados + versão/plataforma do Python, então
+  projetos com o mesmo `requirements.txt` compartilham o mesmo ambiente.
+
+O venv do projeto (`<projeto>/venv`) é criado sem pip, em segundos, e
+enxerga os pacotes do venv base por um arquivo `.pth` (camadas: o que for
+instalado depois no venv do projeto tem precedência) ou, com `link=True`,
+por hardlinks dos arquivos do base (ambiente independente sem ocupar espaço
+em disco). Os scripts do base (`gunicorn`, `flask`, ...) são copiados para o
+`bin/` do projeto apontando para o Python do projeto.
+
+O cache fica em `$GENERATOR_CACHE_DIR` ou `~/.cache/iaapp`.
+
+Uso:
+  python -m generator.cli provision generated/myapp [--offline] [--link]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:  # POSIX: serialize concurrent builds of the same base env (batch runs)
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+STATE_NAME = ".provision.json"
+PTH_NAME = "_iaapp_base.pth"
+COMPLETE_MARKER = ".complete"
+
+_BIN = "Scripts" if os.name == "nt" else "bin"
+_SKIP_SCRIPTS = re.compile(r"^(python\d*(\.\d+)?|pip\d*(\.\d+)?|activate.*|Activate.*|deactivate.*)(\.exe)?$")
+
+
+class ProvisionError(RuntimeError):
+    """Raised when an environment cannot be built (e.g. offline cache miss)."""
+
+
+def cache_dir() -> Path:
+    env = os.environ.get("GENERATOR_CACHE_DIR")
+    return Path(env) if env else Path.home() / ".cache" / "iaapp"
+
+
+def normalize_requirements(text: str) -> List[str]:
+    """Return the requirement lines without comments/blanks, sorted and lowercased."""
+    lines = set()
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            lines.add(re.sub(r"\s+", "", line).lower())
+    return sorted(lines)
+
+
+def requirements_key(requirements: List[str], python: str = sys.executable) -> str:
+    """Hash identifying a base environment: requirements + interpreter."""
+    tag = _output(
+        [python, "-c", "import sys, sysconfig; print(sys.version_info[:2], sysconfig.get_platform())"],
+        f"Consulta ao interpretador {python}",
+    )
+    payload = json.dumps({"python": tag, "machine": platform.machine(), "requirements": requirements})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _run(cmd: List[str], what: str) -> str:
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    if res.returncode != 0:
+        tail = (res.stderr or res.stdout).strip().splitlines()[-5:]
+        raise ProvisionError(f"{what} falhou: " + " | ".join(tail))
+    return res.stdout
+
+
+def _output(cmd: List[str], what: str) -> str:
+    """Stripped stdout of ``cmd``; a failure becomes a ProvisionError."""
+    try:
+        return _run(cmd, what).strip()
+    except OSError as e:
+        raise ProvisionError(f"{what} falhou: {e}") from e
+
+
+def _venv_python(env: Path) -> Path:
+    return env / _BIN / ("python.exe" if os.name == "nt" else "python")
+
+
+def _purelib(env: Path) -> Path:
+    out = _output(
+        [str(_venv_python(env)), "-c", "import sysconfig; print(sysconfig.get_paths()['purelib'])"],
+        f"Consulta ao venv {env}",
+    )
+    return Path(out)
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def ensure_base_env(
+    requirements: List[str],
+    cache: Optional[Path] = None,
+    offline: bool = False,
+    python: str = sys.executable,
+) -> Dict[str, Any]:
+    """Return the shared base env for ``requirements``, building it if needed.
+
+    Returns ``{"key", "path", "reused"}``. Raises ProvisionError if a
+    package is missing from the wheelhouse while ``offline``.
+    """
+    cache = Path(cache or cache_dir())
+    key = requirements_key(requirements, python)
+    env = cache / "envs" / key
+    wheels = cache / "wheels"
+    with _locked(cache / "envs" / f"{key}.lock"):
+        if (env / COMPLETE_MARKER).exists():
+            return {"key": key, "path": env, "reused": True}
+        if env.exists():
+            # left half-built by an interrupted run
+            shutil.rmtree(env)
+        wheels.mkdir(parents=True, exist_ok=True)
+        _run([python, "-m", "venv", str(env)], "Criação do venv base")
+        py = str(_venv_python(env))
+        if requirements:
+            req_file = env / "requirements.txt"
+            req_file.write_text("\n".join(requirements) + "\n", encoding="utf-8")
+            if not offline:
+                # fills the wheelhouse; wheels already there are not fetched again
+                _run(
+                    [py, "-m", "pip", "wheel", "-q", "--find-links", str(wheels),
+                     "-w", str(wheels), "-r", str(req_file)],
+                    "Download das wheels",
+                )
+            _run(
+                [py, "-m", "pip", "install", "-q", "--no-index", "--find-links", str(wheels),
+                 "-r", str(req_file)],
+                "Instalação a partir do cache" + (" (offline)" if offline else ""),
+            )
+        (env / COMPLETE_MARKER).write_text(time.strftime("%Y-%m-%dT%H:%M:%S"), encoding="utf-8")
+    return {"key": key, "path": env, "reused": False}
+
+
+def _link_tree(src: Path, dst: Path) -> int:
+    """Hardlink every file of ``src`` into ``dst`` (copying across devices)."""
+    count = 0
+    for dirpath, _, filenames in os.walk(src):
+        rel = Path(dirpath).relative_to(src)
+        if rel.parts and rel.parts[0] == "__pycache__":
+            continue
+        (dst / rel).mkdir(parents=True, exist_ok=True)
+        for fn in filenames:
+            target = dst / rel / fn
+            if target.exists():
+                continue
+            try:
+                os.link(Path(dirpath) / fn, target)
+            except OSError:
+                shutil.copy2(Path(dirpath) / fn, target)
+            count += 1
+    return count
+
+
+def _copy_scripts(base: Path, project_env: Path) -> List[str]:
+    """Copy the console scripts of ``base`` into ``project_env``, re-pointed."""
+    copied = []
+    new_python = str(_venv_python(project_env))
+    for script in sorted((base / _BIN).iterdir()):
+        if _SKIP_SCRIPTS.match(script.name) or not script.is_file():
+            continue
+        target = project_env / _BIN / script.name
+        data = script.read_bytes()
+        if data.startswith(b"#!"):
+            _, _, rest = data.partition(b"\n")
+            data = b"#!" + new_python.encode() + b"\n" + rest
+            target.write_bytes(data)
+            target.chmod(0o755)
+        else:
+            shutil.copy2(script, target)
+        copied.append(script.name)
+    return copied
+
+
+def provision(
+    project_dir: Path,
+    cache: Optional[Path] = None,
+    offline: bool = False,
+    link: bool = False,
+    python: str = sys.executable,
+) -> Dict[str, Any]:
+    """Create ``<project>/venv`` on top of the shared base env.
+
+    Returns the provisioning record, also written to ``.provision.json``.
+    """
+    t0 = time.perf_counter()
+    p = Path(project_dir)
+    req_path = p / "requirements.txt"
+    if not req_path.exists():
+        raise ProvisionError(f"{req_path} não encontrado (projeto Python?)")
+    requirements = normalize_requirements(req_path.read_text(encoding="utf-8"))
+    base = ensure_base_env(requirements, cache=cache, offline=offline, python=python)
+
+    venv_dir = p / "venv"
+    if venv_dir.exists():
+        shutil.rmtree(venv_dir)
+    _run([python, "-m", "venv", "--without-pip", str(venv_dir)], "Criação do venv do projeto")
+    base_lib = _purelib(base["path"])
+    project_lib = _purelib(venv_dir)
+    if link:
+        _link_tree(base_lib, project_lib)
+    else:
+        (project_lib / PTH_NAME).write_text(str(base_lib) + "\n", encoding="utf-8")
+    scripts = _copy_scripts(base["path"], venv_dir)
+
+    record = {
+        "key": base["key"],
+        "base_env": str(base["path"]),
+        "reused_base": base["reused"],
+        "mode": "link" if link else "pth",
+        "offline": offline,
+        "requirements": requirements,
+        "scripts": scripts,
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    (p / STATE_NAME).write_text(json.dumps(record, indent=2) + "\n", encoding="utf-8")
+    return record
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="generator.cli provision",
+        description="Criar o venv de um projeto gerado a partir do cache compartilhado",
+    )
+    p.add_argument("project", help="Pasta do projeto gerado")
+    p.add_argument("--offline", action="store_true", help="Usar só as wheels já em cache")
+    p.add_argument(
+        "--link", action="store_true", help="Hardlinks dos pacotes em vez de camada via .pth"
+    )
+    p.add_argument("--cache-dir", help="Diretório do cache (padrão: $GENERATOR_CACHE_DIR ou ~/.cache/iaapp)")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        record = provision(
+            Path(args.project),
+            cache=Path(args.cache_dir) if args.cache_dir else None,
+            offline=args.offline,
+            link=args.link,
+        )
+    except (ProvisionError, OSError) as e:
+        print(f"Provisionamento falhou: {e}")
+        return 1
+    origin = "reutilizado" if record["reused_base"] else "criado"
+    print(
+        f"venv pronto em {Path(args.project) / 'venv'} em {record['seconds']}s "
+        f"(ambiente base {record['key']} {origin})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
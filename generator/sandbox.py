@@ -0,0 +1,289 @@
+"""Pool de processos isolados para renderização de templates e análise de snippets.
+
+Templates e snippets vindos de LLM não são confiáveis: um template enorme ou
+malicioso pode travar o processo principal (UI ou batch). Este módulo mantém
+um pool de processos "quentes" que executam essas tarefas com limites de
+recursos (`resource.setrlimit`, quando disponível) e timeout por tarefa.
+Processos que estouram o timeout ou morrem são substituídos sem derrubar
+quem chamou.
+
+Uso:
+  from generator import sandbox
+  pool = sandbox.get_pool()
+  text = pool.render_text("Olá {{ name }}", {"name": "mundo"})
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_CPU_SECONDS = 10
+DEFAULT_MEMORY_BYTES = 512 * 1024 * 1024
+
+
+class SandboxError(RuntimeError):
+    """Raised when a sandboxed task fails, crashes or is killed."""
+
+
+class SandboxTimeout(SandboxError):
+    """Raised when a sandboxed task exceeds its wall-clock timeout."""
+
+
+# per-worker state: the sandboxed environment and the templates compiled for
+# a caller-supplied key (e.g. path and mtime), least recently used first
+_ENV: Any = None
+_COMPILED: "OrderedDict[Any, Any]" = OrderedDict()
+COMPILED_MAX = 512
+
+
+def _render_text(text: str, context: dict, key: Any = None) -> str:
+    global _ENV
+    try:
+        from jinja2.sandbox import SandboxedEnvironment
+    except ImportError:
+        # same behaviour as in-process rendering without Jinja2
+        return text
+
+    template = _COMPILED.get(key) if key is not None else None
+    if template is None:
+        if _ENV is None:
+            _ENV = SandboxedEnvironment()
+        template = _ENV.from_string(text)
+        if key is not None:
+            _COMPILED[key] = template
+            if len(_COMPILED) > COMPILED_MAX:
+                _COMPILED.popitem(last=False)
+    else:
+        _COMPILED.move_to_end(key)
+    return template.render(**context)
+
+
+def _analyze_snippet(snippet: str) -> dict:
+    from . import llm
+
+    return llm.analyze_snippet(snippet)
+
+
+def _analyze_js_snippet(snippet: str) -> dict:
+    from . import llm
+
+    return llm.analyze_js_snippet(snippet)
+
+
+TASKS: Dict[str, Callable[..., Any]] = {
+    "render_text": _render_text,
+    "analyze_snippet": _analyze_snippet,
+    "analyze_js_snippet": _analyze_js_snippet,
+}
+
+
+def _set_cpu_budget(cpu_seconds: Optional[int]) -> None:
+    """Allow ``cpu_seconds`` more CPU time from now on (soft RLIMIT_CPU).
+
+    RLIMIT_CPU counts the whole life of the process, so a reused worker moves
+    its soft limit forward before each task.
+    """
+    if not cpu_seconds:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    try:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = int(usage.ru_utime + usage.ru_stime) + 1
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = used + cpu_seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _set_memory_limit(memory_bytes: Optional[int]) -> None:
+    if not memory_bytes:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        soft = memory_bytes
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _worker_main(conn, cpu_seconds: Optional[int], memory_bytes: Optional[int]) -> None:
+    _set_memory_limit(memory_bytes)
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+        name, args, kwargs = msg
+        _set_cpu_budget(cpu_seconds)
+        try:
+            result = TASKS[name](*args, **kwargs)
+            conn.send(("ok", result))
+        except MemoryError:
+            conn.send(("error", "MemoryError: limite de memória excedido"))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx, cpu_seconds, memory_bytes) -> None:
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child, cpu_seconds, memory_bytes),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+            self.process.join(1)
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class SandboxPool:
+    """Warm pool of worker processes with resource limits and task timeouts."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        cpu_seconds: Optional[int] = DEFAULT_CPU_SECONDS,
+        memory_bytes: Optional[int] = DEFAULT_MEMORY_BYTES,
+    ) -> None:
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.cpu_seconds, self.memory_bytes)
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+        return self._spawn()
+
+    def call(self, name: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Run task ``name`` in a worker and return its result.
+
+        Raises SandboxTimeout if the task does not finish in time and
+        SandboxError if it fails or the worker dies; in both cases the worker
+        is replaced by a fresh one.
+        """
+        if self._closed:
+            raise SandboxError("pool encerrado")
+        if name not in TASKS:
+            raise SandboxError(f"tarefa desconhecida: {name}")
+        limit = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        try:
+            try:
+                worker.conn.send((name, args, kwargs))
+                if not worker.conn.poll(limit):
+                    worker = self._replace(worker)
+                    raise SandboxTimeout(f"{name} excedeu {limit}s")
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError, BrokenPipeError):
+                worker = self._replace(worker)
+                raise SandboxError(f"{name}: processo de trabalho terminou")
+        finally:
+            self._idle.put(worker)
+        if status != "ok":
+            raise SandboxError(payload)
+        return payload
+
+    def render_text(self, text: str, context: dict, timeout: Optional[float] = None, key: Any = None) -> str:
+        """Render ``text`` in a worker.
+
+        With a ``key`` that changes whenever ``text`` does (e.g. path and
+        mtime), each worker compiles the template once and reuses it.
+        """
+        return self.call("render_text", text, context, timeout=timeout, key=key)
+
+    def analyze_snippet(self, snippet: str, timeout: Optional[float] = None) -> dict:
+        return self.call("analyze_snippet", snippet, timeout=timeout)
+
+    def analyze_js_snippet(self, snippet: str, timeout: Optional[float] = None) -> dict:
+        return self.call("analyze_js_snippet", snippet, timeout=timeout)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers, self._all = self._all, []
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+            worker.process.join(0.5)
+            worker.kill()
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_POOL: Optional[SandboxPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool(**kwargs: Any) -> SandboxPool:
+    """Return the shared pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None or _POOL._closed:
+            _POOL = SandboxPool(**kwargs)
+        return _POOL
+
+
+def shutdown_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+            _POOL = None
+
+
+atexit.register(shutdown_pool)
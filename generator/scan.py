@@ -0,0 +1,258 @@
+"""Re-scan em massa dos snippets LLM já gravados nos projetos gerados.
+
+Quando as regras de `llm.analyze_snippet`/`llm.analyze_js_snippet` mudam,
+os arquivos já existentes em `generated/` (`llm_handlers.py`,
+`llm_handlers.js`, `llm_pending.txt`, `llm_generated.txt` e os módulos de
+`llm_snippets/`) precisam ser checados de novo. Este módulo percorre a árvore de saída, analisa cada
+arquivo num pool de processos (com o analisador da linguagem do projeto) e
+grava um relatório consolidado em JSON ou SARIF.
+
+Um cache (`.scan_cache.json` na raiz) guarda o hash do conteúdo e a versão
+das regras (`llm.RULESET_VERSION`) de cada arquivo: arquivos que não mudaram
+desde o último scan não são analisados de novo. O comando sai com código 1
+se algum arquivo for considerado arriscado.
+
+Uso:
+  python -m generator.cli scan generated --format sarif --report scan.sarif
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import llm
+
+CACHE_NAME = ".scan_cache.json"
+
+SCAN_NAMES = ("llm_handlers.py", "llm_handlers.js", "llm_pending.txt", "llm_generated.txt")
+
+SKIP_DIRS = {"node_modules", "venv", ".venv", "__pycache__", "llm_backup", "llm_history", ".git", ".blobs"}
+
+RULES = {
+    "has_exec": "Uso de exec()",
+    "has_eval": "Uso de eval()",
+    "has_subprocess": "Execução de processos (subprocess/os.system)",
+    "has_importlib": "Import dinâmico (importlib, require/import() não literal)",
+    "has___import__": "Import dinâmico via __import__",
+}
+
+
+def iter_targets(root: Path) -> Iterator[Path]:
+    """Yield every snippet file below ``root``."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")
+        )
+        in_registry = Path(dirpath).name == llm.SNIPPETS_DIR
+        for fn in sorted(filenames):
+            if fn in SCAN_NAMES or (in_registry and fn.endswith((".py", ".js"))):
+                yield Path(dirpath) / fn
+
+
+def language_of(path: Path) -> str:
+    """Return ``"js"`` or ``"python"``: the language of a snippet file.
+
+    ``.txt`` snippets take the language of their project, recognised by its
+    main file (``index.js``/``package.json`` vs. ``app.py``/``main.py``).
+    """
+    if path.suffix == ".js":
+        return "js"
+    if path.suffix == ".py":
+        return "python"
+    project = path.parent
+    if any((project / n).exists() for n in ("app.py", "main.py")):
+        return "python"
+    if any((project / n).exists() for n in ("index.js", "package.json")):
+        return "js"
+    return "python"
+
+
+def _scan_file(task: Tuple[str, Optional[str]]) -> Dict[str, Any]:
+    """Worker: hash a file and analyze it unless the hash matches the cache."""
+    path, cached_hash = task
+    try:
+        data = Path(path).read_bytes()
+    except OSError as e:
+        return {"path": path, "error": str(e)}
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == cached_hash:
+        return {"path": path, "sha256": digest, "cached": True}
+    language = language_of(Path(path))
+    text = data.decode("utf-8", errors="replace")
+    if language == "js":
+        analysis = llm.analyze_js_snippet(text)
+    else:
+        analysis = llm.analyze_snippet(text)
+    return {
+        "path": path,
+        "sha256": digest,
+        "cached": False,
+        "language": language,
+        "analysis": analysis,
+        "risky": llm.is_risky(analysis) and not llm.is_loader(text),
+    }
+
+
+def load_cache(root: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads((root / CACHE_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("ruleset") != llm.RULESET_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_cache(root: Path, files: Dict[str, Any]) -> None:
+    payload = {"ruleset": llm.RULESET_VERSION, "files": files}
+    tmp = root / (CACHE_NAME + ".tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, root / CACHE_NAME)
+
+
+def scan_tree(
+    root: Path, workers: Optional[int] = None, use_cache: bool = True
+) -> Dict[str, Any]:
+    """Scan every snippet file below ``root`` and return the consolidated report."""
+    root = Path(root).resolve()
+    cache = load_cache(root) if use_cache else {}
+    tasks = []
+    for path in iter_targets(root):
+        rel = path.relative_to(root).as_posix()
+        cached = cache.get(rel)
+        tasks.append((str(path), cached["sha256"] if cached else None))
+
+    results: List[Dict[str, Any]] = []
+    new_cache: Dict[str, Any] = {}
+    reused = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+            for res in pool.map(_scan_file, tasks, chunksize=chunk):
+                rel = Path(res["path"]).relative_to(root).as_posix()
+                if "error" in res:
+                    results.append({"path": rel, "error": res["error"]})
+                    continue
+                if res["cached"]:
+                    entry = cache[rel]
+                    reused += 1
+                else:
+                    entry = {
+                        "sha256": res["sha256"],
+                        "language": res["language"],
+                        "analysis": res["analysis"],
+                        "risky": res["risky"],
+                    }
+                new_cache[rel] = entry
+                results.append(dict(entry, path=rel))
+    if use_cache:
+        save_cache(root, new_cache)
+
+    return {
+        "root": str(root),
+        "ruleset": llm.RULESET_VERSION,
+        "files": results,
+        "summary": {
+            "files": len(results),
+            "risky": sum(1 for r in results if r.get("risky")),
+            "errors": sum(1 for r in results if "error" in r),
+            "cached": reused,
+            "analyzed": len(results) - reused,
+        },
+    }
+
+
+def to_sarif(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a scan report into a SARIF 2.1.0 log."""
+    results = []
+    for entry in report["files"]:
+        analysis = entry.get("analysis") or {}
+        for rule_id in RULES:
+            if analysis.get(rule_id):
+                level = "warning"
+                if rule_id in ("has_exec", "has_eval", "has_subprocess"):
+                    level = "error"
+                results.append(
+                    {
+                        "ruleId": rule_id,
+                        "level": level,
+                        "message": {"text": f"{RULES[rule_id]} em {entry['path']}"},
+                        "locations": [
+                            {
+                                "physicalLocation": {
+                                    "artifactLocation": {
+                                        "uri": entry["path"],
+                                        "uriBaseId": "ROOT",
+                                    }
+                                }
+                            }
+                        ],
+                        "partialFingerprints": {"sha256": entry["sha256"]},
+                    }
+                )
+    return {
+        "version": "2.1.0",
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "runs": [
+            {
+                "tool": {
+                    "driver": {
+                        "name": "iaapp-scan",
+                        "version": report["ruleset"],
+                        "rules": [
+                            {"id": rule_id, "shortDescription": {"text": text}}
+                            for rule_id, text in RULES.items()
+                        ],
+                    }
+                },
+                "originalUriBaseIds": {"ROOT": {"uri": Path(report["root"]).as_uri() + "/"}},
+                "results": results,
+            }
+        ],
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="generator.cli scan",
+        description="Re-analisar todos os snippets LLM dos projetos gerados",
+    )
+    p.add_argument("root", nargs="?", default="generated", help="Diretório de saída a varrer")
+    p.add_argument("--format", choices=("json", "sarif"), default="json")
+    p.add_argument("--report", "-r", help="Arquivo do relatório (padrão: stdout)")
+    p.add_argument("--workers", "-w", type=int, help="Número de processos")
+    p.add_argument(
+        "--no-cache", action="store_true", help="Ignorar o cache e analisar tudo de novo"
+    )
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"Diretório não encontrado: {root}")
+        return 1
+    report = scan_tree(root, workers=args.workers, use_cache=not args.no_cache)
+    payload = to_sarif(report) if args.format == "sarif" else report
+    text = json.dumps(payload, indent=2, ensure_ascii=False)
+    if args.report:
+        Path(args.report).write_text(text + "\n", encoding="utf-8")
+        s = report["summary"]
+        print(
+            f"{s['files']} arquivos ({s['analyzed']} analisados, {s['cached']} do cache), "
+            f"{s['risky']} arriscados. Relatório em {args.report}"
+        )
+    else:
+        print(text)
+    return 1 if report["summary"]["risky"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,299 @@
+"""Modo de produção para a UI do gerador.
+
+`python -m generator.ui` usa o servidor de desenvolvimento do Flask (um
+processo, reloader e debugger ligados). Este módulo serve a mesma app com
+vários processos e threads:
+
+- se o `gunicorn` estiver instalado, ele é usado (worker `gthread`);
+- senão, um servidor pre-fork da stdlib: o processo mestre abre o socket e
+  cria N workers, cada um atendendo requisições com um pool de threads.
+
+Nos dois casos há shutdown gracioso com SIGTERM (no servidor embutido também
+com SIGINT; no gunicorn SIGINT é o shutdown rápido): `/readyz` passa a
+responder 503, o worker para de aceitar conexões e as requisições em
+andamento terminam até `--graceful-timeout`. Há ainda os endpoints
+`/healthz` e `/readyz` e um `--timeout` por conexão: no servidor embutido é
+o timeout de inatividade do socket (cada leitura ou escrita, não a duração
+total da requisição); no gunicorn é o tempo máximo que um worker pode ficar
+sem responder ao mestre antes de ser reiniciado.
+
+Uso:
+  python -m generator.serve --host 0.0.0.0 --port 8000 --workers 4 --threads 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import BaseServer
+from typing import Any, Dict, List, Optional
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+
+def parse_args(argv=None):
+    cpu = os.cpu_count() or 1
+    p = argparse.ArgumentParser(description="Servir a UI do gerador em modo produção")
+    p.add_argument("--host", default=os.environ.get("GENERATOR_HOST", "127.0.0.1"))
+    p.add_argument(
+        "--port", type=int, default=int(os.environ.get("GENERATOR_PORT", "8000"))
+    )
+    p.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=int(os.environ.get("GENERATOR_WORKERS", str(cpu))),
+        help="Número de processos (padrão: número de CPUs)",
+    )
+    p.add_argument(
+        "--threads",
+        "-t",
+        type=int,
+        default=int(os.environ.get("GENERATOR_THREADS", "8")),
+        help="Threads por processo",
+    )
+    p.add_argument(
+        "--timeout",
+        type=float,
+        default=float(os.environ.get("GENERATOR_TIMEOUT", "60")),
+        help="Timeout de inatividade de cada conexão (por leitura/escrita), em segundos",
+    )
+    p.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=float(os.environ.get("GENERATOR_GRACEFUL_TIMEOUT", "30")),
+        help="Tempo máximo para terminar requisições em andamento no shutdown",
+    )
+    p.add_argument(
+        "--server",
+        choices=("auto", "gunicorn", "builtin"),
+        default="auto",
+        help="Servidor WSGI (auto: gunicorn se instalado, senão o pre-fork embutido)",
+    )
+    return p.parse_args(argv)
+
+
+def _load_app():
+    from .ui import app
+
+    return app
+
+
+def _mark_draining(app) -> None:
+    app.config["DRAINING"] = True
+
+
+# -- gunicorn ----------------------------------------------------------------
+
+
+def _gunicorn_post_worker_init(worker) -> None:
+    """Make gunicorn's graceful stop (SIGTERM) also fail ``/readyz``.
+
+    gunicorn installs its own handler, which only stops accepting
+    connections; this one marks the app as draining first.
+    """
+    app = _load_app()
+    handle_exit = worker.handle_exit
+
+    def drain(signum, frame) -> None:
+        _mark_draining(app)
+        handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, drain)
+
+
+def run_gunicorn(args) -> int:
+    from gunicorn.app.base import BaseApplication  # type: ignore
+
+    class _App(BaseApplication):
+        def __init__(self, options: Dict[str, Any]) -> None:
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return _load_app()
+
+    _App(
+        {
+            "bind": f"{args.host}:{args.port}",
+            "workers": args.workers,
+            "threads": args.threads,
+            "worker_class": "gthread",
+            "timeout": int(args.timeout),
+            "graceful_timeout": int(args.graceful_timeout),
+            "keepalive": 5,
+            "post_worker_init": _gunicorn_post_worker_init,
+        }
+    ).run()
+    return 0
+
+
+# -- builtin pre-fork server -------------------------------------------------
+
+
+class _Handler(WSGIRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        sys.stderr.write(f"[{os.getpid()}] {self.address_string()} - {format % args}\n")
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGIServer that hands each connection to a bounded thread pool."""
+
+    daemon_threads = True
+
+    def __init__(self, sock: socket.socket, app, threads: int, timeout: float) -> None:
+        BaseServer.__init__(self, sock.getsockname(), _Handler)
+        self.socket = sock
+        self.server_name = socket.getfqdn(sock.getsockname()[0])
+        self.server_port = sock.getsockname()[1]
+        self.setup_environ()
+        self.set_app(app)
+        self.request_timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+
+    def process_request(self, request, client_address) -> None:
+        request.settimeout(self.request_timeout)
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        # the listening socket belongs to the master; only drain the pool
+        self._pool.shutdown(wait=True)
+
+
+def _serve_worker(sock: socket.socket, args) -> None:
+    app = _load_app()
+    server = PooledWSGIServer(sock, app, args.threads, args.timeout)
+
+    def stop(signum, frame) -> None:
+        _mark_draining(app)
+        # shutdown() blocks until serve_forever returns: call it off-thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        server.server_close()
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    # every worker selects on this socket; the ones that lose the accept()
+    # race must not block
+    sock.setblocking(False)
+    return sock
+
+
+def run_builtin(args, sock: Optional[socket.socket] = None) -> int:
+    sock = sock or _bind(args.host, args.port)
+    print(
+        f"Servindo em http://{args.host}:{sock.getsockname()[1]} "
+        f"({args.workers} processos x {args.threads} threads)"
+    )
+    if not hasattr(os, "fork") or args.workers <= 1:
+        _serve_worker(sock, args)
+        return 0
+
+    children: List[int] = []
+    # a plain flag: taking a lock (threading.Event) inside a signal handler
+    # can deadlock the main thread
+    stopping = [False]
+
+    def spawn() -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _serve_worker(sock, args)
+            except Exception as e:
+                print(f"Worker {os.getpid()} falhou: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        return pid
+
+    def stop(signum, frame) -> None:
+        stopping[0] = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    children.extend(spawn() for _ in range(args.workers))
+
+    # supervise: respawn crashed workers until asked to stop
+    while not stopping[0]:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.2)
+            continue
+        if pid in children:
+            children.remove(pid)
+            if not stopping[0]:
+                children.append(spawn())
+
+    deadline = time.monotonic() + args.graceful_timeout
+    while children and time.monotonic() < deadline:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            children.remove(pid)
+        else:
+            time.sleep(0.1)
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    sock.close()
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    server = args.server
+    if server == "auto":
+        try:
+            import gunicorn  # type: ignore  # noqa: F401
+
+            server = "gunicorn"
+        except ImportError:
+            server = "builtin"
+    if server == "gunicorn":
+        return run_gunicorn(args)
+    return run_builtin(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+"""Backends de armazenamento usados pelo gerador.
+
+`LocalStorage` lê e grava no disco (via pathlib) e é o padrão em todo o
+gerador. `MemoryStorage` mantém os arquivos num dicionário em memória, o que
+permite rodar o pipeline inteiro (renderizar → analisar → integrar → diff)
+sem tocar o disco — útil para previews na UI e para testes — e depois gravar
+o resultado de uma vez com `commit()`.
+
+Os caminhos continuam sendo `Path` comuns: o backend só decide onde os bytes
+ficam. Arquivos com mais de um hardlink (os blobs compartilhados de
+`generator.blobstore`) nunca são alterados no lugar: a gravação substitui o
+link por uma cópia própria do projeto.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterator, List, Optional, Set, Union
+
+PathLike = Union[str, Path, PurePosixPath]
+
+
+def _is_shared(p: Path) -> bool:
+    try:
+        return p.stat().st_nlink > 1
+    except OSError:
+        return False
+
+
+class LocalStorage:
+    """Storage backend backed by the real filesystem."""
+
+    def exists(self, path: PathLike) -> bool:
+        return Path(path).exists()
+
+    def is_file(self, path: PathLike) -> bool:
+        return Path(path).is_file()
+
+    def is_dir(self, path: PathLike) -> bool:
+        return Path(path).is_dir()
+
+    def mkdir(self, path: PathLike) -> None:
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+    def read_bytes(self, path: PathLike) -> bytes:
+        return Path(path).read_bytes()
+
+    def read_text(self, path: PathLike) -> str:
+        return self.read_bytes(path).decode("utf-8")
+
+    def write_bytes(self, path: PathLike, data: bytes) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        if _is_shared(p):
+            # writing in place would change every project linked to the blob
+            p.unlink()
+        p.write_bytes(data)
+
+    def write_text(self, path: PathLike, text: str) -> None:
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def append_text(self, path: PathLike, text: str) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        if _is_shared(p):
+            data = p.read_bytes()
+            p.unlink()
+            p.write_bytes(data)
+        with p.open("a", encoding="utf-8") as f:
+            f.write(text)
+
+    def unlink(self, path: PathLike) -> None:
+        Path(path).unlink()
+
+    def iterdir(self, path: PathLike) -> List[Path]:
+        return sorted(Path(path).iterdir())
+
+    def walk_files(self, root: PathLike) -> Iterator[Path]:
+        """Yield every file below ``root``."""
+        for p in sorted(Path(root).rglob("*")):
+            if p.is_file():
+                yield p
+
+
+class MemoryStorage(LocalStorage):
+    """Storage backend that keeps every file in memory.
+
+    Reads fall through to ``base`` (if given) for files not written in
+    memory, so a project on disk can be previewed without being modified.
+    """
+
+    def __init__(self, base: Optional[LocalStorage] = None) -> None:
+        self.files: Dict[str, bytes] = {}
+        self._dirs: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self.base = base
+
+    @staticmethod
+    def _key(path: PathLike) -> str:
+        return Path(path).as_posix()
+
+    def _in_base(self, key: str, check: str) -> bool:
+        if self.base is None or key in self._deleted:
+            return False
+        return bool(getattr(self.base, check)(key))
+
+    def exists(self, path: PathLike) -> bool:
+        return self.is_file(path) or self.is_dir(path)
+
+    def is_file(self, path: PathLike) -> bool:
+        key = self._key(path)
+        return key in self.files or self._in_base(key, "is_file")
+
+    def is_dir(self, path: PathLike) -> bool:
+        key = self._key(path)
+        if key in self._dirs:
+            return True
+        prefix = key.rstrip("/") + "/"
+        if any(k.startswith(prefix) for k in self.files):
+            return True
+        return self._in_base(key, "is_dir")
+
+    def mkdir(self, path: PathLike) -> None:
+        self._dirs.add(self._key(path))
+
+    def read_bytes(self, path: PathLike) -> bytes:
+        key = self._key(path)
+        if key in self.files:
+            return self.files[key]
+        if self._in_base(key, "is_file"):
+            return self.base.read_bytes(key)  # type: ignore[union-attr]
+        raise FileNotFoundError(key)
+
+    def write_bytes(self, path: PathLike, data: bytes) -> None:
+        key = self._key(path)
+        self.files[key] = bytes(data)
+        self._deleted.discard(key)
+
+    def append_text(self, path: PathLike, text: str) -> None:
+        old = self.read_bytes(path) if self.is_file(path) else b""
+        self.write_bytes(path, old + text.encode("utf-8"))
+
+    def unlink(self, path: PathLike) -> None:
+        key = self._key(path)
+        if not self.is_file(key):
+            raise FileNotFoundError(key)
+        self.files.pop(key, None)
+        self._deleted.add(key)
+
+    def iterdir(self, path: PathLike) -> List[Path]:
+        key = self._key(path).rstrip("/")
+        children: Set[str] = set()
+        for k in list(self.files) + list(self._dirs):
+            if k.startswith(key + "/"):
+                children.add(key + "/" + k[len(key) + 1:].split("/", 1)[0])
+        if self._in_base(key, "is_dir"):
+            for p in self.base.iterdir(key):  # type: ignore[union-attr]
+                if p.as_posix() not in self._deleted:
+                    children.add(p.as_posix())
+        return sorted(Path(c) for c in children)
+
+    def walk_files(self, root: PathLike) -> Iterator[Path]:
+        key = self._key(root).rstrip("/")
+        found = {k for k in self.files if k.startswith(key + "/")}
+        if self._in_base(key, "is_dir"):
+            for p in self.base.walk_files(key):  # type: ignore[union-attr]
+                if p.as_posix() not in self._deleted:
+                    found.add(p.as_posix())
+        for k in sorted(found):
+            yield Path(k)
+
+    def commit(self, target: Optional[LocalStorage] = None) -> int:
+        """Write every in-memory change to ``target`` (the disk by default).
+
+        Deleted files are removed from the target too. Returns the number of
+        files written.
+        """
+        target = target or LocalStorage()
+        for d in sorted(self._dirs):
+            target.mkdir(d)
+        for key, data in sorted(self.files.items()):
+            target.write_bytes(key, data)
+        for key in sorted(self._deleted):
+            if target.is_file(key):
+                target.unlink(key)
+        return len(self.files)
+
+
+LOCAL = LocalStorage()
@@ -0,0 +1,336 @@
+"""Cache de templates com recarga automática para processos de longa duração.
+
+`TemplateCache` guarda, por arquivo de template, os bytes lidos do disco e o
+template Jinja2 já compilado. `TemplateWatcher` observa `generator/templates/`
+com inotify (Linux) ou, se indisponível, com polling de mtime, e invalida só
+as entradas afetadas por uma edição, recompilando-as em segundo plano.
+
+Sem watcher ativo o cache confere o mtime de cada arquivo a cada uso, então
+nunca serve conteúdo velho; com watcher esse `stat` é evitado.
+
+Com um sandbox (`generator.sandbox`), cada processo do pool guarda sua cópia
+compilada do template, identificada pelo caminho e pelo mtime do arquivo.
+
+Uso (UI):
+  cache = TemplateCache()
+  cache.watch()
+  files = cache.render_tree(TEMPLATES_DIR / "flask_full", context)
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+
+@dataclass
+class _Entry:
+    data: bytes
+    mtime_ns: int
+    template: Any = None  # compiled Jinja2 template, or None for binary files
+
+
+def _compile(data: bytes) -> Any:
+    try:
+        from jinja2 import Template
+    except Exception:
+        return None
+    try:
+        return Template(data.decode("utf-8"))
+    except Exception:
+        return None
+
+
+class TemplateCache:
+    """Per-file cache of template bytes and compiled Jinja2 templates."""
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        if root is None:
+            from .generate import TEMPLATES_DIR
+
+            root = TEMPLATES_DIR
+        self.root = Path(root).resolve()
+        self._entries: Dict[Path, _Entry] = {}
+        # bumped by `invalidate`: a load started before it must not be stored
+        self._versions: Dict[Path, int] = {}
+        self._listings: Dict[Path, List[Path]] = {}
+        self._lock = threading.RLock()
+        self.watcher: Optional["TemplateWatcher"] = None
+
+    @property
+    def watching(self) -> bool:
+        return self.watcher is not None and self.watcher.is_alive()
+
+    def _load(self, path: Path) -> _Entry:
+        st = path.stat()
+        data = path.read_bytes()
+        return _Entry(data, st.st_mtime_ns, _compile(data))
+
+    def _store(self, path: Path, entry: _Entry, version: int) -> _Entry:
+        """Cache ``entry`` unless a fresher one won the race; return the winner.
+
+        Must be called with the lock held. ``version`` is the value of
+        ``self._versions`` seen before ``entry`` was loaded.
+        """
+        current = self._entries.get(path)
+        if self._versions.get(path, 0) != version:
+            # invalidated while loading: what we read may predate the edit
+            return current if current is not None else entry
+        if current is not None and current.mtime_ns > entry.mtime_ns:
+            return current
+        self._entries[path] = entry
+        return entry
+
+    def get(self, path: Path) -> _Entry:
+        path = Path(path).resolve()
+        with self._lock:
+            entry = self._entries.get(path)
+            version = self._versions.get(path, 0)
+        if entry is not None and not self.watching:
+            # no watcher: make sure the file did not change since it was cached
+            try:
+                if path.stat().st_mtime_ns != entry.mtime_ns:
+                    entry = None
+            except FileNotFoundError:
+                entry = None
+        if entry is None:
+            entry = self._load(path)
+            with self._lock:
+                entry = self._store(path, entry, version)
+        return entry
+
+    def listing(self, template_dir: Path) -> List[Path]:
+        template_dir = Path(template_dir).resolve()
+        with self._lock:
+            files = self._listings.get(template_dir)
+        if files is None or not self.watching:
+            files = [p for p in sorted(template_dir.rglob("*")) if p.is_file()]
+            with self._lock:
+                self._listings[template_dir] = files
+        return files
+
+    def render_tree(
+        self, src: Path, context: dict | None = None, sandbox: Any = None
+    ) -> Iterator[Tuple[PurePosixPath, bytes]]:
+        """Cached equivalent of ``generate.render_tree``."""
+        src = Path(src).resolve()
+        for path in self.listing(src):
+            rel = PurePosixPath(path.relative_to(src).as_posix())
+            try:
+                entry = self.get(path)
+            except FileNotFoundError:
+                continue
+            data = entry.data
+            if context and sandbox is not None and entry.template is not None:
+                from .sandbox import SandboxError
+
+                try:
+                    # the workers keep their own compiled copy under this key
+                    key = (str(path), entry.mtime_ns, len(data))
+                    data = sandbox.render_text(data.decode("utf-8"), context, key=key).encode("utf-8")
+                except SandboxError as e:
+                    print(f"Renderização de {rel} falhou no sandbox: {e}")
+            elif context and entry.template is not None:
+                try:
+                    data = entry.template.render(**context).encode("utf-8")
+                except Exception:
+                    # fallback: keep the raw template
+                    pass
+            yield rel, data
+
+    def invalidate(self, path: Path, recompile: bool = True) -> None:
+        """Drop the cached entry for ``path`` (a file or a directory).
+
+        Listings are dropped only for the template directories that contain
+        ``path``. If ``recompile`` is true and the file still exists, it is
+        loaded and compiled again right away.
+        """
+        path = Path(path).resolve()
+        with self._lock:
+            # an edit to a known file keeps the listings; anything else
+            # (created, removed or renamed paths, directories) refreshes them
+            structural = not (path in self._entries and path.is_file())
+            stale = [p for p in self._entries if p == path or path in p.parents]
+            for p in stale:
+                del self._entries[p]
+            for p in stale or [path]:
+                self._versions[p] = self._versions.get(p, 0) + 1
+            versions = {p: self._versions[p] for p in stale or [path]}
+            if structural:
+                for d in list(self._listings):
+                    if d == path or d in path.parents or path in d.parents:
+                        del self._listings[d]
+        if recompile:
+            for p in stale or [path]:
+                if p.is_file():
+                    try:
+                        entry = self._load(p)
+                    except OSError:
+                        continue
+                    with self._lock:
+                        self._store(p, entry, versions[p])
+
+    def clear(self) -> None:
+        with self._lock:
+            for p in self._entries:
+                self._versions[p] = self._versions.get(p, 0) + 1
+            self._entries.clear()
+            self._listings.clear()
+
+    def watch(self, interval: float = 0.5) -> "TemplateWatcher":
+        """Start (once) a background watcher that keeps the cache fresh."""
+        with self._lock:
+            if not self.watching:
+                self.clear()
+                self.watcher = TemplateWatcher(self.root, self.invalidate, interval)
+                self.watcher.start()
+            return self.watcher  # type: ignore[return-value]
+
+    def stop(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+
+class TemplateWatcher(threading.Thread):
+    """Calls ``on_change(path)`` for every file created, changed or removed
+    below ``root``. Uses inotify when available and mtime polling otherwise.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        on_change: Callable[[Path], None],
+        interval: float = 0.5,
+        use_inotify: bool = True,
+    ) -> None:
+        super().__init__(name="template-watcher", daemon=True)
+        self.root = Path(root)
+        self.on_change = on_change
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._libc: Any = None
+        self.backend = "polling"
+        if use_inotify and os.name == "posix":
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+                if hasattr(libc, "inotify_init1"):
+                    self._libc = libc
+                    self.backend = "inotify"
+            except OSError:
+                self._libc = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join(2)
+
+    def _notify(self, path: Path) -> None:
+        try:
+            self.on_change(path)
+        except Exception as e:
+            print(f"Falha ao recarregar template {path}: {e}")
+
+    def run(self) -> None:
+        if self._libc is not None:
+            try:
+                self._run_inotify()
+                return
+            except OSError:
+                self.backend = "polling"
+        self._run_polling()
+
+    # -- polling -------------------------------------------------------------
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        snap: Dict[Path, Tuple[int, int]] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for fn in filenames:
+                p = Path(dirpath) / fn
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                snap[p] = (st.st_mtime_ns, st.st_size)
+        return snap
+
+    def _run_polling(self) -> None:
+        previous = self._snapshot()
+        while not self._stop_event.wait(self.interval):
+            current = self._snapshot()
+            for p in set(previous) | set(current):
+                if previous.get(p) != current.get(p):
+                    self._notify(p)
+            previous = current
+
+    # -- inotify -------------------------------------------------------------
+
+    def _run_inotify(self) -> None:
+        libc = self._libc
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        watches: Dict[int, Path] = {}
+
+        def add_watch(directory: Path) -> None:
+            for dirpath, _, _ in os.walk(directory):
+                wd = libc.inotify_add_watch(fd, os.fsencode(dirpath), _WATCH_MASK)
+                if wd >= 0:
+                    watches[wd] = Path(dirpath)
+
+        try:
+            add_watch(self.root)
+            if not watches:
+                raise OSError(ctypes.get_errno(), "inotify_add_watch")
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], self.interval)
+                if not ready:
+                    continue
+                try:
+                    buf = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset + _EVENT.size <= len(buf):
+                    wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+                    offset += _EVENT.size
+                    raw = buf[offset:offset + length].rstrip(b"\0")
+                    offset += length
+                    base = watches.get(wd)
+                    if base is None:
+                        continue
+                    path = base / os.fsdecode(raw) if raw else base
+                    if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                        add_watch(path)
+                    self._notify(path)
+        finally:
+            os.close(fd)
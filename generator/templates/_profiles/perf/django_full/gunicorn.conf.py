@@ -0,0 +1,30 @@
+"""Configuração do gunicorn para {{ project_name }} (perfil perf).
+
+Todos os valores podem ser ajustados por variáveis de ambiente.
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8000')}"
+
+# sync code: (2 x CPUs) + 1 processes, each with a few threads for I/O waits
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "4"))
+
+# keep client connections open between requests (behind a proxy, keep this
+# above the proxy's idle timeout)
+keepalive = int(os.environ.get("KEEPALIVE", "5"))
+timeout = int(os.environ.get("TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+
+# recycle workers now and then to contain slow memory leaks
+max_requests = int(os.environ.get("MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+accesslog = "-"
+
+# run from the project folder: gunicorn -c gunicorn.conf.py
+wsgi_app = "project.wsgi:application"
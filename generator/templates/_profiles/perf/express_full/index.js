@@ -0,0 +1,87 @@
+const cluster = require('cluster');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const express = require('express');
+const compression = require('compression');
+
+const port = process.env.PORT || 3000;
+const workers = Number(process.env.WEB_CONCURRENCY) || os.cpus().length;
+const keepAlive = (Number(process.env.KEEPALIVE) || 5) * 1000;
+
+const app = express();
+app.disable('x-powered-by');
+// gzip for text responses
+app.use(compression());
+
+const publicDir = path.join(__dirname, 'public');
+// names with a content hash (style.3f2a9c1b.css) never change: cache for a year
+const fingerprinted = /\.[0-9a-f]{8}\.\w+(\.gz|\.br)?$/;
+
+// serve the .br/.gz siblings written by the generator (--assets), if any
+app.use((req, res, next) => {
+  if (req.method !== 'GET' && req.method !== 'HEAD') return next();
+  const file = path.join(publicDir, path.normalize(req.path));
+  if (!file.startsWith(publicDir + path.sep)) return next();
+  const accepted = req.headers['accept-encoding'] || '';
+  for (const [encoding, ext] of [['br', '.br'], ['gzip', '.gz']]) {
+    if (accepted.includes(encoding) && fs.existsSync(file + ext)) {
+      res.type(path.extname(file));
+      res.set({ 'Content-Encoding': encoding, Vary: 'Accept-Encoding' });
+      req.url = req.path + ext + req.url.slice(req.path.length);
+      break;
+    }
+  }
+  next();
+});
+
+// static files: browsers and proxies may reuse them for STATIC_MAX_AGE seconds
+app.use(express.static(publicDir, {
+  maxAge: (Number(process.env.STATIC_MAX_AGE) || 86400) * 1000,
+  etag: true,
+  setHeaders: (res, filePath) => {
+    if (fingerprinted.test(filePath)) {
+      res.set('Cache-Control', 'public, max-age=31536000, immutable');
+    }
+  },
+}));
+
+app.get('/', (req, res) => {
+  res.sendFile(__dirname + '/public/index.html');
+});
+
+function startPrimary() {
+  let stopping = false;
+  for (let i = 0; i < workers; i++) cluster.fork();
+  // replace workers that crash
+  cluster.on('exit', (worker, code) => {
+    if (!stopping) {
+      console.log(`Worker ${worker.process.pid} saiu (${code}); iniciando outro`);
+      cluster.fork();
+    }
+  });
+  const stop = () => {
+    stopping = true;
+    for (const id in cluster.workers) cluster.workers[id].process.kill('SIGTERM');
+  };
+  process.on('SIGTERM', stop);
+  process.on('SIGINT', stop);
+  console.log(`App iniciado na porta ${port} (${workers} processos)`);
+}
+
+function startWorker() {
+  const server = app.listen(port);
+  // keep client connections open between requests; must stay above the
+  // idle timeout of a proxy in front of the app
+  server.keepAliveTimeout = keepAlive;
+  server.headersTimeout = keepAlive + 1000;
+  process.on('SIGTERM', () => server.close(() => process.exit(0)));
+}
+
+if (cluster.isPrimary && workers > 1) {
+  startPrimary();
+} else {
+  // listen on the next tick, so routes added further down this file (e.g.
+  // llm_handlers) are registered first
+  setImmediate(startWorker);
+}
@@ -0,0 +1,69 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse
+
+app = FastAPI()
+# compress text responses larger than 1 KB
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", "86400"))
+# names with a content hash (style.3f2a9c1b.css) never change: cache for a year
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{8}\.\w+$")
+
+if STATIC_DIR.is_dir():
+    from fastapi.staticfiles import StaticFiles
+
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+
+
+def _precompressed(request: Request):
+    # the .br/.gz siblings written by the generator (--assets), if any
+    rel = request.url.path[len("/static/"):]
+    accepted = request.headers.get("accept-encoding", "")
+    for encoding, ext in (("br", ".br"), ("gzip", ".gz")):
+        path = (STATIC_DIR / (rel + ext)).resolve()
+        if encoding in accepted and STATIC_DIR in path.parents and path.is_file():
+            return FileResponse(
+                path,
+                media_type=mimetypes.guess_type(rel)[0],
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+    return None
+
+
+@app.middleware("http")
+async def static_cache_headers(request: Request, call_next):
+    if not request.url.path.startswith("/static/"):
+        return await call_next(request)
+    response = _precompressed(request) or await call_next(request)
+    if response.status_code == 200:
+        if FINGERPRINTED.search(request.url.path):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers.setdefault("Cache-Control", f"public, max-age={STATIC_MAX_AGE}")
+    return response
+
+
+@app.get("/")
+async def root():
+    return {"message": "Hello from {{ project_name }}"}
+
+
+if __name__ == "__main__":
+    # single host without gunicorn: uvicorn with one process per CPU
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "8000")),
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        timeout_keep_alive=int(os.environ.get("KEEPALIVE", "5")),
+        access_log=False,
+    )
@@ -0,0 +1,58 @@
+import mimetypes
+import os
+import re
+
+from flask import Flask, render_template, request, send_from_directory
+from werkzeug.security import safe_join
+
+app = Flask(__name__)
+# static files: browsers and proxies may reuse them for STATIC_MAX_AGE seconds
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = int(os.environ.get("STATIC_MAX_AGE", "86400"))
+# names with a content hash (style.3f2a9c1b.css) never change: cache for a year
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{8}\.\w+$")
+
+try:
+    from flask_compress import Compress
+
+    # gzip/brotli for text responses (HTML, CSS, JS, JSON)
+    Compress(app)
+except ImportError:
+    pass
+
+
+@app.before_request
+def precompressed_static():
+    # serve the .br/.gz siblings written by the generator (--assets), if any
+    prefix = app.static_url_path + "/"
+    if not request.path.startswith(prefix):
+        return None
+    rel = request.path[len(prefix):]
+    accepted = request.headers.get("Accept-Encoding", "")
+    for encoding, ext in (("br", ".br"), ("gzip", ".gz")):
+        path = safe_join(app.static_folder, rel + ext)
+        if encoding in accepted and path and os.path.isfile(path):
+            response = send_from_directory(
+                app.static_folder, rel + ext, mimetype=mimetypes.guess_type(rel)[0]
+            )
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+    return None
+
+
+@app.after_request
+def immutable_assets(response):
+    if FINGERPRINTED.search(request.path) and response.status_code == 200:
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+@app.route("/")
+def index():
+    return render_template("index.html")
+
+
+if __name__ == "__main__":
+    # development fallback only: in production run
+    #   gunicorn -c gunicorn.conf.py app:app
+    app.run(host="127.0.0.1", port=int(os.environ.get("PORT", "5000")))
@@ -11,17 +11,32 @@ Observação: requer Flask (já instalado no venv do workspace).
 
 from __future__ import annotations
 
-import difflib
 import os
+import re
 from pathlib import Path
 
-from flask import Flask, redirect, render_template_string, request, url_for
+from flask import Flask, Response, redirect, render_template_string, request, url_for
 
+from . import history
 from . import llm as llm_module
-from .generate import create_project
+from . import sandbox
+from .archive import iter_archive
+from .generate import FRAMEWORKS, MODES, PROFILES, TEMPLATES_DIR, create_project, project_files, with_manifest
+from .storage import LOCAL, MemoryStorage
+from .template_cache import TemplateCache
 
 app = Flask(__name__)
 
+# templates are cached for the life of the process; the watcher started on
+# first use keeps the cache in sync with edits under generator/templates/
+TEMPLATE_CACHE = TemplateCache()
+
+
+def _templates() -> TemplateCache:
+    TEMPLATE_CACHE.watch()
+    return TEMPLATE_CACHE
+
+
 INDEX_HTML = """<!doctype html>
 <title>AI App Generator</title>
 <h1>Gerador de Apps</h1>
@@ -36,9 +51,18 @@ INDEX_HTML = """<!doctype html>
     <label>Framework:
         <select name="framework">
             <option value="flask">flask</option>
+            <option value="fastapi">fastapi</option>
+            <option value="django">django</option>
             <option value="express">express</option>
         </select>
     </label><br>
+    <label>Perfil (modo full):
+        <select name="profile">
+            <option value="dev">dev</option>
+            <option value="perf">perf (produção)</option>
+        </select>
+    </label><br>
+  <label>Otimizar assets (minificar, hash no nome, .gz/.br): <input type="checkbox" name="assets" value="1"></label><br>
   <label>Usar LLM para gerar um snippet (experimental): <input type="checkbox" name="use_llm" value="1"></label><br>
   <label>Preview only (não integrar): <input type="checkbox" name="dry_run" value="1"></label><br>
     <label>Prompt para LLM (se usado):<br>
@@ -46,6 +70,9 @@ INDEX_HTML = """<!doctype html>
             placeholder="Ex: Gere uma rota /hello que retorna JSON"></textarea></label><br>
   <button type="submit">Gerar</button>
 </form>
+<p>Para baixar sem gravar no servidor:
+  <code>/download/&lt;nome&gt;.zip?mode=full&amp;framework=flask&amp;profile=perf</code>
+  (ou <code>.tar.gz</code>).</p>
 {% if project_path %}
   <p>Projeto gerado em: {{ project_path }}</p>
   <p>Abra a pasta gerada no seu explorador de arquivos.</p>
@@ -54,6 +81,10 @@ INDEX_HTML = """<!doctype html>
   <h3>LLM output</h3>
   <pre>{{ llm_output }}</pre>
 {% endif %}
+{% if preview_diff %}
+  <h3>Preview da integração (em memória, nada foi gravado)</h3>
+  <pre>{{ preview_diff }}</pre>
+{% endif %}
 """
 
 REVIEWS_HTML = """<!doctype html>
@@ -82,6 +113,26 @@ REVIEW_DETAIL_HTML = """<!doctype html>
 {% else %}
   <p>Nenhum output LLM encontrado.</p>
 {% endif %}
+{% for rel, versions in versions.items() %}
+  <h2>Histórico - {{ rel }}</h2>
+  <form method="get">
+    <input type="hidden" name="file" value="{{ rel }}">
+    Diff da versão <input name="a" size="3" value="{{ versions[0].version }}">
+    para <input name="b" size="3" placeholder="atual">
+    <button type="submit">Comparar</button>
+  </form>
+  <ul>
+  {% for v in versions %}
+    <li>v{{ v.version }} - {{ v.time }} - {{ v.message }}
+      <form method="post" action="/reviews/{{ project }}/rollback" style="display:inline">
+        <input type="hidden" name="file" value="{{ rel }}">
+        <input type="hidden" name="version" value="{{ v.version }}">
+        <button type="submit">Restaurar</button>
+      </form>
+    </li>
+  {% endfor %}
+  </ul>
+{% endfor %}
 {% if diff %}
   <h2>Diff</h2>
   <pre>{{ diff }}</pre>
@@ -94,19 +145,41 @@ REVIEW_DETAIL_HTML = """<!doctype html>
 def index():
     project_path = None
     llm_output = None
+    preview_diff = None
 
     if request.method == "POST":
         name = request.form.get("name")
         mode = request.form.get("mode", "minimal")
         framework = request.form.get("framework", "flask")
+        if mode not in MODES or framework not in FRAMEWORKS:
+            return "Modo ou framework inválido", 400
+        profile = request.form.get("profile", "dev")
+        if profile not in PROFILES:
+            profile = "dev"
+        assets = bool(request.form.get("assets"))
         use_llm = bool(request.form.get("use_llm"))
         dry_run = bool(request.form.get("dry_run"))
         prompt = request.form.get("prompt", "").strip()
 
         target = Path.cwd() / "generated"
         target.mkdir(exist_ok=True)
-        project_dir = create_project(name, target, mode=mode, framework=framework)
-        project_path = str(project_dir)
+        pool = sandbox.get_pool()
+        # preview: the whole pipeline runs in memory on top of the disk, and
+        # nothing is written to `generated/`
+        fs = MemoryStorage(base=LOCAL) if dry_run else LOCAL
+        project_dir = create_project(
+            name,
+            target,
+            mode=mode,
+            framework=framework,
+            sandbox=pool,
+            storage=fs,
+            cache=_templates(),
+            profile=profile,
+            assets=assets,
+        )
+        if not dry_run:
+            project_path = str(project_dir)
 
         if use_llm:
             # call the LLM module (it will return an informative message if not configured)
@@ -119,27 +192,28 @@ def index():
 
             # save output to a file inside the project for inspection
             try:
-                (project_dir / "llm_generated.txt").write_text(result)
+                fs.write_text(project_dir / "llm_generated.txt", result)
             except Exception:
                 pass
 
-            # integrate only if not dry_run
             integrated = False
-            if not dry_run:
-                try:
-                    integrated = llm_module.integrate_snippet(
-                        project_dir, framework, result
-                    )
-                    if integrated:
-                        result = (
-                            result + "\n\n[LLM snippet integrated into project files]"
-                        )
-                except Exception:
-                    integrated = False
+            try:
+                integrated = llm_module.integrate_snippet(
+                    project_dir, framework, result, sandbox=pool, storage=fs
+                )
+                if integrated and not dry_run:
+                    result = result + "\n\n[LLM snippet integrated into project files]"
+            except Exception:
+                integrated = False
+            if integrated and dry_run:
+                preview_diff = llm_module.backup_diff(project_dir, storage=fs)
             llm_output = result
 
     return render_template_string(
-        INDEX_HTML, project_path=project_path, llm_output=llm_output
+        INDEX_HTML,
+        project_path=project_path,
+        llm_output=llm_output,
+        preview_diff=preview_diff,
     )
 
 
@@ -149,7 +223,8 @@ def reviews():
     projects = []
     if base.exists():
         for p in base.iterdir():
-            if p.is_dir():
+            # hidden folders (e.g. the .blobs dedup store) are not projects
+            if p.is_dir() and not p.name.startswith("."):
                 projects.append(p.name)
     return render_template_string(REVIEWS_HTML, projects=projects)
 
@@ -159,6 +234,7 @@ def review_detail(project):
     base = Path.cwd() / "generated" / project
     llm_text = None
     diff_text = None
+    versions = {}
     if base.exists():
         llm_file = base / "llm_generated.txt"
         if llm_file.exists():
@@ -167,26 +243,47 @@ def review_detail(project):
         pending_file = base / "llm_pending.txt"
         if pending_file.exists():
             llm_text = pending_file.read_text()
-        # attempt to find backups and show diffs
-        backup_dir = base / "llm_backup"
-        if backup_dir.exists():
-            diffs = []
-            for b in backup_dir.iterdir():
-                orig = base / b.name
-                if orig.exists():
-                    before = b.read_text().splitlines(keepends=True)
-                    after = orig.read_text().splitlines(keepends=True)
-                    ud = difflib.unified_diff(
-                        before, after, fromfile=str(b), tofile=str(orig)
-                    )
-                    diffs.extend(list(ud))
-            if diffs:
-                diff_text = "".join(diffs)
+        versions = history.read_index(base)
+        rel = request.args.get("file")
+        if rel in versions and request.args.get("a", "").isdigit():
+            # diff between any two recorded versions (b empty: the current file)
+            b = request.args.get("b", "")
+            try:
+                diff_text = history.diff(
+                    base, rel, int(request.args["a"]), int(b) if b.isdigit() else None
+                )
+            except (history.HistoryError, OSError) as e:
+                diff_text = str(e)
+        else:
+            # default: every integrated file against its original
+            diff_text = llm_module.backup_diff(base) or None
     return render_template_string(
-        REVIEW_DETAIL_HTML, project=project, llm=llm_text, diff=diff_text
+        REVIEW_DETAIL_HTML, project=project, llm=llm_text, diff=diff_text, versions=versions
     )
 
 
+@app.route("/reviews/<project>/rollback", methods=["POST"])
+def review_rollback(project):
+    base = Path.cwd() / "generated" / project
+    # require token if configured
+    token = os.environ.get("GENAUTH_TOKEN")
+    if token:
+        form_token = request.form.get("auth_token")
+        if not form_token or form_token != token:
+            return "Unauthorized", 401
+    rel = request.form.get("file", "")
+    version = request.form.get("version", "")
+    if rel in history.read_index(base) and version.isdigit():
+        try:
+            new = history.rollback(base, rel, int(version))
+            llm_module._write_log(  # type: ignore
+                base, [f"Rolled back {rel} to v{version} via UI (now v{new})"]
+            )
+        except (history.HistoryError, OSError):
+            pass
+    return redirect(url_for("review_detail", project=project))
+
+
 @app.route("/reviews/<project>/approve", methods=["POST"])
 def review_approve(project):
     base = Path.cwd() / "generated" / project
@@ -198,7 +295,9 @@ def review_approve(project):
             return "Unauthorized", 401
     # attempt to approve pending
     try:
-        ok = llm_module.approve_pending(base, _detect_framework(base))
+        ok = llm_module.approve_pending(
+            base, _detect_framework(base), sandbox=sandbox.get_pool()
+        )
         if ok:
             return redirect(url_for("review_detail", project=project))
     except Exception:
@@ -225,6 +324,73 @@ def review_dismiss(project):
     return redirect(url_for("review_detail", project=project))
 
 
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+_ARCHIVE_MIMETYPES = {"zip": "application/zip", "tar.gz": "application/gzip"}
+
+
+@app.route("/download/<name>.zip")
+def download_zip(name):
+    return _download(name, "zip")
+
+
+@app.route("/download/<name>.tar.gz")
+def download_tar_gz(name):
+    return _download(name, "tar.gz")
+
+
+def _download(name: str, fmt: str):
+    """Stream a freshly rendered project as an archive, with no temp directory."""
+    if not _SAFE_NAME.match(name):
+        return "Nome inválido", 400
+    mode = request.args.get("mode", "minimal")
+    if mode not in MODES:
+        return "Modo inválido", 400
+    framework = request.args.get("framework", "flask")
+    if framework not in FRAMEWORKS:
+        return "Framework inválido", 400
+    profile = request.args.get("profile", "dev")
+    if profile not in PROFILES:
+        return "Perfil inválido", 400
+    files = project_files(
+        name,
+        mode=mode,
+        framework=framework,
+        author=request.args.get("author"),
+        license=request.args.get("license"),
+        description=request.args.get("description"),
+        sandbox=sandbox.get_pool(),
+        cache=_templates(),
+        profile=profile,
+        assets=request.args.get("assets") == "1",
+    )
+    if files is None:
+        return "Template não encontrado", 404
+    return Response(
+        iter_archive(with_manifest(files), fmt=fmt, root=name),
+        mimetype=_ARCHIVE_MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@app.route("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@app.route("/readyz")
+def readyz():
+    # generator.serve sets DRAINING on graceful shutdown
+    if app.config.get("DRAINING"):
+        return {"status": "draining"}, 503
+    checks = {
+        "templates": TEMPLATES_DIR.is_dir(),
+        "output_writable": os.access(Path.cwd(), os.W_OK),
+    }
+    ok = all(checks.values())
+    return {"status": "ready" if ok else "not ready", "checks": checks}, 200 if ok else 503
+
+
 def _detect_framework(project_path: Path) -> str:
     # naive detection by file presence
     p = Path(project_path)
@@ -239,7 +405,7 @@ def _detect_framework(project_path: Path) -> str:
 
 
 def main() -> int:
-    # roda a UI em debug local
+    # roda a UI em debug local (para produção use `python -m generator.serve`)
     app.run(debug=True)
     return 0
 
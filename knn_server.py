@@ -0,0 +1,369 @@
+"""Servidor HTTP de predição para o classificador k-NN de `app.py`.
+
+Chamar `KNNModel.predict` uma vez por requisição desperdiça a vetorização:
+aqui as requisições concorrentes entram numa fila e um único worker as junta
+em micro-lotes (até `--max-batch` pontos ou `--max-wait-ms` depois da
+primeira), calcula as distâncias do lote de uma vez e devolve a cada
+requisição a sua parte.
+
+Endpoints:
+  POST /predict   {"features": [..]} ou {"instances": [[..], ..]}
+  GET  /metrics   requisições, lotes, tamanho médio do lote, latência p50/p95/p99
+  GET  /healthz
+
+Uso:
+  python knn_server.py --model knn.model --port 8080 --max-batch 64 --max-wait-ms 2
+  python knn_server.py --model knn.model --bench   # micro-lotes x uma predição por requisição
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import app
+
+Rows = List[List[float]]
+# larger POST bodies are refused with 413 before anything is read
+MAX_BODY_BYTES = 1 << 20
+
+
+class MicroBatcher:
+    """Groups concurrent prediction calls into batches for ``predict_fn``."""
+
+    def __init__(
+        self,
+        predict_fn: Callable[[Rows], Sequence[int]],
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        self.predict_fn = predict_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_batch = on_batch
+        self._queue: "queue.Queue[Optional[Tuple[Rows, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: Rows) -> "Future[List[int]]":
+        fut: "Future[List[int]]" = Future()
+        self._queue.put((rows, fut))
+        return fut
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: Tuple[Rows, Future]) -> Tuple[List[Tuple[Rows, Future]], bool]:
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            size += len(item[0])
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            rows = [row for item_rows, _ in batch for row in item_rows]
+            try:
+                preds = list(self.predict_fn(rows))
+            except Exception as e:  # a bad batch must not kill the worker
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            if self.on_batch:
+                self.on_batch(len(rows))
+            start = 0
+            for item_rows, fut in batch:
+                fut.set_result(preds[start:start + len(item_rows)])
+                start += len(item_rows)
+
+
+class Metrics:
+    """Thread-safe request/batch counters and a window of recent latencies."""
+
+    def __init__(self, window: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.started = time.perf_counter()
+        self.requests = self.rows = self.errors = self.batches = self.batched_rows = 0
+
+    def request(self, seconds: float, rows: int, ok: bool = True) -> None:
+        with self._lock:
+            self.requests += 1
+            self.rows += rows
+            self.errors += 0 if ok else 1
+            self._latencies.append(seconds)
+
+    def batch(self, rows: int) -> None:
+        with self._lock:
+            self.batches += 1
+            self.batched_rows += rows
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self._latencies)
+            elapsed = time.perf_counter() - self.started
+            out: Dict[str, Any] = {
+                "requests": self.requests,
+                "rows": self.rows,
+                "errors": self.errors,
+                "batches": self.batches,
+                "mean_batch": round(self.batched_rows / self.batches, 2) if self.batches else 0.0,
+                "requests_per_second": round(self.requests / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+        for q in (50, 95, 99):
+            out[f"p{q}_ms"] = round(percentile(lat, q) * 1000, 3) if lat else None
+        return out
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    idx = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(idx, len(sorted_values) - 1)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # headers and body are separate writes: without TCP_NODELAY each response
+    # waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    server: "PredictionServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: Dict[str, Any], close: bool = False) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            # the request body was not read, so the connection cannot be reused
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send(200, self.server.metrics.snapshot())
+        elif self.path == "/healthz":
+            self._send(200, {"status": "ok", "points": len(self.server.model)})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {"error": "not found"})
+            return
+        t0 = time.perf_counter()
+        rows: Rows = []
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            self.server.metrics.request(time.perf_counter() - t0, 0, ok=False)
+            if length < 0:
+                self._send(400, {"error": "Content-Length inválido"}, close=True)
+            else:
+                self._send(413, {"error": f"corpo maior que {MAX_BODY_BYTES} bytes"}, close=True)
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            single = "features" in payload
+            rows = [payload["features"]] if single else payload["instances"]
+            rows = [[float(v) for v in row] for row in rows]
+            d = self.server.model.n_features
+            if not rows or any(len(row) != d for row in rows):
+                raise ValueError(f"cada ponto precisa de {d} valores")
+        except (ValueError, KeyError, TypeError) as e:
+            self.server.metrics.request(time.perf_counter() - t0, 0, ok=False)
+            self._send(400, {"error": str(e)})
+            return
+        try:
+            preds = self.server.predict(rows)
+        except Exception as e:
+            self.server.metrics.request(time.perf_counter() - t0, 0, ok=False)
+            self._send(500, {"error": str(e)})
+            return
+        labels = self.server.model.labels
+        result: Dict[str, Any]
+        if single:
+            result = {"class": preds[0], "label": labels[preds[0]]}
+        else:
+            result = {"classes": preds, "labels": [labels[p] for p in preds]}
+        self.server.metrics.request(time.perf_counter() - t0, len(rows))
+        self._send(200, result)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """HTTP server for a ``KNNModel``; ``max_batch=0`` disables batching."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, model: "app.KNNModel", max_batch: int = 64, max_wait_ms: float = 2.0):
+        super().__init__(address, _Handler)
+        self.model = model
+        self.metrics = Metrics()
+        self.batcher: Optional[MicroBatcher] = None
+        if max_batch > 0:
+            self.batcher = MicroBatcher(
+                self._predict_ints, max_batch, max_wait_ms, on_batch=self.metrics.batch
+            )
+
+    def _predict_ints(self, rows: Rows) -> List[int]:
+        return [int(p) for p in self.model.predict(rows)]
+
+    def predict(self, rows: Rows) -> List[int]:
+        if self.batcher is None:
+            self.metrics.batch(len(rows))
+            return self._predict_ints(rows)
+        return self.batcher.submit(rows).result()
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+def start_server(model, host: str = "127.0.0.1", port: int = 0, **kwargs) -> PredictionServer:
+    """Start a ``PredictionServer`` in a background thread (port 0: any free port)."""
+    server = PredictionServer((host, port), model, **kwargs)
+    threading.Thread(target=server.serve_forever, name="knn-http", daemon=True).start()
+    return server
+
+
+def run_load(
+    host: str, port: int, points: Rows, requests: int = 2000, concurrency: int = 32
+) -> Dict[str, Any]:
+    """Send ``requests`` single-point POSTs from ``concurrency`` keep-alive clients."""
+    latencies: List[float] = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client() -> None:
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        local = []
+        for i in counter:
+            body = json.dumps({"features": points[i % len(points)]})
+            t0 = time.perf_counter()
+            conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            conn.getresponse().read()
+            local.append(time.perf_counter() - t0)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def bench(
+    model, points: Rows, requests: int = 2000, concurrency: int = 32, max_batch: int = 64, max_wait_ms: float = 2.0
+) -> Dict[str, Dict[str, Any]]:
+    """Compare micro-batching with one ``predict`` call per request."""
+    results = {}
+    for name, batch in (("per_request", 0), ("micro_batch", max_batch)):
+        server = start_server(model, max_batch=batch, max_wait_ms=max_wait_ms)
+        try:
+            stats = run_load(*server.server_address[:2], points, requests, concurrency)
+            stats["mean_batch"] = server.metrics.snapshot()["mean_batch"]
+            results[name] = stats
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def _load_model(args) -> "app.KNNModel":
+    if args.model:
+        return app.KNNModel.load(args.model, engine=args.engine)
+    X, y, labels = app.generate_synthetic_data(n_per_class=args.n_per_class, seed=42)
+    return app.KNNModel(k=5, engine=args.engine).fit(X, y, labels)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Servidor HTTP de predição k-NN com micro-lotes")
+    p.add_argument("--model", help="Modelo salvo por `app.py --save-model` (padrão: treina o exemplo)")
+    p.add_argument("--n-per-class", type=int, default=2000, help="Sem --model: pontos sintéticos por classe")
+    p.add_argument("--engine", choices=("auto", "python", "numpy"), default="auto")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--max-batch", type=int, default=64, help="Pontos por lote (0 desliga os lotes)")
+    p.add_argument("--max-wait-ms", type=float, default=2.0, help="Espera máxima para completar um lote")
+    p.add_argument("--bench", action="store_true", help="Comparar micro-lotes com uma predição por requisição")
+    p.add_argument("--requests", type=int, default=2000, help="Com --bench: total de requisições")
+    p.add_argument("--concurrency", type=int, default=32, help="Com --bench: clientes simultâneos")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        model = _load_model(args)
+    except (OSError, ValueError) as e:
+        print(f"Não foi possível carregar o modelo: {e}")
+        return 1
+    if args.bench:
+        points, _, _ = app.generate_synthetic_data(n_per_class=100, seed=7)
+        results = bench(model, points, args.requests, args.concurrency, args.max_batch, args.max_wait_ms)
+        for name, r in results.items():
+            print(
+                f"{name:12} {r['requests_per_second']:>9} req/s  p50 {r['p50_ms']} ms  "
+                f"p99 {r['p99_ms']} ms  lote médio {r['mean_batch']}"
+            )
+        return 0
+    server = PredictionServer((args.host, args.port), model, args.max_batch, args.max_wait_ms)
+    print(f"Servindo {len(model)} pontos em http://{args.host}:{server.server_address[1]} (Ctrl+C para sair)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import app
+
+
+def _data(n=600, d=32):
+    X, y = app.clustered_data(n + 40, d, n_classes=12, seed=4)
+    return X[40:], y[40:], X[:40]
+
+
+def _recall(approx, truth):
+    return sum(len(set(a) & set(b)) for a, b in zip(approx, truth)) / sum(len(t) for t in truth)
+
+
+class TestLSH(unittest.TestCase):
+    def test_python_lsh_recall_and_persistence(self):
+        X, y, Q = _data()
+        exact = app.KNNModel(k=5, engine="python").fit(X, y)
+        lsh = app.KNNModel(k=5, engine="python", index="lsh", index_params={"n_bits": 8}).fit(X, y)
+        truth = exact.kneighbors(Q)
+        approx = lsh.kneighbors(Q)
+        self.assertGreaterEqual(_recall(approx, truth), 0.9)
+        self.assertEqual(exact.predict(Q), [app.knn_predict(X, y, q, k=5) for q in Q])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "lsh.model"
+            lsh.save(path)
+            loaded = app.KNNModel.load(path, engine="python")
+            self.assertEqual(loaded.index.params(), lsh.index.params())
+            self.assertEqual(loaded.kneighbors(Q), approx)
+            self.assertEqual(loaded.predict(Q), lsh.predict(Q))
+
+    def test_too_few_candidates_falls_back_to_exact(self):
+        X, y, Q = _data(n=60, d=8)
+        params = {"n_tables": 1, "n_bits": 30, "n_probe": 0}
+        lsh = app.KNNModel(k=5, engine="python", index="lsh", index_params=params).fit(X, y)
+        exact = app.KNNModel(k=5, engine="python").fit(X, y)
+        self.assertEqual(lsh.kneighbors(Q), exact.kneighbors(Q))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            app.KNNModel(index="tree")
+        with self.assertRaises(ValueError):
+            app.LSHIndex(n_bits=63)
+
+    def test_benchmark_reports_recall_and_speedup(self):
+        result = app.ann_benchmark(n=400, n_features=16, n_queries=20, k=5, engine="python")
+        self.assertGreater(result["recall_at_k"], 0.5)
+        self.assertIn("speedup", result)
+
+
+@unittest.skipIf(app.np is None, "numpy não instalado")
+class TestLSHNumpy(unittest.TestCase):
+    def test_numpy_lsh_matches_saved_index_across_engines(self):
+        X, y, Q = _data()
+        exact = app.KNNModel(k=5, engine="numpy").fit(X, y)
+        lsh = app.KNNModel(k=5, engine="numpy", index="lsh", index_params={"n_bits": 8}).fit(X, y)
+        approx = lsh.kneighbors(Q)
+        self.assertGreaterEqual(_recall(approx, exact.kneighbors(Q)), 0.9)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "lsh.model"
+            lsh.save(path)
+            self.assertEqual(app.KNNModel.load(path, engine="numpy").kneighbors(Q), approx)
+            from_python = app.KNNModel.load(path, engine="python")
+            self.assertGreaterEqual(_recall(from_python.kneighbors(Q), approx), 0.95)
+
+    def test_exact_fallback_is_thread_safe(self):
+        # poucos candidatos por consulta: quase todas caem na busca exata
+        X, y, Q = _data(n=300, d=8)
+        params = {"n_tables": 1, "n_bits": 30, "n_probe": 0}
+        writes = []
+
+        class Watched(app.KNNModel):
+            def __setattr__(self, name, value):
+                writes.append(name)
+                super().__setattr__(name, value)
+
+        lsh = Watched(k=5, engine="numpy", index="lsh", index_params=params).fit(X, y)
+        index = lsh.index
+        expected = lsh.predict(Q)
+        writes.clear()
+        errors, results = [], []
+        start = threading.Barrier(8)
+
+        def worker():
+            try:
+                start.wait()
+                for q in Q * 5:
+                    results.append(lsh.predict([q])[0] == expected[Q.index(q)])
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # troca de thread o mais cedo possível
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 8 * 5 * len(Q))
+        self.assertTrue(all(results))
+        self.assertIs(lsh.index, index)
+        self.assertEqual(writes, [])  # leitura não altera o modelo
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import app
+
+ENGINES = ["python"] + (["numpy"] if app.np is not None else [])
+
+
+class TestCrossValidator(unittest.TestCase):
+    def test_matches_evaluate_on_every_fold(self):
+        X, y = app.clustered_data(240, 5, n_classes=4, spread=3.0, seed=6)
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                cv = app.CrossValidator(X, y, folds=4, max_k=7, seed=3, engine=engine)
+                self.assertEqual(sorted(cv.fold.count(f) for f in range(4)), [60, 60, 60, 60])
+                for k in (1, 4, 7):
+                    expected = []
+                    for f in range(4):
+                        train = [i for i in range(len(X)) if cv.fold[i] != f]
+                        test = [i for i in range(len(X)) if cv.fold[i] == f]
+                        expected.append(
+                            app.evaluate(
+                                [X[i] for i in train], [y[i] for i in train],
+                                [X[i] for i in test], [y[i] for i in test], k=k,
+                            )
+                        )
+                    self.assertEqual(cv.fold_scores(k), expected)
+
+    def test_score_summary_and_limits(self):
+        X, y, _ = app.generate_synthetic_data(n_per_class=10, seed=1)
+        cv = app.CrossValidator(X, y, folds=3, max_k=50, engine="python")
+        self.assertEqual(cv.max_k, 20)
+        r = cv.score(3)
+        self.assertEqual(len(r["folds"]), 3)
+        self.assertAlmostEqual(r["mean"], sum(r["folds"]) / 3, places=3)
+        self.assertGreaterEqual(r["std"], 0.0)
+        with self.assertRaises(ValueError):
+            cv.score(21)
+        with self.assertRaises(ValueError):
+            app.CrossValidator(X, y, folds=1)
+
+    @unittest.skipIf(app.np is None, "numpy não instalado")
+    def test_engines_agree_with_small_blocks(self):
+        X, y = app.clustered_data(300, 3, n_classes=3, spread=4.0, seed=2)
+        old = app._BLOCK_ELEMENTS
+        app._BLOCK_ELEMENTS = 1000  # força vários blocos de linhas
+        try:
+            fast = app.CrossValidator(X, y, folds=5, max_k=9, engine="numpy")
+        finally:
+            app._BLOCK_ELEMENTS = old
+        slow = app.CrossValidator(X, y, folds=5, max_k=9, engine="python")
+        self.assertEqual(fast.neighbors.tolist(), slow.neighbors)
+        self.assertEqual(fast.score(5), slow.score(5))
+
+
+class TestCrossValidationCLI(unittest.TestCase):
+    def test_invalid_arguments_exit_with_a_message(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "small.model"
+            X, y, labels = app.generate_synthetic_data(n_per_class=4, seed=1)
+            app.KNNModel(k=3, engine="python").fit(X, y, labels).save(path)
+            cases = {
+                ("--cv", "3", "--model", str(Path(tmp) / "missing.model")): "Não foi possível carregar",
+                ("--cv", "3", "--model", str(path), "--cv-k", "1,9"): "no máximo até 8",
+                ("--cv", "3", "--cv-k", "1,x"): "--cv-k inválido",
+                ("--cv", "3", "--cv-k", "0"): "--cv-k inválido",
+                ("--cv", "1",): "folds precisa estar",
+            }
+            for argv, message in cases.items():
+                with self.subTest(argv=argv):
+                    err, out = io.StringIO(), io.StringIO()
+                    with contextlib.redirect_stderr(err), contextlib.redirect_stdout(out):
+                        self.assertEqual(app.main(list(argv)), 1)
+                    self.assertIn(message, err.getvalue())
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                self.assertEqual(app.main(["--cv", "3", "--model", str(path), "--cv-k", "1,8"]), 0)
+            self.assertIn("k=8:", out.getvalue())
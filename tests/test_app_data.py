@@ -0,0 +1,74 @@
+import random
+import tempfile
+import unittest
+from array import array
+from pathlib import Path
+
+import app
+
+
+def _collect(engine, workers, chunk_size=700, n=3000):
+    X, y = [], []
+    for start, Xc, yc in app.iter_synthetic(
+        n, n_features=6, n_classes=4, seed=9, chunk_size=chunk_size, workers=workers, engine=engine
+    ):
+        assert start == len(y)
+        X.extend(float(v) for v in (Xc.ravel() if hasattr(Xc, "ravel") else Xc))
+        y.extend(int(v) for v in yc)
+    return X, y
+
+
+class TestSyntheticData(unittest.TestCase):
+    def test_small_dataset_unchanged_and_no_global_state(self):
+        random.seed(123)
+        expected = random.random()
+        random.seed(123)
+        X, y, labels = app.generate_synthetic_data(n_per_class=5, seed=42)
+        app.train_test_split(X, y, seed=7)
+        self.assertEqual(random.random(), expected)
+        self.assertEqual(len(X), 15)
+        self.assertEqual(y, [0] * 5 + [1] * 5 + [2] * 5)
+        for row, label in zip(X, y):
+            for v, c in zip(row, app.IRIS_CENTROIDS[label]):
+                self.assertLessEqual(abs(v - c), 0.6)
+
+    def test_python_chunks_independent_of_workers(self):
+        X, y = _collect("python", workers=1)
+        self.assertEqual(_collect("python", workers=2), (X, y))
+        self.assertEqual(y[:6], [0, 1, 2, 3, 0, 1])
+        self.assertEqual(len(X), 3000 * 6)
+
+    @unittest.skipIf(app.np is None, "numpy não instalado")
+    def test_numpy_chunks_independent_of_workers_and_fill(self):
+        X, y = _collect("numpy", workers=1)
+        self.assertEqual(_collect("numpy", workers=3), (X, y))
+        X_out = app.np.empty((3000, 6))
+        y_out = app.np.empty(3000, dtype=app.np.int32)
+        app.fill_synthetic(X_out, y_out, n_classes=4, seed=9, chunk_size=700, workers=2)
+        self.assertEqual(X_out.ravel().tolist(), X)
+        self.assertEqual(y_out.tolist(), y)
+
+    def test_fill_flat_buffers(self):
+        X_out = array("d", bytes(8 * 500 * 3))
+        y_out = array("i", bytes(4 * 500))
+        app.fill_synthetic(X_out, y_out, n_classes=3, seed=1, chunk_size=128)
+        X, y = [], []
+        for _, Xc, yc in app.iter_synthetic(500, 3, 3, seed=1, chunk_size=128, engine="python"):
+            X.extend(Xc)
+            y.extend(yc)
+        self.assertEqual(list(X_out), X)
+        self.assertEqual(list(y_out), y)
+
+    def test_write_synthetic_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "synthetic.model"
+            app.write_synthetic_model(path, 2000, n_features=4, n_classes=3, seed=5, chunk_size=512, workers=2, k=3)
+            model = app.KNNModel.load(path)
+            self.assertEqual(len(model), 2000)
+            self.assertEqual((model.k, model.n_features), (3, 4))
+            self.assertEqual(model.labels, ["class_0", "class_1", "class_2"])
+            self.assertEqual(model.predict(app.IRIS_CENTROIDS), [0, 1, 2])
+
+            app.main(["--generate", "1000", "--save-model", str(path), "--dims", "5", "--classes", "4"])
+            model = app.KNNModel.load(path, engine="python")
+            self.assertEqual((len(model), model.n_features, len(model.labels)), (1000, 5, 4))
@@ -0,0 +1,110 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import app
+
+ENGINES = ["python"] + (["numpy"] if app.np is not None else [])
+
+
+def _data(n=400, d=6):
+    X, y = app.clustered_data(n + 30, d, n_classes=5, spread=2.0, seed=3)
+    return X[30:], y[30:], X[:30]
+
+
+class TestPartialFit(unittest.TestCase):
+    def test_partial_fit_matches_full_fit(self):
+        X, y, Q = _data()
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                full = app.KNNModel(k=5, engine=engine).fit(X, y)
+                model = app.KNNModel(k=5, engine=engine).fit(X[:100], y[:100])
+                for i in range(100, len(X), 37):
+                    model.partial_fit(X[i:i + 37], y[i:i + 37])
+                self.assertEqual(len(model), len(X))
+                self.assertEqual(model.kneighbors(Q), full.kneighbors(Q))
+                self.assertEqual(model.predict(Q), full.predict(Q))
+
+    @unittest.skipIf(app.np is None, "numpy não instalado")
+    def test_numpy_growth_is_amortized(self):
+        X, y, _ = _data(n=3000)
+        model = app.KNNModel(k=3, engine="numpy").fit(X[:1], y[:1])
+        buffers = set()
+        for i in range(1, len(X)):
+            model.partial_fit([X[i]], [y[i]])
+            buffers.add(id(model._X_buf))
+        self.assertLessEqual(len(buffers), 3)
+        self.assertEqual(model.X.tolist(), X)
+
+    def test_new_classes_get_labels(self):
+        model = app.KNNModel(k=1, engine="python").fit([[0.0, 0.0]], [0], ["a"])
+        model.partial_fit([[5.0, 5.0]], [2])
+        self.assertEqual(model.labels, ["a", "class_1", "class_2"])
+        self.assertEqual(model.predict([[4.0, 4.0]]), [2])
+        with self.assertRaises(ValueError):
+            model.partial_fit([[1.0]], [0])
+
+
+class TestRemove(unittest.TestCase):
+    def test_removed_points_are_ignored_then_compacted(self):
+        X, y, Q = _data()
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                model = app.KNNModel(k=5, engine=engine).fit(X, y)
+                gone = set(range(0, len(X), 9))
+                self.assertEqual(model.remove(gone), len(gone))
+                self.assertEqual(len(model), len(X) - len(gone))
+                kept = [i for i in range(len(X)) if i not in gone]
+                fresh = app.KNNModel(k=5, engine=engine).fit([X[i] for i in kept], [y[i] for i in kept])
+                # still tombstones: the original numbering is kept
+                self.assertEqual(model.kneighbors(Q), [[kept[j] for j in nb] for nb in fresh.kneighbors(Q)])
+                self.assertEqual(model.predict(Q), fresh.predict(Q))
+
+                model.remove(range(1, len(X), 3))
+                self.assertEqual(model._removed, set())
+                kept = [i for i in kept if i % 3 != 1]
+                fresh = app.KNNModel(k=5, engine=engine).fit([X[i] for i in kept], [y[i] for i in kept])
+                self.assertEqual(model.kneighbors(Q), fresh.kneighbors(Q))
+                with self.assertRaises(IndexError):
+                    model.remove([len(X)])
+
+    def test_save_compacts_and_loaded_model_can_grow(self):
+        X, y, Q = _data()
+        for engine in ENGINES:
+            with self.subTest(engine=engine), tempfile.TemporaryDirectory() as tmp:
+                path = Path(tmp) / "inc.model"
+                model = app.KNNModel(k=5, engine=engine).fit(X[:300], y[:300])
+                model.remove([0, 1, 2])
+                model.save(path)
+                loaded = app.KNNModel.load(path, engine=engine)
+                self.assertEqual(len(loaded), 297)
+                loaded.partial_fit(X[300:], y[300:])
+                fresh = app.KNNModel(k=5, engine=engine).fit(X[3:], y[3:])
+                self.assertEqual(loaded.kneighbors(Q), fresh.kneighbors(Q))
+
+
+class TestIncrementalLSH(unittest.TestCase):
+    def test_delta_buffer_merge_and_remove(self):
+        X, y = app.clustered_data(2430, 16, n_classes=24, seed=8)
+        Q, X, y = X[:30], X[30:], y[30:]
+        params = {"n_tables": 8, "n_bits": 8}
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                model = app.KNNModel(k=5, engine=engine, index="lsh", index_params=params).fit(X[:800], y[:800])
+                model.partial_fit(X[800:1000], y[800:1000])
+                self.assertEqual(len(model.index.delta_ids), 200)
+                self.assertEqual(model.index.n, 800)
+
+                exact = app.KNNModel(k=5, engine=engine).fit(X[:1000], y[:1000])
+                truth, approx = exact.kneighbors(Q), model.kneighbors(Q)
+                hits = sum(len(set(a) & set(b)) for a, b in zip(approx, truth))
+                self.assertGreaterEqual(hits / (5 * len(Q)), 0.9)
+
+                model.partial_fit(X[1000:], y[1000:])
+                self.assertEqual((model.index.n, model.index.delta_ids), (len(X), []))
+                model.remove(range(0, len(X), 5))
+                self.assertTrue(all(i % 5 for nb in model.kneighbors(Q) for i in nb))
+                model.remove(range(1, 400, 2))
+                self.assertEqual(model.index.n, len(model))
+                for t in range(model.index.n_tables):
+                    self.assertEqual(sorted(model.index.order[t]), list(range(len(model))))
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import app
+
+
+def _data():
+    X, y, labels = app.generate_synthetic_data(n_per_class=30, seed=3)
+    return app.train_test_split(X, y, test_size=0.3, seed=5) + (labels,)
+
+
+class TestKNNModel(unittest.TestCase):
+    def test_python_engine_matches_knn_predict(self):
+        X_train, X_test, y_train, y_test, labels = _data()
+        model = app.KNNModel(k=5, engine="python").fit(X_train, y_train, labels)
+        expected = [app.knn_predict(X_train, y_train, x, k=5) for x in X_test]
+        self.assertEqual(model.predict(X_test), expected)
+        self.assertEqual(model.score(X_test, y_test), app.evaluate(X_train, y_train, X_test, y_test, k=5))
+
+    def test_save_and_load_with_mmap(self):
+        X_train, X_test, y_train, _, labels = _data()
+        model = app.KNNModel(k=3, engine="python").fit(X_train, y_train, labels)
+        expected = model.predict(X_test)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "knn.model"
+            model.save(path)
+            loaded = app.KNNModel.load(path, engine="python")
+            self.assertEqual((len(loaded), loaded.n_features, loaded.k), (len(X_train), 4, 3))
+            self.assertEqual(loaded.labels, labels)
+            self.assertEqual(list(loaded.X[1]), X_train[1])
+            self.assertEqual(loaded.predict(X_test), expected)
+            copied = app.KNNModel.load(path, engine="python", use_mmap=False)
+            self.assertEqual(copied.predict(X_test), expected)
+
+    def test_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "not.model"
+            path.write_bytes(b"x" * 64)
+            with self.assertRaises(ValueError):
+                app.KNNModel.load(path)
+
+    def test_main_saves_then_loads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "knn.model"
+            for args in (["--save-model", str(path)], ["--model", str(path)]):
+                res = subprocess.run(
+                    [sys.executable, "app.py", *args], input="\n\n", capture_output=True, text=True
+                )
+                self.assertEqual(res.returncode, 0, res.stderr)
+            self.assertIn("Modelo carregado", res.stdout)
+
+    def test_main_exit_codes_and_k_override(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "knn.model"
+            app.KNNModel(k=3, engine="python").fit([[0.0], [1.0], [1.1]], [0, 1, 1]).save(path)
+            points = Path(tmp) / "points.csv"
+            points.write_text("0.1\n")
+            out = Path(tmp) / "pred.txt"
+            err = io.StringIO()
+            with contextlib.redirect_stderr(err):
+                self.assertEqual(app.main(["--model", str(Path(tmp) / "missing.model")]), 1)
+                self.assertEqual(app.main(["--generate", "10"]), 1)
+                self.assertEqual(app.main(["--model", str(path), "-k", "0"]), 1)
+                base = ["--model", str(path), "--predict-file", str(points), "--output", str(out)]
+                self.assertEqual(app.main(base), 0)
+                self.assertEqual(out.read_text(), "class_1\n")
+                # an explicit -k wins over the k saved in the model
+                self.assertEqual(app.main(base + ["-k", "1"]), 0)
+                self.assertEqual(out.read_text(), "class_0\n")
+            self.assertIn("Não foi possível carregar o modelo", err.getvalue())
+            self.assertIn("--generate requer --save-model", err.getvalue())
+
+
+@unittest.skipIf(app.np is None, "numpy não instalado")
+class TestKNNModelNumpy(unittest.TestCase):
+    def test_numpy_engine_matches_python(self):
+        X_train, X_test, y_train, _, labels = _data()
+        for k in (1, 4, 7):
+            py = app.KNNModel(k=k, engine="python").fit(X_train, y_train, labels)
+            vec = app.KNNModel(k=k, engine="numpy").fit(X_train, y_train, labels)
+            self.assertEqual(vec.predict(X_test), py.predict(X_test))
+
+    def test_numpy_load_is_zero_copy(self):
+        X_train, X_test, y_train, _, labels = _data()
+        model = app.KNNModel(k=5, engine="numpy").fit(X_train, y_train, labels)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "knn.model"
+            model.save(path)
+            loaded = app.KNNModel.load(path, engine="numpy")
+            self.assertFalse(loaded.X.flags.writeable)
+            self.assertEqual(loaded.predict(X_test), model.predict(X_test))
+            # files are interchangeable between engines
+            self.assertEqual(app.KNNModel.load(path, engine="python").predict(X_test), model.predict(X_test))
+
+
+if __name__ == "__main__":
+    unittest.main()
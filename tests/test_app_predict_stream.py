@@ -0,0 +1,79 @@
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import app
+
+
+def _model(engine="python"):
+    X, y, labels = app.generate_synthetic_data(n_per_class=20, seed=1)
+    return app.KNNModel(k=5, engine=engine).fit(X, y, labels), X
+
+
+class TestPredictStream(unittest.TestCase):
+    def test_csv_stream_in_chunks(self):
+        model, X = _model()
+        text = "a,b,c,d\n" + "".join(",".join(map(str, x)) + "\n" for x in X) + "1,2\n"
+        out = io.StringIO()
+        stats = app.predict_stream(model, io.StringIO(text), out, fmt="csv", chunk_size=7)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(stats["rows"], len(X) + 1)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(lines[:-1], [model.labels[p] for p in model.predict(X)])
+        self.assertEqual(lines[-1], '""')
+
+    def test_ndjson_keeps_ids_and_reports_errors(self):
+        model, X = _model()
+        src = io.StringIO(
+            json.dumps({"id": "p1", "features": X[0]}) + "\n"
+            + json.dumps(X[-1]) + "\n"
+            + "not json\n"
+        )
+        out = io.StringIO()
+        app.predict_stream(model, src, out, fmt="ndjson")
+        first, second, third = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(first["id"], "p1")
+        self.assertEqual(first["class"], model.predict_one(X[0]))
+        self.assertEqual(second["label"], model.labels[model.predict_one(X[-1])])
+        self.assertIn("error", third)
+
+    def test_cli_reads_stdin(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "knn.model"
+            model, X = _model()
+            model.save(path)
+            res = subprocess.run(
+                [sys.executable, "app.py", "--model", str(path), "--predict-file", "-", "--format", "ndjson"],
+                input="".join(json.dumps(x) + "\n" for x in X),
+                capture_output=True,
+                text=True,
+            )
+            self.assertEqual(res.returncode, 0, res.stderr)
+            self.assertEqual(len(res.stdout.splitlines()), len(X))
+            self.assertIn("linhas/s", res.stderr)
+
+    def test_cli_reports_unreadable_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "knn.model"
+            _model()[0].save(path)
+            points = Path(tmp) / "points.csv"
+            points.write_text("1,2,3,4\n")
+            cases = [
+                ["--predict-file", str(Path(tmp) / "missing.csv")],
+                ["--predict-file", str(points), "--output", str(Path(tmp) / "no" / "dir" / "out.csv")],
+            ]
+            for extra in cases:
+                res = subprocess.run(
+                    [sys.executable, "app.py", "--model", str(path), *extra], capture_output=True, text=True
+                )
+                self.assertEqual(res.returncode, 1)
+                self.assertIn("Erro em --predict-file/--output", res.stderr)
+                self.assertNotIn("Traceback", res.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
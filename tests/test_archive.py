@@ -0,0 +1,76 @@
+import io
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from generator import cli
+from generator.archive import iter_archive
+from generator.generate import MANIFEST_NAME, create_archive, project_files
+
+
+class _NoSeek(io.RawIOBase):
+    def __init__(self):
+        self.buf = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self.buf.write(b)
+
+
+class TestArchive(unittest.TestCase):
+    def test_create_archive_zip_to_unseekable_stream(self):
+        out = _NoSeek()
+        self.assertTrue(create_archive("zp", out, mode="full", framework="flask"))
+        with zipfile.ZipFile(io.BytesIO(out.buf.getvalue())) as zf:
+            names = zf.namelist()
+        self.assertIn("zp/app.py", names)
+        self.assertIn("zp/templates/index.html", names)
+        self.assertIn(f"zp/{MANIFEST_NAME}", names)
+
+    def test_iter_archive_tar_gz(self):
+        files = project_files("tp", mode="minimal")
+        data = b"".join(iter_archive(files, fmt="tar.gz", root="tp"))
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tf:
+            app = tf.extractfile("tp/app.py").read().decode()
+        self.assertIn("Hello from tp", app)
+
+    def test_cli_archive_writes_no_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            dest = base / "proj.tar.gz"
+            argv = ["--name", "proj", "--out", str(base / "gen")]
+            self.assertEqual(cli.main(argv + ["--archive", str(dest)]), 0)
+            self.assertTrue(tarfile.is_tarfile(dest))
+            self.assertFalse((base / "gen" / "proj").exists())
+
+    def test_cli_archive_rejects_folder_only_flags(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            dest = base / "proj.zip"
+            argv = ["--name", "proj", "--out", str(base / "gen"), "--archive", str(dest)]
+            for flag in ("--use-llm", "--update", "--provision"):
+                with self.subTest(flag=flag):
+                    self.assertEqual(cli.main(argv + [flag]), 1)
+                    self.assertFalse(dest.exists())
+
+    def test_download_rejects_unknown_mode_and_framework(self):
+        from generator.ui import app
+
+        client = app.test_client()
+        for query in (
+            "mode=full&framework=../../../../tmp/secret",
+            "mode=full&framework=rails",
+            "mode=../x&framework=flask",
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(client.get(f"/download/x.zip?{query}").status_code, 400)
+        with self.assertRaises(ValueError):
+            project_files("x", mode="full", framework="../flask")
+
+
+if __name__ == "__main__":
+    unittest.main()
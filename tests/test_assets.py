@@ -0,0 +1,59 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path, PurePosixPath
+
+from generator import assets
+from generator.generate import create_project, project_files
+
+
+class TestAssets(unittest.TestCase):
+    def test_minify_css_and_html(self):
+        css = "/* c */\nbody {\n  color: #333;\n  margin : 0 auto;\n}\na :hover { color: red; }\n"
+        self.assertEqual(assets.minify_css(css), "body{color:#333;margin : 0 auto}a :hover{color:red}")
+        html = "<p>a   <!-- x -->\n  <b>{{ name }}</b></p>\n<pre>  keep\n  me</pre>\n"
+        self.assertEqual(assets.minify_html(html), "<p>a <b>{{ name }}</b></p> <pre>  keep\n  me</pre>\n")
+
+    def test_fingerprint_rewrites_references(self):
+        files = [
+            (PurePosixPath("static/img/logo.png"), b"\x89PNG fake"),
+            (PurePosixPath("static/css/style.css"), b"body { background: url('../img/logo.png'); }\n" * 20),
+            (PurePosixPath("templates/index.html"), b'<link rel="stylesheet" href="/static/css/style.css">\n'),
+            (PurePosixPath("app.py"), b"print('untouched')\n"),
+        ]
+        out = {str(rel): data for rel, data in assets.process_assets(files, "flask", use_brotli=False)}
+        manifest = json.loads(out["static/" + assets.MANIFEST_NAME])
+        css_name = manifest["css/style.css"]
+        logo_name = manifest["img/logo.png"]
+        self.assertRegex(css_name, r"^css/style\.[0-9a-f]{8}\.css$")
+        self.assertNotIn("static/css/style.css", out)
+
+        css = out["static/" + css_name].decode()
+        self.assertIn("url('../" + logo_name + "')", css)
+        self.assertIn(f'href="/static/{css_name}"', out["templates/index.html"].decode())
+        self.assertEqual(out["app.py"], b"print('untouched')\n")
+
+        gz = out["static/" + css_name + ".gz"]
+        self.assertEqual(gzip.decompress(gz), out["static/" + css_name])
+        # images and tiny files are not precompressed
+        self.assertNotIn("static/" + logo_name + ".gz", out)
+
+    def test_output_is_deterministic(self):
+        a = list(project_files("det", mode="full", framework="express", assets=True))
+        b = list(project_files("det", mode="full", framework="express", assets=True))
+        self.assertEqual(a, b)
+
+    def test_create_project_with_assets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("withassets", Path(tmp), mode="full", framework="flask", assets=True)
+            manifest = json.loads((p / "static" / assets.MANIFEST_NAME).read_text())
+            self.assertTrue((p / "static" / manifest["css/style.css"]).exists())
+            self.assertFalse((p / "static" / "css" / "style.css").exists())
+            index = (p / "templates" / "index.html").read_text()
+            self.assertIn("/static/" + manifest["css/style.css"], index)
+            self.assertIn("withassets", index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from generator import cli, llm, provision
+from generator.batch import Journal, iter_batch
+
+
+class TestBatchNDJSON(unittest.TestCase):
+    def test_ndjson_batch_with_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            out = base / "out"
+            batch = base / "batch.ndjson"
+            batch.write_text(
+                '{"name": "b1"}\n'
+                "\n"
+                "not json\n"
+                '{"name": "b2", "mode": "full", "framework": "express"}\n'
+            )
+            report = base / "report.ndjson"
+            argv = ["--batch", str(batch), "--out", str(out)]
+            argv += ["--workers", "2", "--report", str(report)]
+            res = cli.main(argv)
+            self.assertEqual(res, 1)  # the invalid line failed
+            self.assertTrue((out / "b1" / "app.py").exists())
+            self.assertTrue((out / "b2" / "index.js").exists())
+
+            lines = [json.loads(line) for line in report.read_text().splitlines()]
+            items, summary = lines[:-1], lines[-1]["summary"]
+            self.assertEqual(len(items), 3)
+            self.assertEqual(summary["ok"], 2)
+            self.assertEqual(summary["failed"], 1)
+            self.assertEqual(summary["resume_offset"], batch.stat().st_size)
+
+    def test_iter_batch_resumes_from_offset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            batch = Path(tmp) / "batch.ndjson"
+            batch.write_text('{"name": "a"}\n{"name": "b"}\n{"name": "c"}\n')
+            entries = list(iter_batch(batch))
+            self.assertEqual([e[2]["name"] for e in entries], ["a", "b", "c"])
+            resumed = list(iter_batch(batch, offset=entries[1][0]))
+            self.assertEqual([e[2]["name"] for e in resumed], ["b", "c"])
+
+    def test_json_list_still_supported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            batch = Path(tmp) / "batch.json"
+            batch.write_text('[{"name": "a"}, {"name": "b"}]')
+            self.assertEqual([e[2]["name"] for e in iter_batch(batch, 1)], ["b"])
+
+
+class TestBatchResume(unittest.TestCase):
+    def test_resume_redoes_only_failed_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            out = base / "out"
+            batch = base / "batch.ndjson"
+            batch.write_text('{"name": "r1"}\n{"name": "r2"}\n')
+            argv = ["--batch", str(batch), "--out", str(out), "--use-llm"]
+
+            calls = []
+            original = llm.integrate_snippet
+
+            def flaky(project_dir, framework, snippet, sandbox=None, storage=None):
+                calls.append(Path(project_dir).name)
+                if Path(project_dir).name == "r2" and calls.count("r2") == 1:
+                    return False
+                return original(project_dir, framework, snippet, sandbox=sandbox, storage=storage)
+
+            with mock.patch.object(llm, "integrate_snippet", flaky):
+                self.assertEqual(cli.main(argv), 1)
+                journal = Journal.load(out / ".batch.journal")
+                self.assertEqual(journal["0"]["stage"], "integrated")
+                self.assertEqual(journal[str(len('{"name": "r1"}\n'))]["stage"], "failed")
+
+                self.assertEqual(cli.main(argv + ["--resume"]), 0)
+            # r1 was not touched again, r2 was only re-integrated
+            self.assertEqual(calls, ["r1", "r2", "r2"])
+            self.assertTrue((out / "r2" / "llm_handlers.py").exists())
+            states = Journal.load(out / ".batch.journal")
+            self.assertTrue(all(e["stage"] == "integrated" for e in states.values()))
+
+    def test_provision_each_python_item_and_redo_failures(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            out = base / "out"
+            batch = base / "batch.ndjson"
+            batch.write_text(
+                '{"name": "p1"}\n'
+                '{"name": "p2", "mode": "full", "framework": "express"}\n'
+                '{"name": "p3", "offline": false}\n'
+            )
+            argv = ["--batch", str(batch), "--out", str(out), "--provision", "--offline"]
+            calls = []
+
+            def fake(project_dir, offline=False):
+                calls.append((Path(project_dir).name, offline))
+                if calls.count(("p3", False)) == 1:
+                    raise provision.ProvisionError("cache sem as wheels")
+                return {}
+
+            with mock.patch.object(provision, "provision", fake):
+                self.assertEqual(cli.main(argv), 1)
+                journal = Journal.load(out / ".batch.journal")
+                self.assertEqual(sorted(e["stage"] for e in journal.values()), ["created", "created", "failed"])
+                self.assertEqual(cli.main(argv + ["--resume"]), 0)
+            # express projects have no venv; only the failed item is redone
+            self.assertEqual(sorted(calls), [("p1", True), ("p3", False), ("p3", False)])
+            states = Journal.load(out / ".batch.journal")
+            self.assertTrue(all(e["stage"] == "created" for e in states.values()))
+
+    def test_resume_repairs_project_left_by_a_crash(self):
+        # the child process dies (no cleanup, no journal entry) halfway
+        # through writing the third file of the project
+        crash = (
+            "import os, sys\n"
+            "from pathlib import Path\n"
+            "from generator import cli, storage\n"
+            "written = []\n"
+            "def write_bytes(self, path, data):\n"
+            "    Path(path).parent.mkdir(parents=True, exist_ok=True)\n"
+            "    written.append(path)\n"
+            "    if len(written) == 3:\n"
+            "        Path(path).write_bytes(data[: len(data) // 2])\n"
+            "        os._exit(9)\n"
+            "    Path(path).write_bytes(data)\n"
+            "storage.LocalStorage.write_bytes = write_bytes\n"
+            "cli.main(sys.argv[1:])\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            out = base / "out"
+            batch = base / "batch.ndjson"
+            batch.write_text('{"name": "c1", "mode": "full"}\n')
+            argv = ["--batch", str(batch), "--out", str(out)]
+            root = Path(__file__).resolve().parent.parent
+            res = subprocess.run([sys.executable, "-c", crash, *argv], cwd=root, capture_output=True)
+            self.assertEqual(res.returncode, 9)
+            self.assertTrue((out / "c1").is_dir())
+            self.assertEqual(Journal.load(out / ".batch.journal")["0"]["stage"], "creating")
+
+            self.assertEqual(cli.main(argv + ["--resume"]), 0)
+            self.assertEqual(Journal.load(out / ".batch.journal")["0"]["stage"], "created")
+            reference = base / "ref"
+            self.assertEqual(cli.main(["--batch", str(batch), "--out", str(reference)]), 0)
+            expected = {p.relative_to(reference / "c1"): p.read_bytes() for p in (reference / "c1").rglob("*")
+                        if p.is_file()}
+            actual = {p.relative_to(out / "c1"): p.read_bytes() for p in (out / "c1").rglob("*") if p.is_file()}
+            self.assertEqual(actual, expected)
+
+    def test_resume_never_removes_folders_it_did_not_create(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            out = base / "out"
+            (out / "mine").mkdir(parents=True)
+            (out / "mine" / "notes.txt").write_text("keep me")
+            batch = base / "batch.ndjson"
+            batch.write_text('{"name": "mine"}\n')
+            self.assertEqual(cli.main(["--batch", str(batch), "--out", str(out), "--resume"]), 0)
+            self.assertEqual((out / "mine" / "notes.txt").read_text(), "keep me")
+            self.assertTrue((out / "mine" / "app.py").exists())
+            self.assertEqual(Journal.load(out / ".batch.journal")["0"]["stage"], "created")
+
+
+if __name__ == "__main__":
+    unittest.main()
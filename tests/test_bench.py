@@ -0,0 +1,105 @@
+import importlib.util
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from generator import bench, cli, llm
+from generator.generate import create_project
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/hang":
+            time.sleep(3)
+            return
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(b"5\r\nhello\r\n0\r\n\r\n")
+            return
+        body = b"ok" if self.path == "/" else b"missing"
+        self.send_response(200 if self.path == "/" else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestBench(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(bench.percentile(values, 50), 50.0)
+        self.assertEqual(bench.percentile(values, 99), 99.0)
+        self.assertEqual(bench.percentile([], 95), 0.0)
+
+    def test_run_load_against_local_server(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            port = server.server_address[1]
+            ok, chunked, missing = bench.run_load(
+                "127.0.0.1", port, ["/", "/chunked", "/nope"], duration=0.3, concurrency=4
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertGreater(ok["requests"], 0)
+        self.assertEqual(ok["errors"], 0)
+        self.assertGreater(ok["rps"], 0)
+        self.assertLessEqual(ok["p50_ms"], ok["p99_ms"])
+        self.assertGreater(chunked["requests"], 0)
+        self.assertEqual(missing["requests"], 0)
+        self.assertGreater(missing["errors"], 0)
+
+    def test_stalled_response_counts_as_error_at_the_deadline(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            started = time.monotonic()
+            (hang,) = bench.run_load("127.0.0.1", server.server_address[1], ["/hang"], duration=0.3, concurrency=2)
+            elapsed = time.monotonic() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertLess(elapsed, 0.3 + bench.RESPONSE_GRACE + 1)
+        self.assertEqual(hang["requests"], 0)
+        self.assertEqual(hang["errors"], 2)
+
+    def test_discover_routes_includes_llm_handlers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("routes", Path(tmp), mode="full", framework="flask")
+            snippet = (
+                "@app.route('/hello')\ndef hello():\n    return 'hi'\n\n"
+                "@app.route('/items/<int:i>')\ndef item(i):\n    return str(i)\n\n"
+                "@app.route('/submit', methods=['POST'])\ndef submit():\n    return ''\n"
+            )
+            self.assertTrue(llm.integrate_snippet(p, "flask", snippet))
+            self.assertEqual(bench.detect_framework(p), "flask")
+            self.assertEqual(bench.discover_routes(p, "flask"), ["/", "/hello"])
+
+    @unittest.skipUnless(importlib.util.find_spec("flask"), "Flask not installed")
+    def test_bench_subcommand_on_generated_flask_app(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("benchme", Path(tmp), mode="minimal", framework="flask")
+            argv = ["bench", str(p), "--duration", "0.3", "--concurrency", "2", "--warmup", "0"]
+            self.assertEqual(cli.main(argv), 0)
+            self.assertEqual(cli.main(argv), 0)
+            runs = [json.loads(line) for line in (p / bench.RESULTS_NAME).read_text().splitlines()]
+            self.assertEqual(len(runs), 2)
+            self.assertEqual(runs[0]["framework"], "flask")
+            self.assertGreater(runs[0]["routes"][0]["requests"], 0)
+            self.assertIsNotNone(bench.previous_run(p))
+
+
+if __name__ == "__main__":
+    unittest.main()
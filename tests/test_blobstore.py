@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from generator import cli, llm
+from generator.blobstore import BLOBS_DIR, BlobStore, DedupStorage
+from generator.storage import LocalStorage
+
+
+class TestBlobStore(unittest.TestCase):
+    def test_dedup_links_refcount_and_gc(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = BlobStore(root / BLOBS_DIR)
+            fs = DedupStorage(store)
+            for name in ("a", "b", "c"):
+                fs.write_text(root / name / "llm_generated.txt", "print('same')\n")
+            fs.write_text(root / "a" / "notes.txt", "not deduplicated\n")
+
+            digest = store.put(b"print('same')\n")
+            self.assertEqual(store.refcount(digest), 3)
+            self.assertEqual(store.stats()["blobs"], 1)
+            self.assertEqual(store.stats()["saved_bytes"], 2 * len(b"print('same')\n"))
+            self.assertEqual((root / "b" / "llm_generated.txt").read_text(), "print('same')\n")
+            self.assertEqual((root / "a" / "notes.txt").stat().st_nlink, 1)
+
+            # plain writes never change the shared blob
+            LocalStorage().write_text(root / "a" / "llm_generated.txt", "changed\n")
+            LocalStorage().append_text(root / "b" / "llm_generated.txt", "more\n")
+            self.assertEqual((root / "c" / "llm_generated.txt").read_text(), "print('same')\n")
+            self.assertEqual(store.refcount(digest), 1)
+
+            (root / "c" / "llm_generated.txt").unlink()
+            self.assertEqual(store.gc(dry_run=True), [digest])
+            self.assertTrue(store.path_for(digest).exists())
+            self.assertEqual(store.gc(), [digest])
+            self.assertFalse(store.path_for(digest).exists())
+
+    def test_batch_with_dedup(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            out = base / "out"
+            batch = base / "batch.ndjson"
+            batch.write_text("".join(json.dumps({"name": f"d{i}"}) + "\n" for i in range(3)))
+            snippet = "@app.route('/hi')\ndef hi():\n    return 'hi'\n"
+            with mock.patch.object(llm, "generate_code_from_prompt", return_value=snippet):
+                res = cli.main(["--batch", str(batch), "--out", str(out), "--use-llm", "--dedup"])
+            self.assertEqual(res, 0)
+            store = BlobStore(out / BLOBS_DIR)
+            self.assertTrue((out / "d0" / "llm_history" / "app.py.000001.z").exists())
+            # the snippet, the integration delta and the empty handler index
+            # are stored once; the original app.py embeds the project name and
+            # each handler index delta its creation time
+            self.assertEqual(store.refcount(store.put(snippet.encode())), 3)
+            self.assertEqual(store.stats()["blobs"], 9)
+            self.assertEqual(store.stats()["references"], 15)
+            self.assertIn("llm_handlers", (out / "d1" / "app.py").read_text())
+            self.assertEqual(cli.main(["blobs", str(out), "--gc"]), 0)
+
+            # linked project files stay writable, so a project can be removed
+            # (read-only files cannot be deleted on Windows)
+            linked = out / "d0" / "llm_generated.txt"
+            self.assertGreater(linked.stat().st_nlink, 1)
+            self.assertTrue(linked.stat().st_mode & stat.S_IWUSR)
+            shutil.rmtree(out / "d0")
+            self.assertEqual(store.refcount(store.put(snippet.encode())), 2)
+
+    def test_gc_makes_old_read_only_blobs_writable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = BlobStore(root / BLOBS_DIR)
+            target = root / "p" / "llm_generated.txt"
+            self.assertTrue(store.link(target, b"old\n"))
+            # blob written by a version that made them read-only
+            os.chmod(target, stat.S_IRUSR)
+            self.assertEqual(store.gc(), [])
+            self.assertTrue(target.stat().st_mode & stat.S_IWUSR)
+
+
+if __name__ == "__main__":
+    unittest.main()
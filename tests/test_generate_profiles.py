@@ -0,0 +1,91 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from generator.generate import create_project, project_files, update_project
+
+
+def _exec_config(path: Path) -> dict:
+    namespace: dict = {}
+    exec(compile(path.read_text(), str(path), "exec"), namespace)
+    return namespace
+
+
+class TestGenerateProfiles(unittest.TestCase):
+    def test_perf_profile_for_python_frameworks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            for framework in ("flask", "fastapi", "django"):
+                p = create_project(
+                    f"perf_{framework}", base, mode="full", framework=framework, profile="perf"
+                )
+                for py in p.rglob("*.py"):
+                    text = py.read_text()
+                    self.assertNotIn("{{", text, py)
+                    compile(text, str(py), "exec")
+                self.assertIn("gunicorn", (p / "requirements.txt").read_text())
+                conf = _exec_config(p / "gunicorn.conf.py")
+                self.assertGreaterEqual(conf["workers"], 1)
+                self.assertGreater(conf["keepalive"], 0)
+                self.assertIn(f"perf_{framework}", (p / "gunicorn.conf.py").read_text())
+            self.assertNotIn("debug=True", (base / "perf_flask" / "app.py").read_text())
+            self.assertIn("GZipMiddleware", (base / "perf_fastapi" / "main.py").read_text())
+            self.assertTrue((base / "perf_django" / "project" / "wsgi.py").exists())
+
+    @unittest.skipIf(importlib.util.find_spec("django") is None, "django não instalado")
+    def test_perf_django_settings_require_a_secret(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("perf_dj", Path(tmp), mode="full", framework="django", profile="perf")
+            code = "from project import settings; print(settings.ALLOWED_HOSTS)"
+            env = {k: v for k, v in os.environ.items() if not k.startswith("DJANGO_")}
+
+            def run(**extra):
+                return subprocess.run(
+                    [sys.executable, "-c", code], cwd=p, env=dict(env, **extra), capture_output=True, text=True
+                )
+
+            res = run()
+            self.assertNotEqual(res.returncode, 0)
+            self.assertIn("ImproperlyConfigured", res.stderr)
+            self.assertIn("localhost", run(DJANGO_DEBUG="1").stdout)
+            res = run(DJANGO_SECRET_KEY="s3cret", DJANGO_ALLOWED_HOSTS="example.com, api.example.com")
+            self.assertEqual(res.stdout.strip(), "['example.com', 'api.example.com']")
+
+    def test_perf_profile_for_express(self):
+        files = {
+            str(rel): data
+            for rel, data in project_files("perf_ex", mode="full", framework="express", profile="perf")
+        }
+        index_js = files["index.js"].decode()
+        self.assertIn("cluster", index_js)
+        self.assertIn("compression()", index_js)
+        self.assertIn("keepAliveTimeout", index_js)
+        package = files["package.json"].decode()
+        self.assertIn('"name": "perf_ex"', package)
+        self.assertIn("compression", package)
+        # files that have no perf variant come from the base template
+        self.assertIn("public/index.html", files)
+
+    def test_dev_profile_is_unchanged_and_update_switches(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            p = create_project("switch", base, mode="full", framework="flask")
+            self.assertFalse((p / "gunicorn.conf.py").exists())
+            self.assertIn("debug=True", (p / "app.py").read_text())
+
+            report = update_project("switch", base, mode="full", framework="flask", profile="perf")
+            self.assertIn("gunicorn.conf.py", report["created"])
+            self.assertIn("app.py", report["updated"])
+            self.assertEqual(report["conflicts"], [])
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            project_files("x", mode="full", framework="flask", profile="turbo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from generator import generate
+from generator.generate import MANIFEST_NAME, create_project, update_project
+
+
+class TestGenerateUpdate(unittest.TestCase):
+    def test_update_rewrites_only_changed_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            p = create_project("p_upd", base, mode="minimal", framework="flask")
+            self.assertTrue((p / MANIFEST_NAME).exists())
+
+            # no template change -> nothing written
+            report = update_project("p_upd", base, mode="minimal")
+            self.assertEqual(report["updated"], [])
+            self.assertIn("app.py", report["unchanged"])
+
+            # user edits README, template changes app.py and README
+            (p / "README.md").write_text("my own notes\n")
+            old_app = generate.APP_PY_TEMPLATE
+            old_readme = generate.README_TEMPLATE
+            try:
+                generate.APP_PY_TEMPLATE = old_app + "# v2\n"
+                generate.README_TEMPLATE = old_readme + "v2\n"
+                report = update_project("p_upd", base, mode="minimal")
+            finally:
+                generate.APP_PY_TEMPLATE = old_app
+                generate.README_TEMPLATE = old_readme
+            self.assertEqual(report["updated"], ["app.py"])
+            self.assertEqual(report["conflicts"], ["README.md"])
+            self.assertIn("# v2", (p / "app.py").read_text())
+            self.assertEqual((p / "README.md").read_text(), "my own notes\n")
+
+            # the hand edit is still reported on the next update
+            report = update_project("p_upd", base, mode="minimal")
+            self.assertEqual(report["conflicts"], ["README.md"])
+
+    def test_create_project_update_flag(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            p = create_project("p_full", base, mode="full", framework="flask")
+            (p / "app.py").unlink()
+            create_project("p_full", base, mode="full", framework="flask", update=True)
+            self.assertTrue((p / "app.py").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
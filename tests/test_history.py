@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from generator import cli, history, llm
+from generator.generate import create_project
+
+
+class TestHistory(unittest.TestCase):
+    def test_deltas_rebuild_every_version(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = Path(tmp)
+            contents = [
+                "".join(f"line {i} of v{v if i % 5 == 0 else 0}\n" for i in range(50)).encode()
+                for v in range(history.SNAPSHOT_EVERY + 3)
+            ]
+            contents.append(b"binary \xff\xfe tail without newline")
+            for data in contents:
+                history.record(p, "app.py", data)
+            # recording the same content twice is a no-op
+            self.assertEqual(history.record(p, "app.py", contents[-1]), len(contents))
+
+            entries = history.read_index(p)["app.py"]
+            self.assertEqual([e["kind"] for e in entries[:2]], ["full", "delta"])
+            self.assertEqual(entries[history.SNAPSHOT_EVERY]["kind"], "full")
+            for entry, data in zip(entries, contents):
+                self.assertEqual(history.read_version(p, "app.py", entry["version"]), data)
+
+            text = history.diff(p, "app.py", 1, 2)
+            self.assertIn("-line 5 of v0", text)
+            self.assertIn("+line 5 of v1", text)
+            with self.assertRaises(history.HistoryError):
+                history.read_version(p, "app.py", 99)
+
+    def test_integrations_keep_original_and_rollback(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("hist", Path(tmp), mode="minimal")
+            original = (p / "app.py").read_bytes()
+            for route in ("one", "two"):
+                snippet = f"@app.route('/{route}')\ndef {route}():\n    return '{route}'\n"
+                self.assertTrue(llm.integrate_snippet(p, "flask", snippet))
+            (p / "app.py").write_text("# edited by hand\n")
+
+            self.assertIn("+# edited by hand", llm.backup_diff(p))
+            versions = history.read_index(p)["app.py"]
+            self.assertEqual(history.read_version(p, "app.py", 1), original)
+
+            self.assertEqual(cli.main(["history", str(p), "--file", "app.py", "--rollback", "1"]), 0)
+            self.assertEqual((p / "app.py").read_bytes(), original)
+            # the hand edit was saved before rolling back, so it can be restored
+            versions = history.read_index(p)["app.py"]
+            self.assertEqual(versions[-1]["message"], "rollback to v1")
+            self.assertEqual(history.read_version(p, "app.py", versions[-2]["version"]), b"# edited by hand\n")
+
+    def test_rollback_of_a_later_integration(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("hist2", Path(tmp), mode="minimal")
+            rel = f"{llm.SNIPPETS_DIR}/{llm.HANDLER_INDEX}"
+            for route in ("one", "two"):
+                snippet = f"@app.route('/{route}')\ndef {route}():\n    return '{route}'\n"
+                self.assertTrue(llm.integrate_snippet(p, "flask", snippet))
+            app_versions = len(history.read_index(p)["app.py"])
+            versions = history.read_index(p)[rel]
+            self.assertEqual([v["message"] for v in versions][-1], "2 handler(s)")
+            self.assertEqual(len(llm.read_handler_index(p)["handlers"]), 2)
+
+            # the second integration did not touch app.py, the index has it
+            self.assertEqual(len(history.read_index(p)["app.py"]), app_versions)
+            self.assertEqual(cli.main(["history", str(p), "--file", rel, "--rollback", "2"]), 0)
+            handlers = llm.read_handler_index(p)["handlers"]
+            self.assertEqual(len(handlers), 1)
+            self.assertEqual(handlers[0]["sha256"], llm.snippet_hash(
+                "@app.route('/one')\ndef one():\n    return 'one'\n"
+            ))
+            # and the rollback can be undone
+            self.assertEqual(cli.main(["history", str(p), "--file", rel, "--rollback", "3"]), 0)
+            self.assertEqual(len(llm.read_handler_index(p)["handlers"]), 2)
+            # rolling back to before the first integration leaves no handlers
+            self.assertEqual(cli.main(["history", str(p), "--file", rel, "--rollback", "1"]), 0)
+            self.assertEqual(llm.read_handler_index(p)["handlers"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
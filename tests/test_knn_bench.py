@@ -0,0 +1,68 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks import knn_bench
+
+
+def _row(engine, predict, fit=0.01, peak=100.0, agreement=1.0):
+    return {
+        "n": 100, "d": 4, "k": 3, "engine": engine, "queries": 10,
+        "fit_seconds": fit, "predict_seconds": predict, "queries_per_second": 10 / predict,
+        "peak_kib": peak, "agreement": agreement, "exact": engine != "lsh",
+    }
+
+
+class TestKnnBench(unittest.TestCase):
+    def test_run_case_engines_agree(self):
+        rows = knn_bench.run_case(300, 4, 3, knn_bench.available_engines(), queries=15, repeat=1)
+        self.assertEqual([r["engine"] for r in rows], knn_bench.available_engines())
+        for row in rows:
+            self.assertGreater(row["predict_seconds"], 0)
+            self.assertGreater(row["peak_kib"], 0)
+            if row["exact"]:
+                self.assertEqual(row["agreement"], 1.0)
+
+    def test_python_skipped_above_budget(self):
+        old = knn_bench.PYTHON_BUDGET
+        knn_bench.PYTHON_BUDGET = 10
+        try:
+            rows = knn_bench.run_case(50, 2, 1, ["python", "lsh"], queries=5, repeat=1)
+        finally:
+            knn_bench.PYTHON_BUDGET = old
+        self.assertIn("skipped", rows[0])
+        self.assertEqual(rows[1]["agreement"], 1.0)
+
+    def test_compare_flags_regressions(self):
+        meta = {"calibration_seconds": 0.01}
+        baseline = {"meta": meta, "results": [_row("python", 0.5), _row("lsh", 0.5)]}
+        same = {"meta": meta, "results": [_row("python", 0.6), _row("lsh", 0.5, agreement=0.8)]}
+        self.assertEqual(knn_bench.compare(same, baseline), [])
+
+        worse = {"meta": meta, "results": [_row("python", 1.0, peak=200.0), _row("lsh", 0.5)]}
+        problems = knn_bench.compare(worse, baseline)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("predict_seconds", problems[0])
+        self.assertIn("peak_kib", problems[1])
+
+        # the whole machine is twice as slow: not a regression
+        slow = {"meta": {"calibration_seconds": 0.02}, "results": [_row("python", 1.0)]}
+        self.assertEqual(knn_bench.compare(slow, baseline), [])
+
+        wrong = {"meta": meta, "results": [_row("python", 0.5, agreement=0.9)]}
+        self.assertIn("diferem", knn_bench.compare(wrong, baseline)[0])
+
+    def test_main_writes_report_and_compares(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "bench.json"
+            args = ["--n", "200", "--dims", "3", "-k", "1", "--queries", "10", "--repeat", "1"]
+            self.assertEqual(knn_bench.main(args + ["--save-baseline", str(out)]), 0)
+            report = json.loads(out.read_text(encoding="utf-8"))
+            self.assertEqual(len(report["results"]), len(knn_bench.available_engines()))
+            self.assertIn("calibration_seconds", report["meta"])
+
+            for row in report["results"]:
+                row["peak_kib"] = 0.0
+            out.write_text(json.dumps(report), encoding="utf-8")
+            self.assertEqual(knn_bench.main(args + ["--baseline", str(out)]), 1)
@@ -0,0 +1,115 @@
+import http.client
+import json
+import threading
+import time
+import unittest
+
+import app
+import knn_server
+
+
+def _model():
+    X, y, labels = app.generate_synthetic_data(n_per_class=20, seed=2)
+    return app.KNNModel(k=5, engine="python").fit(X, y, labels), X
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_calls_share_batches(self):
+        sizes = []
+
+        def predict(rows):
+            sizes.append(len(rows))
+            time.sleep(0.01)
+            return [int(r[0]) for r in rows]
+
+        batcher = knn_server.MicroBatcher(predict, max_batch=8, max_wait_ms=20)
+        futures = [batcher.submit([[i]]) for i in range(20)]
+        self.assertEqual([f.result(timeout=5) for f in futures], [[i] for i in range(20)])
+        batcher.close()
+        self.assertEqual(sum(sizes), 20)
+        self.assertLessEqual(max(sizes), 8)
+        self.assertLess(len(sizes), 20)
+
+    def test_errors_reach_every_caller(self):
+        def predict(rows):
+            raise RuntimeError("boom")
+
+        batcher = knn_server.MicroBatcher(predict, max_batch=4, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.submit([[1.0]]).result(timeout=5)
+        batcher.close()
+
+
+class TestPredictionServer(unittest.TestCase):
+    def _post(self, server, payload):
+        conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+        conn.request("POST", "/predict", json.dumps(payload), {"Content-Type": "application/json"})
+        res = conn.getresponse()
+        body = json.loads(res.read())
+        conn.close()
+        return res.status, body
+
+    def test_predict_endpoints_and_metrics(self):
+        model, X = _model()
+        server = knn_server.start_server(model, max_batch=16, max_wait_ms=5)
+        try:
+            results = {}
+
+            def call(i):
+                results[i] = self._post(server, {"features": X[i]})
+
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(10)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            for i, (status, body) in results.items():
+                self.assertEqual(status, 200)
+                self.assertEqual(body["class"], model.predict_one(X[i]))
+
+            status, body = self._post(server, {"instances": X[:3]})
+            self.assertEqual(body["classes"], model.predict(X[:3]))
+            status, body = self._post(server, {"features": [1, 2]})
+            self.assertEqual(status, 400)
+
+            conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+            conn.request("GET", "/metrics")
+            metrics = json.loads(conn.getresponse().read())
+            conn.close()
+            self.assertEqual(metrics["requests"], 12)
+            self.assertEqual(metrics["errors"], 1)
+            self.assertEqual(metrics["rows"], 13)
+            self.assertIsNotNone(metrics["p99_ms"])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_rejects_bad_content_length(self):
+        model, X = _model()
+        server = knn_server.start_server(model, max_batch=16, max_wait_ms=5)
+        try:
+            for length, status in (("-1", 400), ("abc", 400), (str(knn_server.MAX_BODY_BYTES + 1), 413)):
+                conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+                conn.putrequest("POST", "/predict")
+                conn.putheader("Content-Length", length)
+                conn.endheaders()
+                res = conn.getresponse()
+                self.assertEqual(res.status, status, length)
+                self.assertIn("error", json.loads(res.read()))
+                conn.close()
+            # the server is still serving
+            self.assertEqual(self._post(server, {"features": X[0]})[0], 200)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_bench_compares_both_modes(self):
+        model, X = _model()
+        results = knn_server.bench(model, X, requests=60, concurrency=4)
+        self.assertEqual(set(results), {"per_request", "micro_batch"})
+        self.assertEqual(results["per_request"]["mean_batch"], 1.0)
+        self.assertEqual(results["micro_batch"]["requests"], 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+from generator import llm
+from generator.generate import create_project
+
+APP_PY = (
+    "from flask import Flask\n"
+    "app = Flask(__name__)\n\n"
+    'if __name__ == "__main__":\n'
+    "    app.run()\n"
+)
+
+
+class _FakeApp:
+    def __init__(self):
+        self.routes = []
+
+    def route(self, path):
+        def deco(f):
+            self.routes.append(path)
+            return f
+
+        return deco
+
+
+def _load_hook(project):
+    spec = importlib.util.spec_from_file_location("llm_handlers_test", project / "llm_handlers.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestLLMHandlerRegistry(unittest.TestCase):
+    def test_snippets_accumulate_and_repeat_is_noop(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("reg", Path(tmp), mode="minimal", framework="flask")
+            (p / "app.py").write_text(APP_PY)
+            a = "@app.route('/a')\ndef a():\n    return 'a'\n"
+            b = "@app.route('/b')\ndef b():\n    return 'b'\n"
+            self.assertTrue(llm.integrate_snippet(p, "flask", a))
+            self.assertTrue(llm.integrate_snippet(p, "flask", b))
+            app_after_two = (p / "app.py").read_text()
+            # same snippet again (trailing whitespace ignored): nothing changes
+            self.assertTrue(llm.integrate_snippet(p, "flask", a + "  \n"))
+            self.assertEqual((p / "app.py").read_text(), app_after_two)
+
+            index = llm.read_handler_index(p)
+            self.assertEqual(len(index["handlers"]), 2)
+            for entry in index["handlers"]:
+                self.assertTrue((p / llm.SNIPPETS_DIR / entry["file"]).exists())
+            self.assertEqual(app_after_two.count("_llm_register(app)"), 1)
+
+            app = _FakeApp()
+            hook = _load_hook(p)
+            hook.register(app)
+            hook.register(app)
+            self.assertEqual(app.routes, ["/a", "/b"])
+
+    def test_legacy_handlers_are_migrated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("legacy", Path(tmp), mode="minimal", framework="flask")
+            block = llm._PY_REGISTER_CODE
+            (p / "app.py").write_text(APP_PY.replace('\nif __name__', block + block + "\nif __name__"))
+            (p / "llm_handlers.py").write_text(
+                "def register(app):\n    @app.route('/old')\n    def old():\n        return 'old'\n"
+            )
+            new = "@app.route('/new')\ndef new():\n    return 'new'\n"
+            self.assertTrue(llm.integrate_snippet(p, "flask", new))
+
+            self.assertEqual(len(llm.read_handler_index(p)["handlers"]), 2)
+            self.assertEqual((p / "app.py").read_text().count("_llm_register(app)"), 1)
+            app = _FakeApp()
+            _load_hook(p).register(app)
+            self.assertEqual(app.routes, ["/old", "/new"])
+
+    def test_express_registry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("reg_ex", Path(tmp), mode="full", framework="express")
+            s1 = "app.get('/a', (req, res) => res.send('a'));\n"
+            s2 = "app.get('/b', (req, res) => res.send('b'));\n"
+            for s in (s1, s2, s1):
+                self.assertTrue(llm.integrate_snippet(p, "express", s))
+            self.assertEqual(len(llm.read_handler_index(p)["handlers"]), 2)
+            self.assertEqual((p / "index.js").read_text().count("require('./llm_handlers')"), 1)
+            self.assertIn("index.json", (p / "llm_handlers.js").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from generator import llm
+from generator.generate import create_project
+from generator.scan import scan_tree
+
+
+class TestLLMJSAnalysis(unittest.TestCase):
+    def test_analyze_js_snippet_flags(self):
+        res = llm.analyze_js_snippet("const { exec } = require('node:child_process');\nexec('ls');\n")
+        self.assertTrue(res["has_subprocess"])
+        self.assertIn("child_process", res["imports"])
+
+        self.assertTrue(llm.analyze_js_snippet("new Function('return 1')();")["has_eval"])
+        self.assertTrue(llm.analyze_js_snippet("setTimeout('alert(1)', 10);")["has_eval"])
+        self.assertTrue(llm.analyze_js_snippet("const t = `${eval(x)}`;")["has_eval"])
+        self.assertTrue(llm.analyze_js_snippet("const vm = require('vm');")["has_exec"])
+        self.assertTrue(llm.analyze_js_snippet("require('child_' + name);")["has_importlib"])
+        self.assertTrue(llm.analyze_js_snippet("process.binding('spawn_sync');")["has_subprocess"])
+
+    def test_comments_and_strings_are_not_code(self):
+        s = (
+            "// eval(req.body)\n"
+            "/* require('child_process') */\n"
+            "app.get('/x', (req, res) => res.send('eval(1)'));\n"
+            "import express from 'express';\n"
+        )
+        res = llm.analyze_js_snippet(s)
+        self.assertFalse(llm.is_risky(res))
+        self.assertEqual(res["imports"], ["express"])
+
+    def test_regex_literals_do_not_hide_code(self):
+        res = llm.analyze_js_snippet("const r = /'/; const cp = require('child_process'); cp.exec(\"ls\")")
+        self.assertTrue(res["has_subprocess"])
+        self.assertTrue(llm.is_risky(res))
+        # a "/" after a value is a division, not a regex
+        res = llm.analyze_js_snippet("const x = a / 2 / b; const q = '/'; eval(x);")
+        self.assertTrue(res["has_eval"])
+        self.assertEqual(llm.analyze_js_snippet("const r = /[/'\"]/g; const s = 'eval(1)';")["has_eval"], False)
+        # an unmatched quote is not a string running to the end of the source
+        self.assertTrue(llm.analyze_js_snippet("x = ` ; eval(y)")["has_eval"])
+
+    def test_optional_calls(self):
+        self.assertTrue(llm.analyze_js_snippet('eval?.("1")')["has_eval"])
+        self.assertTrue(llm.analyze_js_snippet("process?.binding?.('spawn_sync')")["has_subprocess"])
+
+    def test_dynamic_require_is_risky(self):
+        for src in ('const m = require("child_"+"process"); m.execSync("ls");', "require(m);", "import(name).then(f);"):
+            with self.subTest(src=src):
+                res = llm.analyze_js_snippet(src)
+                self.assertTrue(res["has_importlib"])
+                self.assertTrue(llm.is_risky(res))
+        self.assertFalse(llm.is_risky(llm.analyze_js_snippet("const express = require('express');")))
+
+    def test_linear_on_large_snippets(self):
+        line = "app.get('/x', (req, res) => { res.json({ ok: true }); }); // route\n"
+        big = line * 20000 + "eval(payload);\n"
+        start = time.perf_counter()
+        res = llm.analyze_js_snippet(big)
+        self.assertTrue(res["has_eval"])
+        # pathological input: an unterminated comment opener repeated
+        llm.analyze_js_snippet("/*" * 500000)
+        # unclosed quotes and regex literals are not rescanned at every offset
+        llm.analyze_js_snippet("('/a[" * 100000)
+        llm.analyze_js_snippet("x = '\"`" + "(/" * 200000)
+        self.assertLess(time.perf_counter() - start, 10)
+
+    def test_express_snippet_goes_to_pending(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            p = create_project("jspend", base, mode="full", framework="express")
+            risky = "app.get('/run', (req, res) => require('child_process').exec(req.query.cmd));\n"
+            res = llm.process_snippet(p, "express", risky)
+            self.assertTrue(res["pending"])
+            self.assertFalse((p / "llm_handlers.js").exists())
+
+            safe = "app.get('/hi', (req, res) => res.send('hi'));\n"
+            res = llm.process_snippet(p, "express", safe)
+            self.assertTrue(res["integrated"])
+
+            report = scan_tree(base, workers=1)
+            by_path = {f["path"]: f for f in report["files"]}
+            self.assertEqual(by_path["jspend/llm_pending.txt"]["language"], "js")
+            self.assertTrue(by_path["jspend/llm_pending.txt"]["risky"])
+            self.assertFalse(by_path["jspend/llm_handlers.js"]["risky"])
+
+
+if __name__ == "__main__":
+    unittest.main()
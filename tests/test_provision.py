@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from generator import provision
+
+
+def _build_wheel(wheels: Path) -> None:
+    """Write a minimal pure-Python wheel for ``demo_pkg`` into ``wheels``."""
+    files = {
+        "demo_pkg/__init__.py": b"VALUE = 42\n",
+        "demo_pkg-1.0.dist-info/METADATA": b"Metadata-Version: 2.1\nName: demo_pkg\nVersion: 1.0\n",
+        "demo_pkg-1.0.dist-info/WHEEL": (
+            b"Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n"
+        ),
+    }
+    record = []
+    for name, data in files.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+        record.append(f"{name},sha256={digest},{len(data)}")
+    record.append("demo_pkg-1.0.dist-info/RECORD,,")
+    wheels.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(wheels / "demo_pkg-1.0-py3-none-any.whl", "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+        zf.writestr("demo_pkg-1.0.dist-info/RECORD", "\n".join(record) + "\n")
+
+
+def _project(root: Path, name: str) -> Path:
+    p = root / name
+    p.mkdir()
+    (p / "requirements.txt").write_text("# deps\nDemo_Pkg == 1.0\n")
+    return p
+
+
+def _import_value(project: Path) -> str:
+    py = provision._venv_python(project / "venv")
+    return subprocess.run(
+        [str(py), "-c", "import demo_pkg; print(demo_pkg.VALUE)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+class TestProvision(unittest.TestCase):
+    def test_normalize_requirements(self):
+        text = "Flask==3.0  # web\n\n# comment\ngunicorn\nflask == 3.0\n"
+        self.assertEqual(provision.normalize_requirements(text), ["flask==3.0", "gunicorn"])
+
+    def test_offline_projects_share_base_env(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            cache = root / "cache"
+            _build_wheel(cache / "wheels")
+
+            first = provision.provision(_project(root, "a"), cache=cache, offline=True)
+            self.assertFalse(first["reused_base"])
+            self.assertEqual(_import_value(root / "a"), "42")
+
+            second = provision.provision(_project(root, "b"), cache=cache, offline=True, link=True)
+            self.assertTrue(second["reused_base"])
+            self.assertEqual(second["key"], first["key"])
+            self.assertEqual(second["mode"], "link")
+            self.assertEqual(_import_value(root / "b"), "42")
+            self.assertEqual(len(list((cache / "envs").glob("*/" + provision.COMPLETE_MARKER))), 1)
+
+            state = json.loads((root / "b" / provision.STATE_NAME).read_text())
+            self.assertEqual(state["requirements"], ["demo_pkg==1.0"])
+
+    def test_offline_cache_miss_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            with self.assertRaises(provision.ProvisionError):
+                provision.provision(_project(root, "a"), cache=root / "cache", offline=True)
+            # the half-built env is not marked complete
+            self.assertFalse(list((root / "cache" / "envs").glob("*/" + provision.COMPLETE_MARKER)))
+
+    @unittest.skipUnless(os.name == "posix", "POSIX only")
+    def test_broken_interpreter_is_a_provision_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            missing = str(Path(tmp) / "no-python")
+            with self.assertRaises(provision.ProvisionError):
+                provision.requirements_key(["flask"], python=missing)
+            failing = Path(tmp) / "python"
+            failing.write_text("#!/bin/sh\nexit 3\n")
+            failing.chmod(0o755)
+            with self.assertRaises(provision.ProvisionError):
+                provision.requirements_key(["flask"], python=str(failing))
+
+
+if __name__ == "__main__":
+    unittest.main()
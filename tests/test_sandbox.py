@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from generator import llm
+from generator.generate import create_project
+from generator.sandbox import SandboxError, SandboxPool, SandboxTimeout
+
+RUNAWAY = (
+    "{% for a in range(100000) %}{% for b in range(100000) %}"
+    "{% endfor %}{% endfor %}"
+)
+
+
+class TestSandbox(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = SandboxPool(workers=1, timeout=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_render_and_analyze(self):
+        self.assertEqual(self.pool.render_text("Oi {{ n }}", {"n": "x"}), "Oi x")
+        flags = self.pool.analyze_snippet("import subprocess\n")
+        self.assertTrue(flags["has_subprocess"])
+
+    def test_runaway_render_is_killed_and_worker_replaced(self):
+        with self.assertRaises(SandboxTimeout):
+            self.pool.render_text(RUNAWAY, {"x": 1}, timeout=0.5)
+        # pool keeps working with a fresh worker
+        self.assertEqual(self.pool.render_text("{{ 1 + 1 }}", {"x": 1}), "2")
+
+    def test_keyed_templates_are_compiled_once_per_worker(self):
+        self.assertEqual(self.pool.render_text("A {{ n }}", {"n": "x"}, key=("t", 1)), "A x")
+        # same key: the worker reuses its compiled template
+        self.assertEqual(self.pool.render_text("B {{ n }}", {"n": "y"}, key=("t", 1)), "A y")
+        self.assertEqual(self.pool.render_text("B {{ n }}", {"n": "y"}, key=("t", 2)), "B y")
+
+    def test_unsafe_template_is_rejected(self):
+        with self.assertRaises(SandboxError):
+            self.pool.render_text("{{ ''.__class__.__mro__ }}", {"x": 1})
+
+    def test_create_project_with_sandbox(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project(
+                "p_sb", Path(tmp), mode="full", framework="fastapi", sandbox=self.pool
+            )
+            self.assertIn("Hello from p_sb", (p / "main.py").read_text())
+
+    def test_failed_analysis_marks_snippet_pending(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = create_project("p_sb2", Path(tmp), mode="minimal")
+            pool = SandboxPool(workers=1, timeout=0.0001)
+            try:
+                res = llm.process_snippet(p, "flask", "x = 1\n", sandbox=pool)
+            finally:
+                pool.close()
+            self.assertTrue(res["pending"])
+
+
+if __name__ == "__main__":
+    unittest.main()
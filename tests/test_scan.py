@@ -0,0 +1,49 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from generator import cli
+from generator.generate import create_project
+from generator.scan import CACHE_NAME, scan_tree, to_sarif
+
+
+class TestScan(unittest.TestCase):
+    def test_scan_tree_uses_cache_and_reports_sarif(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            p1 = create_project("s1", base, mode="minimal")
+            p2 = create_project("s2", base, mode="minimal")
+            (p1 / "llm_pending.txt").write_text("import subprocess\nsubprocess.run(['ls'])\n")
+            (p2 / "llm_generated.txt").write_text("x = 1\n")
+
+            report = scan_tree(base, workers=2)
+            self.assertEqual(report["summary"]["files"], 2)
+            self.assertEqual(report["summary"]["risky"], 1)
+            self.assertEqual(report["summary"]["analyzed"], 2)
+            self.assertTrue((base / CACHE_NAME).exists())
+
+            (p2 / "llm_generated.txt").write_text("eval('1')\n")
+            report = scan_tree(base, workers=2)
+            self.assertEqual(report["summary"]["cached"], 1)
+            self.assertEqual(report["summary"]["analyzed"], 1)
+            self.assertEqual(report["summary"]["risky"], 2)
+
+            sarif = to_sarif(report)
+            rule_ids = {r["ruleId"] for r in sarif["runs"][0]["results"]}
+            self.assertEqual(rule_ids, {"has_subprocess", "has_eval"})
+
+    def test_cli_scan_subcommand(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            p = create_project("s3", base, mode="minimal")
+            (p / "llm_generated.txt").write_text("print('ok')\n")
+            out = base / "scan.json"
+            res = cli.main(["scan", str(base), "--report", str(out)])
+            self.assertEqual(res, 0)
+            data = json.loads(out.read_text())
+            self.assertEqual(data["files"][0]["path"], "s3/llm_generated.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
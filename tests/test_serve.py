@@ -0,0 +1,58 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestServe(unittest.TestCase):
+    @unittest.skipUnless(hasattr(signal, "SIGTERM") and os.name == "posix", "POSIX only")
+    def test_builtin_server_health_and_graceful_shutdown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, PYTHONPATH=str(ROOT))
+            cmd = [sys.executable, "-u", "-m", "generator.serve", "--server", "builtin"]
+            cmd += ["--port", "0", "--workers", "2", "--threads", "2"]
+            proc = subprocess.Popen(
+                cmd, cwd=tmp, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            )
+            try:
+                line = proc.stdout.readline()
+                port = int(line.split(":")[2].split()[0])
+                base = f"http://127.0.0.1:{port}"
+                with urllib.request.urlopen(base + "/healthz", timeout=10) as r:
+                    self.assertEqual(json.load(r)["status"], "ok")
+                with urllib.request.urlopen(base + "/readyz", timeout=10) as r:
+                    self.assertEqual(r.status, 200)
+                proc.send_signal(signal.SIGTERM)
+                self.assertEqual(proc.wait(timeout=15), 0)
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.stdout.close()
+
+    @unittest.skipUnless(hasattr(signal, "SIGTERM") and os.name == "posix", "POSIX only")
+    def test_gunicorn_worker_marks_draining_on_sigterm(self):
+        from generator import serve
+
+        app = serve._load_app()
+        calls = []
+        worker = type("Worker", (), {"handle_exit": lambda self, signum, frame: calls.append(signum)})()
+        previous = signal.getsignal(signal.SIGTERM)
+        try:
+            serve._gunicorn_post_worker_init(worker)
+            os.kill(os.getpid(), signal.SIGTERM)
+            self.assertEqual(calls, [signal.SIGTERM])
+            self.assertEqual(app.test_client().get("/readyz").status_code, 503)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            app.config.pop("DRAINING", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from generator import llm
+from generator.generate import create_project, update_project
+from generator.storage import LOCAL, MemoryStorage
+
+
+class TestMemoryStorage(unittest.TestCase):
+    def test_pipeline_runs_in_memory_and_commits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            fs = MemoryStorage()
+            p = create_project("mem", base, mode="full", framework="flask", storage=fs)
+            self.assertFalse(p.exists())
+            self.assertTrue(fs.is_file(p / "templates" / "index.html"))
+
+            snippet = "@app.route('/hello')\ndef hello():\n    return 'hi'\n"
+            res = llm.process_snippet(p, "flask", snippet, storage=fs)
+            self.assertTrue(res["integrated"])
+            self.assertIn("llm_handlers", llm.backup_diff(p, storage=fs))
+            self.assertFalse(p.exists())
+
+            fs.commit()
+            self.assertTrue((p / "llm_handlers.py").exists())
+            self.assertIn("llm_handlers", (p / "app.py").read_text())
+            self.assertTrue((p / "llm_integration.log").exists())
+
+    def test_memory_overlay_does_not_touch_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            p = create_project("ovl", base, mode="minimal")
+            before = (p / "app.py").read_text()
+            fs = MemoryStorage(base=LOCAL)
+            (p / "README.md").unlink()
+            report = update_project("ovl", base, mode="minimal", storage=fs)
+            self.assertEqual(report["created"], ["README.md"])
+            self.assertFalse((p / "README.md").exists())
+            self.assertEqual(fs.read_text(p / "app.py"), before)
+            fs.unlink(p / "app.py")
+            self.assertFalse(fs.exists(p / "app.py"))
+            self.assertTrue((p / "app.py").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path, PurePosixPath
+from unittest import mock
+
+from generator.generate import TEMPLATES_DIR, project_files
+from generator.sandbox import SandboxPool
+from generator.template_cache import TemplateCache, TemplateWatcher
+
+
+def _rendered(cache, tpl, ctx=None):
+    return {str(rel): data for rel, data in cache.render_tree(tpl, ctx)}
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestTemplateCache(unittest.TestCase):
+    def _check_reload(self, use_inotify):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            tpl = root / "demo_full"
+            (tpl / "sub").mkdir(parents=True)
+            (tpl / "a.txt").write_text("A {{ project_name }}")
+            (tpl / "sub" / "b.txt").write_text("B")
+            cache = TemplateCache(root)
+            cache.watcher = TemplateWatcher(
+                root, cache.invalidate, interval=0.05, use_inotify=use_inotify
+            )
+            cache.watcher.start()
+            try:
+                time.sleep(0.2)
+                ctx = {"project_name": "x"}
+                self.assertEqual(_rendered(cache, tpl, ctx)["a.txt"], b"A x")
+                b_entry = cache.get(tpl / "sub" / "b.txt")
+
+                (tpl / "a.txt").write_text("A2 {{ project_name }}")
+                self.assertTrue(
+                    _wait_for(lambda: _rendered(cache, tpl, ctx)["a.txt"] == b"A2 x")
+                )
+                # unrelated entries stay cached
+                self.assertIs(cache.get(tpl / "sub" / "b.txt"), b_entry)
+
+                (tpl / "sub" / "c.txt").write_text("C")
+                self.assertTrue(
+                    _wait_for(lambda: "sub/c.txt" in _rendered(cache, tpl))
+                )
+            finally:
+                cache.stop()
+
+    def test_reload_with_inotify_or_default_backend(self):
+        self._check_reload(use_inotify=True)
+
+    def test_reload_with_polling(self):
+        self._check_reload(use_inotify=False)
+
+    def test_cached_render_matches_uncached(self):
+        cache = TemplateCache()
+        for fw in ("flask", "express", "fastapi"):
+            cached = list(project_files("p", mode="full", framework=fw, cache=cache))
+            plain = list(project_files("p", mode="full", framework=fw))
+            self.assertEqual(cached, plain)
+        self.assertEqual(cache.root, TEMPLATES_DIR.resolve())
+
+    def test_stale_load_does_not_replace_fresh_entry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).resolve() / "a.txt"
+            path.write_text("old")
+            cache = TemplateCache(Path(tmp))
+            load = cache._load
+
+            def racing_load(p):
+                stale = load(p)
+                # the file changes and the watcher reloads it before this
+                # (slower) load gets to store what it read
+                cache._load = load
+                p.write_text("new")
+                st = p.stat()
+                os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+                cache.invalidate(p)
+                return stale
+
+            cache._load = racing_load
+            cache.get(path)
+            cache.watcher = mock.Mock(**{"is_alive.return_value": True})
+            self.assertEqual(cache.get(path).data, b"new")
+
+    def test_sandboxed_render_tracks_edits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tpl = Path(tmp) / "demo_full"
+            tpl.mkdir()
+            (tpl / "a.txt").write_text("A {{ project_name }}")
+            cache = TemplateCache(Path(tmp))
+            ctx = {"project_name": "x"}
+            with SandboxPool(workers=1, timeout=10) as pool:
+                for _ in range(2):
+                    self.assertEqual(dict(cache.render_tree(tpl, ctx, sandbox=pool)), {PurePosixPath("a.txt"): b"A x"})
+                (tpl / "a.txt").write_text("A2 {{ project_name }}")
+                st = (tpl / "a.txt").stat()
+                os.utime(tpl / "a.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+                self.assertEqual(dict(cache.render_tree(tpl, ctx, sandbox=pool)), {PurePosixPath("a.txt"): b"A2 x"})
+
+
+if __name__ == "__main__":
+    unittest.main()